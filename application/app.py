@@ -9,7 +9,7 @@ from flask_session import Session
 import redis
 from authlib.integrations.flask_client import OAuth
 from application.settings import FLASK_SECRET, ELASTIC_SEARCH_HOST, FLASK_SESSION_TYPE, FLASK_SESSION_REDIS, \
-    CELERY_BROKER_URL, CELERY_RESULT_BACKEND, ELASTICSEARCH_USERNAME, ELASTICSEARCH_PASSWORD
+    CELERY_BROKER_URL, CELERY_RESULT_BACKEND, ELASTICSEARCH_USERNAME, ELASTICSEARCH_PASSWORD, ARCHIVE_INTERVAL_SEC
 
 
 def log_to_elasticsearch(record):
@@ -74,6 +74,14 @@ def make_celery(app):
         broker=app.config['CELERY_BROKER_URL']
     )
     celery.conf.update(app.config)
+    # Periodic tasks, sent by `celery -A app beat`
+    celery.conf.beat_schedule = {
+        'archive_terminal_documents': {
+            'task': 'workers.celery_tasks.archive_terminal_documents',
+            'schedule': ARCHIVE_INTERVAL_SEC,
+            'options': {'queue': 'default'},
+        },
+    }
 
     class ContextTask(celery.Task):
         def __call__(self, *args, **kwargs):
@@ -147,11 +155,13 @@ from application.routes.orders import orders_blueprint
 from application.routes.wallet import wallet_blueprint
 from application.routes.user import user_blueprint
 from application.routes.purchase_intent import purchase_intent_blueprint
+from application.routes.stats import stats_blueprint
 
 flask_app.register_blueprint(wallet_blueprint)
 flask_app.register_blueprint(user_blueprint)
 flask_app.register_blueprint(orders_blueprint)
 flask_app.register_blueprint(purchase_intent_blueprint)
+flask_app.register_blueprint(stats_blueprint)
 
 # Stream logs to kibana
 logger.add(log_to_elasticsearch, serialize=lambda record: json.dumps(record))
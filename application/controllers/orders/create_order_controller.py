@@ -13,6 +13,7 @@ from application.models.purchase_record import PurchaseRecord, PURCHASE_RECORD_R
 from application.models.transactions import Transaction, TRANSACTION_ACTION_AUTH, TRANSACTION_STATUS_CREATED
 from application.repositories.order_repository import OrderRepository
 from application.repositories.purchase_record_repository import PurchaseRecordRepository
+from application.repositories.unit_of_work import unit_of_work
 from application.services.task_queue import TaskQueueService
 from application.utils import now_in_epoch_sec
 
@@ -29,58 +30,60 @@ class CreateOrderController(OrderBaseController):
         )
 
     def process(self, request: Any):
-        self.validate_request(request=request)
-        purchase_records = self.generate_purchase_records(request=request)
-        [self.validate_context(purchase_record=purchase_record) for purchase_record in purchase_records]
-        logger.info('Purchase Record retrieved', kv={
-            'record_ids': [record.record_id for record in purchase_records],
-        })
-
-        instrument_id = request.get('instrument_id', None)
-        order = self.generate_order(instrument_id=instrument_id, purchase_records=purchase_records)
-        self.order_repository.create_order(order=order)
-        logger.info(
-            'created invoice and order',
-            kv={
-                "order_id": order.order_id,
-                "record_ids": order.purchase_record_ids,
-            }
-        )
+        # Order, transaction and purchase record writes are batched per collection
+        with unit_of_work():
+            self.validate_request(request=request)
+            purchase_records = self.generate_purchase_records(request=request)
+            [self.validate_context(purchase_record=purchase_record) for purchase_record in purchase_records]
+            logger.info('Purchase Record retrieved', kv={
+                'record_ids': [record.record_id for record in purchase_records],
+            })
+
+            instrument_id = request.get('instrument_id', None)
+            order = self.generate_order(instrument_id=instrument_id, purchase_records=purchase_records)
+            self.order_repository.create_order(order=order)
+            logger.info(
+                'created invoice and order',
+                kv={
+                    "order_id": order.order_id,
+                    "record_ids": order.purchase_record_ids,
+                }
+            )
 
-        # queue force complete
-        self.task_queue.queue_order_fulfillment(
-            payload={'order_id': order.order_id},
-            delay=10
-        )
+            # queue force complete
+            self.task_queue.queue_order_fulfillment(
+                payload={'order_id': order.order_id},
+                delay=10
+            )
 
-        # Create auth
-        txn_result = self.create_auth_controller.process(
-            txn=self.generate_auth_transaction_from_order(order=order)
-        )
+            # Create auth
+            txn_result = self.create_auth_controller.process(
+                txn=self.generate_auth_transaction_from_order(order=order)
+            )
 
-        logger.info(
-            'Payment processed',
-            kv={
-                "order_id": order.order_id,
-                "transaction_id": txn_result.transaction_id
-            }
-        )
+            logger.info(
+                'Payment processed',
+                kv={
+                    "order_id": order.order_id,
+                    "transaction_id": txn_result.transaction_id
+                }
+            )
 
-        # Update order
-        order_result = self.post_payment_process(
-            txn=txn_result, order=order
-        )
+            # Update order
+            order_result = self.post_payment_process(
+                txn=txn_result, order=order
+            )
 
-        # Update purchase record
-        self.post_order_processing(
-            order=order_result, purchase_records=purchase_records
-        )
-        logger.info(
-            'Post processing completed',
-            kv={
-                "order_id": order.order_id,
-            }
-        )
+            # Update purchase record
+            self.post_order_processing(
+                order=order_result, purchase_records=purchase_records
+            )
+            logger.info(
+                'Post processing completed',
+                kv={
+                    "order_id": order.order_id,
+                }
+            )
         return self.generate_response(order=order, txn=txn_result)
 
     def generate_response(
@@ -134,13 +137,8 @@ class CreateOrderController(OrderBaseController):
                 raise ValidationError("record_id missing")
 
     def generate_purchase_records(self, request: Any) -> List[PurchaseRecord]:
-        purchase_list = []
-        purchases = request['purchases']
-        for purchase in purchases:
-            record_id = purchase['record_id']
-            item = self.purchase_record_repo.get_by_id(record_id=record_id)
-            purchase_list.append(item)
-        return purchase_list
+        record_ids = [purchase['record_id'] for purchase in request['purchases']]
+        return self.purchase_record_repo.get_many(record_ids=record_ids).found_or_raise()
 
     def generate_order(
             self,
@@ -1,6 +1,7 @@
 from typing import List
 
-from application.controllers.orders.order_base_controller import OrderBaseController
+from application.controllers.orders.order_base_controller import OrderBaseController, ORDER_PAYMENT_PROJECTION, \
+    PURCHASE_RECORD_ORDER_PROJECTION
 from application.controllers.transactions.create_transaction_controller import CaptureAuthController, \
     VoidAuthController, CreateAuthController
 from application.errors import PaymentCreationError, OrderProcessing
@@ -15,7 +16,11 @@ from loguru import logger
 import shortuuid
 
 from application.repositories.purchase_record_repository import PurchaseRecordRepository
+from application.repositories.unit_of_work import unit_of_work, flush_unit_of_work
 from application.services.task_queue import TaskQueueService
+from application.settings import ORDER_PROGRESSION_STREAM_ENABLED, ORDER_PROGRESSION_FALLBACK_RETRY_SEC, \
+    ORDER_SETTLEMENT_CLAIM_SEC
+from application.utils import now_in_epoch_sec
 
 
 class FulfillOrderController(OrderBaseController):
@@ -37,7 +42,8 @@ class FulfillOrderController(OrderBaseController):
             'order_id': order_id
         })
         order = self.order_repo.get_by_order_id(
-            order_id=order_id
+            order_id=order_id,
+            projection=ORDER_PAYMENT_PROJECTION
         )
 
         if order.is_terminal():
@@ -45,9 +51,10 @@ class FulfillOrderController(OrderBaseController):
                 'order_id': order.order_id
             })
 
-        purchase_records = [
-            self.purchase_record_repo.get_by_id(record_id=record_id) for record_id in order.purchase_record_ids
-        ]
+        purchase_records = self.purchase_record_repo.get_many(
+            record_ids=order.purchase_record_ids,
+            projection=PURCHASE_RECORD_ORDER_PROJECTION
+        ).found_or_raise()
 
         logger.info("Retrieved order to fulfill", kv={
             'order_id': order.order_id,
@@ -57,26 +64,29 @@ class FulfillOrderController(OrderBaseController):
             'is_over_sla': order.is_over_sla()
         })
 
-        if order.is_created():
-            self.process_created_order(order=order, purchase_records=purchase_records)
-            logger.info("Created order fulfillment executed", kv={
-                'order_id': order.order_id,
-                'order_status': order.status,
-            })
+        # State transitions below are written in one batch per collection. post_process_order raises to
+        # reschedule the task, so it runs after the unit of work has been committed.
+        with unit_of_work():
+            if order.is_created():
+                self.process_created_order(order=order, purchase_records=purchase_records)
+                logger.info("Created order fulfillment executed", kv={
+                    'order_id': order.order_id,
+                    'order_status': order.status,
+                })
 
-        if order.is_booked():
-            self.process_booked_order(order=order, purchase_records=purchase_records)
-            logger.info("Booked order fulfillment executed", kv={
-                'order_id': order.order_id,
-                'order_status': order.status,
-            })
+            if order.is_booked():
+                self.process_booked_order(order=order, purchase_records=purchase_records)
+                logger.info("Booked order fulfillment executed", kv={
+                    'order_id': order.order_id,
+                    'order_status': order.status,
+                })
 
-        if order.is_fulfilled():
-            self.process_fulfilled_order(order=order)
-            logger.info("Fulfilled order fulfillment executed", kv={
-                'order_id': order.order_id,
-                'order_status': order.status,
-            })
+            if order.is_fulfilled():
+                self.process_fulfilled_order(order=order)
+                logger.info("Fulfilled order fulfillment executed", kv={
+                    'order_id': order.order_id,
+                    'order_status': order.status,
+                })
 
         self.post_process_order(order=order)
         logger.info("Completed order fulfillment executed", kv={
@@ -114,6 +124,7 @@ class FulfillOrderController(OrderBaseController):
                 'order_id': order.order_id,
                 'record_ids': [record.record_id for record in purchase_records],
             })
+            self.claim_settlement(order=order)
             result_txn = self.capture_auth_controller.process(
                 txn=self.generate_transaction_from_order(
                     action=TRANSACTION_ACTION_CAPTURE,
@@ -132,6 +143,7 @@ class FulfillOrderController(OrderBaseController):
                 'order_id': order.order_id,
                 'record_ids': [record.record_id for record in purchase_records],
             })
+            self.claim_settlement(order=order)
             result_txn = self.void_auth_controller.process(
                 txn=self.generate_transaction_from_order(
                     action=TRANSACTION_ACTION_VOID,
@@ -174,6 +186,7 @@ class FulfillOrderController(OrderBaseController):
                     )
                     li_to_refund += record.line_items
 
+            self.claim_settlement(order=order)
             result_txn = self.capture_auth_controller.process(
                 txn=self.generate_transaction_from_order(
                     action=TRANSACTION_ACTION_CAPTURE,
@@ -207,6 +220,24 @@ class FulfillOrderController(OrderBaseController):
                 self.order_repo.update_order(order=result_order)
 
 
+    def claim_settlement(self, order: Order) -> None:
+        """
+        Stored before the payment provider call, so concurrent fulfillment tasks of the order never
+        both capture or void it: of two tasks that loaded the same version, the compare-and-swap
+        lets one claim it, and tasks loading it later back off until the claim expires.
+        """
+        if order.is_settlement_claimed(lease_sec=ORDER_SETTLEMENT_CLAIM_SEC):
+            logger.info("Order settlement claimed by another task", kv={
+                'order_id': order.order_id,
+                'settlement_claimed_at': order.settlement_claimed_at,
+            })
+            # Settled by then, or the claiming task died and the claim can be taken over
+            claim_expires_at = order.settlement_claimed_at + ORDER_SETTLEMENT_CLAIM_SEC
+            raise OrderProcessing(schedule=claim_expires_at - now_in_epoch_sec())
+        order.claim_settlement()
+        self.order_repo.update_order(order=order)
+        flush_unit_of_work()
+
     def process_fulfilled_order(self, order: Order) -> None:
         # Send user success msg
         self.order.complete_order()
@@ -232,6 +263,10 @@ class FulfillOrderController(OrderBaseController):
             pass
         else:
             schedule = order.next_recovery_schedule()
+            if ORDER_PROGRESSION_STREAM_ENABLED and order.is_booked():
+                # Completed records queue the fulfillment from the order progression stream,
+                # the retry only catches events the stream missed
+                schedule = max(schedule, ORDER_PROGRESSION_FALLBACK_RETRY_SEC)
             raise OrderProcessing(schedule=schedule)
 
 
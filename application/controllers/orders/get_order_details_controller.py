@@ -0,0 +1,47 @@
+import asyncio
+from dataclasses import asdict
+from typing import Any, Dict
+
+from application.errors import DataNotFound, ValidationError
+from application.repositories.aio.async_order_repository import AsyncOrderRepository
+from application.repositories.aio.async_purchase_record_repository import AsyncPurchaseRecordRepository
+from application.repositories.aio.async_transaction_repository import AsyncTransactionRepository
+
+
+class GetOrderDetailsController:
+    """Order with its purchase records and payment transaction, for async views and workers."""
+
+    def __init__(
+            self,
+            order_repo: AsyncOrderRepository,
+            purchase_record_repo: AsyncPurchaseRecordRepository,
+            txn_repo: AsyncTransactionRepository
+    ) -> None:
+        self.order_repo = order_repo
+        self.purchase_record_repo = purchase_record_repo
+        self.txn_repo = txn_repo
+
+    async def process(self, request: Any) -> Dict[str, Any]:
+        self.validate_request(request=request)
+        order = await self.order_repo.get_by_order_id(request['order_id'])
+        if order.user_id != request['user_id']:
+            raise DataNotFound()
+
+        # Records and transaction only depend on the order, they are read concurrently
+        parent_transaction_id = order.incoming_invoice.parent_transaction_id
+        records, transaction = await asyncio.gather(
+            self.purchase_record_repo.get_many(order.purchase_record_ids),
+            self.txn_repo.get_by_transaction_id(parent_transaction_id) if parent_transaction_id
+            else asyncio.sleep(0, result=None)
+        )
+        return {
+            'order': asdict(order),
+            'purchase_records': [asdict(record) for record in records.found_or_raise()],
+            'transaction': asdict(transaction) if transaction else None
+        }
+
+    def validate_request(self, request: Any) -> None:
+        if not request or 'user_id' not in request:
+            raise ValidationError("user_id missing")
+        if 'order_id' not in request:
+            raise ValidationError("order_id missing")
\ No newline at end of file
@@ -0,0 +1,47 @@
+from dataclasses import asdict
+from typing import Any, Dict
+
+from loguru import logger
+
+from application.errors import ValidationError
+from application.repositories.consistency_tiers import READ_TIER_SECONDARY_OK
+from application.repositories.mongo_repository_base import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from application.repositories.order_repository import OrderRepository
+
+
+class GetOrdersController:
+    def __init__(self, order_repo: OrderRepository) -> None:
+        self.order_repo = order_repo
+
+    def process(self, request: Any) -> Dict[str, Any]:
+        self.validate_request(request=request)
+        user_id = request['user_id']
+        page = self.order_repo.page_by_user_id(
+            user_id=user_id,
+            page_size=request.get('page_size', DEFAULT_PAGE_SIZE),
+            cursor=request.get('cursor', None),
+            status=request.get('status', None),
+            # Order history view, a few seconds of replication lag is fine
+            read_tier=READ_TIER_SECONDARY_OK
+        )
+        logger.info('Orders page retrieved', kv={
+            'user_id': user_id,
+            'order_ids': [order.order_id for order in page.items],
+            'has_next_page': page.next_cursor is not None
+        })
+        return {
+            'orders': [asdict(order) for order in page.items],
+            'next_cursor': page.next_cursor
+        }
+
+    def validate_request(self, request: Any) -> None:
+        if not request or 'user_id' not in request:
+            raise ValidationError("user_id missing")
+
+        page_size = request.get('page_size', DEFAULT_PAGE_SIZE)
+        if not isinstance(page_size, int) or page_size < 1 or page_size > MAX_PAGE_SIZE:
+            raise ValidationError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+
+        cursor = request.get('cursor', None)
+        if cursor is not None and not isinstance(cursor, str):
+            raise ValidationError("cursor must be a string")
\ No newline at end of file
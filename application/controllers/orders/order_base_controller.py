@@ -3,9 +3,21 @@ from typing import List
 from application.models.order import Order
 from application.models.purchase_record import PurchaseRecord, PURCHASE_RECORD_READY
 from application.models.transactions import Transaction
+from application.repositories.consistency_tiers import WRITE_TIER_DURABLE
 from application.repositories.order_repository import OrderRepository
 from application.repositories.purchase_record_repository import PurchaseRecordRepository
 
+# Everything the payment state machine reads or writes on an order. Leaves out the invoice line items,
+# which are only needed to build the invoice, and the outgoing invoice.
+ORDER_PAYMENT_PROJECTION = [
+    'user_id', 'status', 'created_at', 'purchase_record_ids', 'refunding_invoice',
+    'incoming_invoice.counterparty', 'incoming_invoice.type', 'incoming_invoice.status',
+    'incoming_invoice.amount', 'incoming_invoice.instrument_id', 'incoming_invoice.parent_transaction_id',
+    'settlement_claimed_at',
+]
+
+# Purchase record fields used while progressing an order. Leaves out product details and progress notes.
+PURCHASE_RECORD_ORDER_PROJECTION = ['status', 'line_items', 'order_id', 'last_updated_at']
 
 class OrderBaseController:
 
@@ -99,7 +111,8 @@ class OrderBaseController:
                 # If not already booked?
                 record.status = PURCHASE_RECORD_READY
                 record.order_id = order.order_id
-                self.purchase_record_repo.update_record(record=record)
+            # READY starts the records, it must survive a failover like the booking itself
+            self.purchase_record_repo.update_records(records=purchase_records, write_tier=WRITE_TIER_DURABLE)
 
         elif order.is_failed():
             pass
@@ -1,18 +1,25 @@
+import contextlib
 from typing import Any
 
 from loguru import logger
 
-from application.controllers.orders.order_base_controller import OrderBaseController
+from application.controllers.orders.order_base_controller import OrderBaseController, ORDER_PAYMENT_PROJECTION, \
+    PURCHASE_RECORD_ORDER_PROJECTION
+from application.errors import ConcurrentModificationError
 from application.providers.stripe_charge_provider import StripeChargeProvider
+from application.repositories.mongo_repository_base import fresh_reads
 from application.repositories.order_repository import OrderRepository
 from application.repositories.purchase_record_repository import PurchaseRecordRepository
 from application.repositories.transaction_repository import TransactionRepository
+from application.repositories.unit_of_work import unit_of_work
 
 
 class OrderUpdatedController(OrderBaseController):
     PROVIDER_MAP = {
         'stripe': StripeChargeProvider()
     }
+    # Webhook handling only re-applies the provider response, so losing a race is retried right away
+    CONFLICT_ATTEMPTS = 3
 
     def __init__(
             self,
@@ -36,13 +43,38 @@ class OrderUpdatedController(OrderBaseController):
             'transaction_id': transaction_id,
             'provider': provider
         })
+        for attempt in range(1, self.CONFLICT_ATTEMPTS + 1):
+            # Retries read past the caches, which may hand back the version that just lost
+            reads = fresh_reads() if attempt > 1 else contextlib.nullcontext()
+            try:
+                with reads:
+                    return self._process(transaction_id=transaction_id, provider=provider, data=data)
+            except ConcurrentModificationError as e:
+                # The failed attempt was dropped with its in-memory models
+                logger.info("Order changed concurrently, retrying webhook", kv={
+                    'transaction_id': transaction_id,
+                    'collection': e.collection,
+                    'ids': e.ids,
+                    'attempt': attempt
+                })
+                if attempt == self.CONFLICT_ATTEMPTS:
+                    raise
+
+    def _process(
+            self,
+            transaction_id: str,
+            provider: str,
+            data: Any
+    ) -> None:
         txn = self.txn_repo.get_by_transaction_id(transaction_id=transaction_id)
         order = self.order_repo.get_by_order_id(
-            order_id=txn.order_id
+            order_id=txn.order_id,
+            projection=ORDER_PAYMENT_PROJECTION
         )
-        purchase_records = [
-            self.purchase_record_repo.get_by_id(record_id=record_id) for record_id in order.purchase_record_ids
-        ]
+        purchase_records = self.purchase_record_repo.get_many(
+            record_ids=order.purchase_record_ids,
+            projection=PURCHASE_RECORD_ORDER_PROJECTION
+        ).found_or_raise()
         provider = self.PROVIDER_MAP[provider]
         logger.info("Updating order", kv={
             'transaction_id': transaction_id,
@@ -51,15 +83,16 @@ class OrderUpdatedController(OrderBaseController):
             'current_txn_status': txn.status,
             'order_status': order.status
         })
-        txn_result = provider.handle_provider_response(
-            transaction=txn, stripe_response=data
-        )
-        updated_order = self.post_payment_process(
-            txn=txn_result, order=order
-        )
-        self.post_order_processing(
-            order=updated_order, purchase_records=purchase_records
-        )
+        with unit_of_work():
+            txn_result = provider.handle_provider_response(
+                transaction=txn, stripe_response=data
+            )
+            updated_order = self.post_payment_process(
+                txn=txn_result, order=order
+            )
+            self.post_order_processing(
+                order=updated_order, purchase_records=purchase_records
+            )
 
         logger.info("Order update complete", kv={
             'transaction_id': transaction_id,
@@ -1,15 +1,20 @@
 import shortuuid
 from dataclasses import asdict
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 
 from loguru import logger
+from pymongo.errors import BulkWriteError
 
-from application.errors import ValidationError, ContextValidationError, PricingGenerationError
+from application.errors import ValidationError, ContextValidationError, PricingGenerationError, DataAlreadyExists
 from application.models.product import SwapWebAppProductDetails, MarketplaceProductOffer
 from application.models.purchase_record import PurchaseRecord, PURCHASE_RECORD_CREATED
+from application.repositories.consistency_tiers import READ_TIER_SECONDARY_OK
 from application.repositories.digitalocean_spaces import DigitalOceanSpaces
 from application.repositories.purchase_record_repository import PurchaseRecordRepository
-from application.utils import now_in_epoch_sec
+from application.settings import PURCHASE_INTENT_BATCH_MAX_SIZE
+from application.utils import now_in_epoch_sec, _convert_from_camel_to_snake
+
+DUPLICATE_KEY_ERROR_CODE = 11000
 
 
 class PurchaseIntentController:
@@ -23,6 +28,114 @@ class PurchaseIntentController:
 
     def create(self, request: Any) -> Dict[str, Any]:
         logger.info("Purchase Intent Create request", kv=request)
+        purchase_record = self.build_priced_record(request=request)
+
+        self.purchase_record_repo.create_record(record=purchase_record)
+
+        storage_provider_urls = self.generate_storage_provider_urls(
+            purchase_record=purchase_record
+        )
+
+        logger.info('storage_provider_urls hashed', kv={
+            'record_id': purchase_record.record_id,
+        })
+
+        return self.generate_response(
+            offer=MarketplaceProductOffer(
+                record_id=purchase_record.record_id,
+                entity=purchase_record.entity,
+                line_items=purchase_record.line_items,
+                storage_provider_urls=storage_provider_urls
+            )
+        )
+
+    def create_batch(self, request: Any) -> Dict[str, Any]:
+        """
+        Creates many purchase intents at once: one bulk insert for the records that validate and
+        price, and an error entry for each one that does not or that the insert rejects, in the
+        order of the request. Storage URLs are only presigned for the records inserted.
+        """
+        purchase_intents = self.validate_batch_request(request=request)
+        logger.info("Purchase Intent Create batch request", kv={'size': len(purchase_intents)})
+
+        results: List[Any] = [None] * len(purchase_intents)
+        priced = []
+        for index, purchase_intent in enumerate(purchase_intents):
+            try:
+                item_request = {**request, 'purchase_intent': purchase_intent}
+                priced.append((index, self.build_priced_record(request=item_request)))
+            except (ValidationError, ContextValidationError, PricingGenerationError) as e:
+                results[index] = {
+                    'index': index,
+                    'error_details': {
+                        'error_type': _convert_from_camel_to_snake(e.__class__.__name__),
+                        'error_details': str(e),
+                    }
+                }
+
+        inserted = self.insert_priced_records(priced=priced, results=results)
+
+        for index, purchase_record in inserted:
+            results[index] = {
+                'index': index,
+                'result': self.generate_response(
+                    offer=MarketplaceProductOffer(
+                        record_id=purchase_record.record_id,
+                        entity=purchase_record.entity,
+                        line_items=purchase_record.line_items,
+                        storage_provider_urls=self.generate_storage_provider_urls(purchase_record=purchase_record)
+                    )
+                )
+            }
+
+        logger.info("Purchase Intent batch created", kv={
+            'created': len(inserted),
+            'failed': len(purchase_intents) - len(inserted),
+        })
+        return {
+            'results': results,
+            'created': len(inserted),
+            'failed': len(purchase_intents) - len(inserted),
+        }
+
+    def insert_priced_records(
+            self,
+            priced: List[Tuple[int, PurchaseRecord]],
+            results: List[Any]
+    ) -> List[Tuple[int, PurchaseRecord]]:
+        """
+        Inserts the priced records in one unordered bulk insert and returns the ones inserted. A record
+        the insert rejects gets an error entry in `results`, the others are inserted all the same.
+        """
+        try:
+            self.purchase_record_repo.create_records(records=[purchase_record for _, purchase_record in priced])
+            return priced
+        except BulkWriteError as e:
+            if e.details.get('writeConcernErrors'):
+                # Inserted but maybe not durably, none of the offers can be handed out
+                raise
+            write_errors = {write_error['index']: write_error for write_error in e.details.get('writeErrors', [])}
+
+        inserted = []
+        for position, (index, purchase_record) in enumerate(priced):
+            write_error = write_errors.get(position)
+            if write_error is None:
+                inserted.append((index, purchase_record))
+                continue
+            error = DataAlreadyExists if write_error.get('code') == DUPLICATE_KEY_ERROR_CODE else ValidationError
+            results[index] = {
+                'index': index,
+                'error_details': {
+                    'error_type': _convert_from_camel_to_snake(error.__name__),
+                    'error_details': write_error.get('errmsg'),
+                }
+            }
+        logger.warning("Purchase Intent batch insert partially failed", kv={
+            'record_ids': [priced[position][1].record_id for position in write_errors],
+        })
+        return inserted
+
+    def build_priced_record(self, request: Any) -> PurchaseRecord:
         try:
             self.validate_request(request=request)
             purchase_record = self.parse_offer_request(
@@ -47,25 +160,7 @@ class PurchaseIntentController:
         logger.info('Offer generated generated', kv={
             'record_id': purchase_record.record_id,
         })
-
-        self.purchase_record_repo.create_record(record=purchase_record)
-
-        storage_provider_urls = self.generate_storage_provider_urls(
-            purchase_record=purchase_record
-        )
-
-        logger.info('storage_provider_urls hashed', kv={
-            'record_id': purchase_record.record_id,
-        })
-
-        return self.generate_response(
-            offer=MarketplaceProductOffer(
-                record_id=purchase_record.record_id,
-                entity=purchase_record.entity,
-                line_items=purchase_record.line_items,
-                storage_provider_urls=storage_provider_urls
-            )
-        )
+        return purchase_record
 
     def get(self, request: Any) -> Any:
         logger.info('Purchase Intent Get request', kv=request)
@@ -74,7 +169,8 @@ class PurchaseIntentController:
         except Exception:
             raise ValidationError("No record id")
 
-        purchase_record = self.purchase_record_repo.get_by_id(record_id=record_id)
+        # Entity and line items never change after creation, a lagging secondary returns the same offer
+        purchase_record = self.purchase_record_repo.get_by_id(record_id=record_id, read_tier=READ_TIER_SECONDARY_OK)
 
         return self.generate_response(
             offer=MarketplaceProductOffer(
@@ -113,6 +209,14 @@ class PurchaseIntentController:
         if 'product_details' not in purchase_intent:
             raise ValidationError("Missing product_details from purchase intent creation request")
 
+    def validate_batch_request(self, request: Any) -> List[Any]:
+        purchase_intents = request.get('purchase_intents') if isinstance(request, dict) else None
+        if not isinstance(purchase_intents, list) or not purchase_intents:
+            raise ValidationError("Missing purchase intents from purchase intent batch creation request")
+        if len(purchase_intents) > PURCHASE_INTENT_BATCH_MAX_SIZE:
+            raise ValidationError(f"At most {PURCHASE_INTENT_BATCH_MAX_SIZE} purchase intents per batch")
+        return purchase_intents
+
     def get_source_file_path(self, record_id: str) -> str:
         return f"/sources/{record_id}"
 
@@ -7,6 +7,7 @@ from application.models.instrument import Instrument
 from application.models.transactions import Transaction, TRANSACTION_STATUS_COMPLETED, TRANSACTION_STATUS_FAILED
 from application.providers.stripe_charge_provider import StripeChargeProvider, BaseChargeProvider
 from application.repositories.transaction_repository import TransactionRepository
+from application.repositories.unit_of_work import flush_unit_of_work
 from application.repositories.wallet_repository import WalletRepository
 
 
@@ -63,6 +64,9 @@ class CreateTransactionController:
             "instrument_id": txn.instrument_id,
             "provider": provider_to_route
         })
+        # Persist everything pending before the provider call, it has side effects we must be able to trace
+        flush_unit_of_work()
+
         # call provider
         result = self.call_provider(
             provider=provider,
@@ -82,6 +86,9 @@ class CreateTransactionController:
         })
         # update DB with result
         self.txn_repository.update_record(transaction=result)
+        # Stored right away: the provider call already happened, a later failure of the caller's
+        # unit of work must not drop its outcome from our records
+        flush_unit_of_work()
 
         return result
 
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 
 
 class WalletError(Exception):
@@ -21,6 +21,18 @@ class DataAlreadyExists(Exception):
     pass
 
 
+class PartialModelWriteError(Exception):
+    pass
+
+
+class ConcurrentModificationError(Exception):
+    """A versioned write lost the race, only the listed documents need to be fetched again."""
+    def __init__(self, collection: str, ids: List[str]) -> None:
+        super().__init__(f"Concurrent modification of {collection}: {ids}")
+        self.collection = collection
+        self.ids = ids
+
+
 class InvalidUserData(Exception):
     pass
 
@@ -0,0 +1,74 @@
+"""
+Backfills the indexed lookup fields on the primary collections from the legacy
+"index collections" ({'_id': <key>, 'data': [<document ids>]}) that the
+repositories used to maintain with read-modify-write.
+
+Usage:
+    python -m application.migrations.backfill_secondary_index_fields [--batch-size 500]
+"""
+import argparse
+from typing import Any, Dict, List
+
+from pymongo import UpdateMany
+
+from application.migrations.streaming_migration import StreamingMigration
+from application.repositories.indexes import ensure_repository_indexes
+
+# (legacy index collection, primary collection, field the key maps to)
+LEGACY_INDEX_COLLECTIONS = [
+    ('order_user_index', 'orders', 'user_id'),
+    ('purchase_records_user_id_index', 'purchase_records', 'user_id'),
+    ('wallet_user_id_index_collection', 'wallet', 'user_id'),
+    ('transaction_parent_transaction_index_collection', 'transactions', 'parent_transaction_id'),
+    ('transaction_provider_transaction_index_collection', 'transactions', 'provider_transaction_id'),
+]
+
+# Bounds the size of a single $in list
+ID_CHUNK_SIZE = 1000
+
+
+class SecondaryIndexFieldBackfill(StreamingMigration):
+    def __init__(
+            self,
+            source_collection: str,
+            target_collection: str,
+            field: str,
+            batch_size: int = 500
+    ) -> None:
+        self.name = f'backfill_secondary_index_fields:{source_collection}'
+        self.source_collection = source_collection
+        self.target_collection = target_collection
+        self.field = field
+        super().__init__(batch_size=batch_size)
+
+    def process_batch(self, documents: List[Dict[str, Any]]) -> None:
+        operations = []
+        for document in documents:
+            ids = document.get('data', [])
+            for start in range(0, len(ids), ID_CHUNK_SIZE):
+                # Only fill documents that are missing the field, never overwrite it
+                operations.append(UpdateMany(
+                    {'_id': {'$in': ids[start:start + ID_CHUNK_SIZE]}, self.field: None},
+                    {"$set": {self.field: document['_id']}}
+                ))
+        if operations:
+            self.db[self.target_collection].bulk_write(operations, ordered=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Backfill indexed lookup fields from legacy index collections')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    ensure_repository_indexes()
+    for source_collection, target_collection, field in LEGACY_INDEX_COLLECTIONS:
+        SecondaryIndexFieldBackfill(
+            source_collection=source_collection,
+            target_collection=target_collection,
+            field=field,
+            batch_size=args.batch_size
+        ).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Rewrites the orders, purchase records and transactions stored in the legacy form into the
+compact storage form (short field aliases, int coded enum values), and reports the bytes saved
+per collection.
+
+The repositories read both forms, and write a model back in the form it was loaded from, so
+the migration runs while the services are up. It only runs once they write new documents
+compact, with COMPACT_STORAGE_ENABLED set everywhere.
+
+Usage:
+    COMPACT_STORAGE_ENABLED=true python -m application.migrations.compact_documents [--batch-size 500]
+"""
+import argparse
+from typing import Any, Dict, List, Type
+
+import bson
+from loguru import logger
+from pymongo import ReplaceOne
+
+from application.migrations.streaming_migration import StreamingMigration
+from application.models.compact_storage import COMPACT_MARKER
+from application.models.models_utility import MongoModels, field_names
+from application.models.order import Order
+from application.models.purchase_record import PurchaseRecord
+from application.models.transactions import Transaction
+from application.repositories.entity_cache import entity_cache
+from application.settings import COMPACT_STORAGE_ENABLED
+
+COMPACTED_COLLECTIONS = [
+    ('orders', Order),
+    ('purchase_records', PurchaseRecord),
+    ('transactions', Transaction),
+]
+
+
+class CompactDocumentsMigration(StreamingMigration):
+    def __init__(self, source_collection: str, model_class: Type[MongoModels], batch_size: int = 500) -> None:
+        self.name = f'compact_documents:{source_collection}'
+        self.source_collection = source_collection
+        self.schema = model_class.COMPACT_SCHEMA
+        self.versioned = 'version' in field_names(model_class)
+        super().__init__(batch_size=batch_size)
+
+    def process_batch(self, documents: List[Dict[str, Any]]) -> None:
+        operations = []
+        ids = []
+        bytes_before = bytes_after = 0
+        for document in documents:
+            if COMPACT_MARKER in document:
+                continue
+            compact = self.schema.encode(document)
+            compact[COMPACT_MARKER] = 1
+            # Only replaces the state that was read, a document written meanwhile is left for a re-run
+            write_filter = {'_id': document['_id'], COMPACT_MARKER: {'$exists': False}}
+            if 'status' in document:
+                write_filter['status'] = document['status']
+            if self.versioned:
+                # Models loaded before the rewrite no longer match the stored version
+                write_filter['version'] = document['version'] if document.get('version') else {'$in': [0, None]}
+                compact['version'] = (document.get('version') or 0) + 1
+            operations.append(ReplaceOne(write_filter, compact))
+            ids.append(document['_id'])
+            bytes_before += len(bson.encode(document))
+            bytes_after += len(bson.encode(compact))
+        if not operations:
+            return
+
+        result = self.db[self.source_collection].bulk_write(operations, ordered=False)
+        if entity_cache.enabled:
+            entity_cache.invalidate(self.source_collection, ids)
+        # Counted per batch, so documents skipped by a concurrent write still count: the report is an estimate
+        self.checkpoints.update_one(
+            {'_id': self.name},
+            {"$inc": {'compacted': result.modified_count, 'bytes_before': bytes_before, 'bytes_after': bytes_after}},
+            upsert=True
+        )
+
+    def report(self) -> Dict[str, Any]:
+        checkpoint = self.load_checkpoint() or {}
+        bytes_before = checkpoint.get('bytes_before', 0)
+        bytes_after = checkpoint.get('bytes_after', 0)
+        return {
+            'collection': self.source_collection,
+            'compacted': checkpoint.get('compacted', 0),
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_after,
+            'bytes_saved': bytes_before - bytes_after,
+            'saved_percent': round(100 * (bytes_before - bytes_after) / bytes_before, 1) if bytes_before else 0.0,
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Rewrite stored documents into the compact storage form')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    if not COMPACT_STORAGE_ENABLED:
+        # Services still writing the legacy form would keep adding documents to rewrite
+        logger.error("Compact storage is disabled, set COMPACT_STORAGE_ENABLED before migrating")
+        raise SystemExit(1)
+
+    for source_collection, model_class in COMPACTED_COLLECTIONS:
+        migration = CompactDocumentsMigration(
+            source_collection=source_collection,
+            model_class=model_class,
+            batch_size=args.batch_size
+        )
+        migration.run()
+        logger.info("Compact storage report", kv=migration.report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from application.repositories.mongo_repository_base import MongoRepositoryBase
+from application.utils import now_in_epoch_sec
+
+
+class StreamingMigration(MongoRepositoryBase):
+    """
+    Walks a source collection in `_id` order, one batch at a time, and checkpoints
+    the last processed `_id` in the `migrations` collection after every batch.
+    Re-running a migration resumes after the last checkpoint.
+    """
+    name: str = ''
+    source_collection: str = ''
+
+    def __init__(self, batch_size: int = 500) -> None:
+        super().__init__()
+        self.batch_size = batch_size
+        self.checkpoints = self.db.migrations
+
+    def process_batch(self, documents: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        return self.checkpoints.find_one({'_id': self.name})
+
+    def save_checkpoint(self, last_id: Any, processed: int, done: bool = False) -> None:
+        self.checkpoints.update_one(
+            {'_id': self.name},
+            {"$set": {
+                'last_id': last_id,
+                'processed': processed,
+                'done': done,
+                'updated_at': now_in_epoch_sec()
+            }},
+            upsert=True
+        )
+
+    def run(self) -> int:
+        checkpoint = self.load_checkpoint() or {}
+        if checkpoint.get('done'):
+            logger.info("Migration already completed", kv={'migration': self.name})
+            return checkpoint.get('processed', 0)
+
+        last_id = checkpoint.get('last_id', None)
+        processed = checkpoint.get('processed', 0)
+        logger.info("Migration started", kv={
+            'migration': self.name,
+            'resume_after': last_id,
+            'processed': processed
+        })
+
+        while True:
+            query = {'_id': {'$gt': last_id}} if last_id is not None else {'_id': {'$ne': None}}
+            batch = list(
+                self.db[self.source_collection].find(query).sort('_id', 1).limit(self.batch_size)
+            )
+            if not batch:
+                break
+
+            self.process_batch(batch)
+            last_id = batch[-1]['_id']
+            processed += len(batch)
+            self.save_checkpoint(last_id=last_id, processed=processed)
+            logger.info("Migration batch processed", kv={
+                'migration': self.name,
+                'last_id': last_id,
+                'processed': processed
+            })
+
+        self.save_checkpoint(last_id=last_id, processed=processed, done=True)
+        logger.info("Migration completed", kv={'migration': self.name, 'processed': processed})
+        return processed
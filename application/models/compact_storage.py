@@ -0,0 +1,129 @@
+"""
+Compact storage form of the mongo models: short aliases of verbose field names and small int
+codes of enum values, for a model and its sub documents. The Python API is unchanged, models
+are encoded when written and decoded when read.
+
+Compact documents carry the COMPACT_MARKER field, so a collection can hold both forms while
+`application.migrations.compact_documents` rewrites it. A model is always written back in the
+form it was loaded from.
+
+Fields the repositories query, sort, index or read from raw documents keep their names, only
+their enum values are coded; `filter` matches both forms of those values.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+COMPACT_MARKER = '_c'
+
+
+class CompactSchema:
+
+    def __init__(
+            self,
+            aliases: Optional[Dict[str, str]] = None,
+            enums: Optional[Dict[str, Sequence[str]]] = None,
+            nested: Optional[Dict[str, 'CompactSchema']] = None
+    ) -> None:
+        # field -> stored name
+        self.aliases = aliases or {}
+        self.fields = {alias: name for name, alias in self.aliases.items()}
+        # field -> its values, a value is stored as its position: tables are only ever appended to
+        self.enum_values = {name: list(values) for name, values in (enums or {}).items()}
+        self.enum_codes = {name: {value: code for code, value in enumerate(values)}
+                           for name, values in self.enum_values.items()}
+        # field -> schema of the sub document, or of every item of a list of sub documents
+        self.nested = nested or {}
+
+    def encode(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        return {self.aliases.get(key, key): self.encode_value(key, value) for key, value in document.items()}
+
+    def decode(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        decoded = {}
+        for key, value in document.items():
+            name = self.fields.get(key, key)
+            decoded[name] = self._decode_value(name, value)
+        return decoded
+
+    def encode_value(self, name: str, value: Any) -> Any:
+        if value is None:
+            return None
+        schema = self.nested.get(name)
+        if schema is not None:
+            if isinstance(value, list):
+                return [schema.encode(item) if isinstance(item, dict) else item for item in value]
+            return schema.encode(value) if isinstance(value, dict) else value
+        codes = self.enum_codes.get(name)
+        if codes is not None:
+            # Values added since the table was written are stored as they are
+            return codes.get(value, value)
+        return value
+
+    def _decode_value(self, name: str, value: Any) -> Any:
+        if value is None:
+            return None
+        schema = self.nested.get(name)
+        if schema is not None:
+            if isinstance(value, list):
+                return [schema.decode(item) if isinstance(item, dict) else item for item in value]
+            return schema.decode(value) if isinstance(value, dict) else value
+        values = self.enum_values.get(name)
+        if values is not None and type(value) is int and 0 <= value < len(values):
+            return values[value]
+        return value
+
+    def _resolve(self, path: str) -> Tuple[List[str], 'CompactSchema', str]:
+        # Stored parts of a dotted path, with the schema and field name of its last part
+        schema = self
+        stored = []
+        parts = path.split('.')
+        for part in parts[:-1]:
+            if part.isdigit():
+                # List index, the items share the schema of the list
+                stored.append(part)
+                continue
+            stored.append(schema.aliases.get(part, part))
+            schema = schema.nested.get(part) or CompactSchema()
+        stored.append(schema.aliases.get(parts[-1], parts[-1]))
+        return stored, schema, parts[-1]
+
+    def path(self, path: str) -> str:
+        return '.'.join(self._resolve(path)[0])
+
+    def update(self, update: Dict[str, Any]) -> Dict[str, Any]:
+        """$set document of dotted field paths -> the same in stored paths and values."""
+        encoded = {}
+        for path, value in update.items():
+            stored, schema, name = self._resolve(path)
+            encoded['.'.join(stored)] = schema.encode_value(name, value)
+        return encoded
+
+    def projection_paths(self, paths: Iterable[str]) -> List[str]:
+        """Both forms of every path and the marker, the collection may hold both forms."""
+        return list(dict.fromkeys([*paths, *(self.path(path) for path in paths), COMPACT_MARKER]))
+
+    def filter(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        """Matches enum values in both their stored forms, field names are left as they are."""
+        translated = {}
+        for key, condition in query.items():
+            if key in ('$and', '$or', '$nor'):
+                translated[key] = [self.filter(item) for item in condition]
+                continue
+            _, schema, name = self._resolve(key)
+            codes = schema.enum_codes.get(name)
+            translated[key] = self._condition(codes, condition) if codes else condition
+        return translated
+
+    def _condition(self, codes: Dict[str, int], condition: Any) -> Any:
+        def forms(values: Iterable[Any]) -> List[Any]:
+            return list(dict.fromkeys([form for value in values for form in (value, codes.get(value, value))]))
+
+        if not isinstance(condition, dict):
+            return {'$in': forms([condition])} if isinstance(condition, str) and condition in codes else condition
+        translated = {}
+        for operator, operand in condition.items():
+            if operator in ('$in', '$nin'):
+                translated[operator] = forms(operand)
+            elif operator in ('$eq', '$ne') and isinstance(operand, str) and operand in codes:
+                translated['$in' if operator == '$eq' else '$nin'] = forms([operand])
+            else:
+                translated[operator] = operand
+        return translated
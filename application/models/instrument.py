@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from typing import Optional, Union
 
+from application.models.model_codecs import compiled_codecs
 from application.models.models_utility import MongoModels
 
 
@@ -11,6 +12,7 @@ class ProviderToken:
     customer_id: Optional[str] = None
 
 
+@compiled_codecs
 @dataclass
 class Instrument(MongoModels):
     instrument_id: str
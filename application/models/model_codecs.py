@@ -0,0 +1,152 @@
+"""
+Mongo document encoders and decoders generated per model class when the class is defined.
+
+`dataclasses.asdict` deep-copies every value and walks the fields of each nested dataclass at
+runtime. The generated functions know the field layout up front: scalars are passed through,
+nested models go through their own generated function, and only lists and free form values are
+copied. The change tracking snapshot is an encoded document, so it must not share mutable state
+with the model.
+
+With MODEL_CODEC_BACKEND=msgspec documents are decoded by msgspec instead, which builds the
+nested models and validates every field type in one native pass, using the dataclasses
+themselves as the schema. Invalid documents raise msgspec.ValidationError.
+"""
+import copy
+import functools
+import typing
+from dataclasses import asdict, fields, is_dataclass
+from typing import Any, Callable, Dict, List, Type, Union
+
+import msgspec
+
+from application.models.models_utility import field_types, _unwrap_optional
+from application.settings import MODEL_CODEC_BACKEND
+
+MODEL_CODEC_COMPILED = 'compiled'
+MODEL_CODEC_MSGSPEC = 'msgspec'
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+_encoders: Dict[type, Callable[[Any], Dict[str, Any]]] = {}
+_decoders: Dict[type, Callable[[Dict[str, Any]], Any]] = {}
+
+
+def _fallback_encode(value: Any) -> Any:
+    # Values not of the declared class (a dict in place of a model, a subclass) take the generic path
+    if is_dataclass(value):
+        return asdict(value)
+    return copy.deepcopy(value)
+
+
+def _list_item_type(field_type: Any) -> Any:
+    if typing.get_origin(field_type) is list:
+        return (typing.get_args(field_type) or (Any,))[0]
+    return None
+
+
+def _encode_expression(field_type: Any, value: str, namespace: Dict[str, Any]) -> str:
+    field_type = _unwrap_optional(field_type)
+    if field_type in SCALAR_TYPES:
+        return value
+    if is_dataclass(field_type):
+        namespace[f'_encode_{field_type.__name__}'] = compile_encoder(field_type)
+        return f'None if {value} is None else _encode_{field_type.__name__}({value})'
+    item_type = _list_item_type(field_type)
+    if item_type in SCALAR_TYPES:
+        return f'None if {value} is None else list({value})'
+    if item_type is not None and is_dataclass(item_type):
+        namespace[f'_encode_{item_type.__name__}'] = compile_encoder(item_type)
+        return f'None if {value} is None else [_encode_{item_type.__name__}(item) for item in {value}]'
+    return f'_fallback_encode({value})'
+
+
+def _decode_expression(field_type: Any, value: str, namespace: Dict[str, Any]) -> str:
+    field_type = _unwrap_optional(field_type)
+    if is_dataclass(field_type):
+        namespace[f'_decode_{field_type.__name__}'] = compile_decoder(field_type)
+        return f'None if {value} is None else _decode_{field_type.__name__}({value})'
+    item_type = _list_item_type(field_type)
+    if item_type is not None and is_dataclass(item_type):
+        namespace[f'_decode_{item_type.__name__}'] = compile_decoder(item_type)
+        return f'None if {value} is None else [_decode_{item_type.__name__}(item) for item in {value}]'
+    # Stored values are fresh objects, they are handed to the model as they are
+    return value
+
+
+def _compile(name: str, lines: List[str], namespace: Dict[str, Any]) -> Callable:
+    exec('\n'.join(lines), namespace)
+    return namespace[name]
+
+
+def compile_encoder(cls: type) -> Callable[[Any], Dict[str, Any]]:
+    """obj -> document, equal to dataclasses.asdict(obj)."""
+    if cls not in _encoders:
+        namespace = {'_cls': cls, '_fallback_encode': _fallback_encode}
+        items = [
+            f"        {f.name!r}: {_encode_expression(field_type, f'obj.{f.name}', namespace)},"
+            for f, field_type in zip(fields(cls), field_types(cls).values())
+        ]
+        name = f'encode_{cls.__name__}'
+        _encoders[cls] = _compile(name, [
+            f'def {name}(obj):',
+            '    if obj.__class__ is not _cls:',
+            '        return _fallback_encode(obj)',
+            '    return {',
+            *items,
+            '    }',
+        ], namespace)
+    return _encoders[cls]
+
+
+def compile_decoder(cls: type) -> Callable[[Dict[str, Any]], Any]:
+    """document -> model, keys that are not fields are ignored and missing ones left to the constructor."""
+    if cls not in _decoders:
+        namespace = {'_cls': cls}
+        lines = []
+        for f, field_type in zip(fields(cls), field_types(cls).values()):
+            if not f.init:
+                continue
+            lines += [
+                f'    if {f.name!r} in doc:',
+                f"        kwargs[{f.name!r}] = {_decode_expression(field_type, f'doc[{f.name!r}]', namespace)}",
+            ]
+        name = f'decode_{cls.__name__}'
+        _decoders[cls] = _compile(name, [
+            f'def {name}(doc):',
+            '    kwargs = {}',
+            *lines,
+            '    return _cls(**kwargs)',
+        ], namespace)
+    return _decoders[cls]
+
+
+def msgspec_decoder(cls: type) -> Callable[[Dict[str, Any]], Any]:
+    """document -> model through msgspec, keys that are not fields are ignored."""
+    def decode(doc: Dict[str, Any]) -> Any:
+        return msgspec.convert(doc, cls)
+    return decode
+
+
+@functools.lru_cache(maxsize=None)
+def _json_decoder(cls: type) -> msgspec.json.Decoder:
+    return msgspec.json.Decoder(cls)
+
+
+def decode_json(cls: Type[Any], payload: Union[bytes, str]) -> Any:
+    """JSON payload -> validated model, without an intermediate dict."""
+    return _json_decoder(cls).decode(payload)
+
+
+def document_decoder(cls: type) -> Callable[[Dict[str, Any]], Any]:
+    if MODEL_CODEC_BACKEND == MODEL_CODEC_COMPILED:
+        return compile_decoder(cls)
+    if MODEL_CODEC_BACKEND == MODEL_CODEC_MSGSPEC:
+        return msgspec_decoder(cls)
+    raise ValueError(f"Unknown model codec backend '{MODEL_CODEC_BACKEND}'")
+
+
+def compiled_codecs(cls: Type[Any]) -> Type[Any]:
+    """Class decorator, applied above @dataclass, attaching the generated codecs to a mongo model."""
+    cls._encode_document = staticmethod(compile_encoder(cls))
+    cls._decode_document = staticmethod(document_decoder(cls))
+    return cls
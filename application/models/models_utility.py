@@ -1,26 +1,315 @@
-from dataclasses import dataclass, asdict, fields
-from typing import Dict, Any, Union
+import contextlib
+import functools
+import typing
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict, fields, is_dataclass
+from typing import ClassVar, Dict, Any, Union, List, Iterable, Iterator, Optional, Tuple
 
+from application.errors import PartialModelWriteError
+from application.models.compact_storage import CompactSchema, COMPACT_MARKER
+from application.settings import COMPACT_STORAGE_ENABLED
 from application.utils import enforce_type_check
 
+# Set while building models out of our own mongo documents, which were type checked when first written
+_trusted_data: ContextVar[bool] = ContextVar('trusted_data', default=False)
+
+
+@contextlib.contextmanager
+def trusted_data() -> Iterator[None]:
+    """StrictTypeModels built inside skip their type check."""
+    token = _trusted_data.set(True)
+    try:
+        yield
+    finally:
+        _trusted_data.reset(token)
+
+
 @dataclass
 class StrictTypeModels:
     def __post_init__(self):
         """Enforce type check after initialization."""
-        enforce_type_check(self)
+        if not _trusted_data.get():
+            enforce_type_check(self)
+
+
+@functools.lru_cache(maxsize=None)
+def field_types(cls: type) -> Dict[str, Any]:
+    """Resolved type hints of a dataclass, keyed by field name."""
+    hints = typing.get_type_hints(cls)
+    return {f.name: hints[f.name] for f in fields(cls)}
+
+
+@functools.lru_cache(maxsize=None)
+def field_names(cls: type) -> frozenset:
+    return frozenset(f.name for f in fields(cls))
+
+
+def _unwrap_optional(field_type: Any) -> Any:
+    if typing.get_origin(field_type) is Union:
+        args = [arg for arg in typing.get_args(field_type) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return field_type
+
+
+def hydrate_value(value: Any, field_type: Any) -> Any:
+    """Builds nested dataclasses (and lists of them) out of the plain values stored in mongo."""
+    if value is None:
+        return None
+    field_type = _unwrap_optional(field_type)
+    if typing.get_origin(field_type) is list:
+        item_type = (typing.get_args(field_type) or (Any,))[0]
+        if is_dataclass(item_type):
+            return [item_type(**item) if isinstance(item, dict) else item for item in value]
+        return value
+    if is_dataclass(field_type) and isinstance(value, dict):
+        return field_type(**value)
+    return value
+
+
+def to_document_value(value: Any) -> Any:
+    if is_dataclass(value):
+        return asdict(value)
+    if isinstance(value, list):
+        return [to_document_value(item) for item in value]
+    return value
+
+
+def parse_projection(projection: Iterable[str]) -> Dict[str, Any]:
+    """
+    ['status', 'incoming_invoice.status'] -> {'status': True, 'incoming_invoice': {'status': True}}
+    A path that is loaded as a whole absorbs any of its sub paths.
+    """
+    tree: Dict[str, Any] = {}
+    for path in sorted(projection, key=lambda p: p.count('.')):
+        node = tree
+        parts = path.split('.')
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is True:
+                break
+            node = child
+        else:
+            node[parts[-1]] = True
+    return tree
+
+
+def projection_paths(tree: Dict[str, Any], prefix: str = '') -> List[str]:
+    paths = []
+    for name, subtree in tree.items():
+        path = f'{prefix}{name}'
+        if subtree is True:
+            paths.append(path)
+        else:
+            paths += projection_paths(subtree, prefix=f'{path}.')
+    return paths
+
+
+def _build_partial(cls: type, data: Dict[str, Any], tree: Dict[str, Any]) -> Any:
+    # Bypasses __init__/__post_init__: only the projected fields are set, the rest stay unset
+    obj = cls.__new__(cls)
+    types = field_types(cls)
+    for name, subtree in tree.items():
+        if name not in types or name not in data:
+            continue
+        value = data[name]
+        if subtree is True:
+            value = hydrate_value(value, types[name])
+        elif isinstance(value, dict):
+            value = _build_partial(_unwrap_optional(types[name]), value, subtree)
+        object.__setattr__(obj, name, value)
+    return obj
+
+
+def _is_set(obj: Any, name: str) -> bool:
+    # Class level defaults of dataclass fields must not count as loaded values
+    instance_dict = getattr(obj, '__dict__', None)
+    if instance_dict is not None:
+        return name in instance_dict
+    return hasattr(obj, name)
+
+
+def _check_unloaded_assignments(obj: Any, tree: Dict[str, Any], prefix: str = '') -> None:
+    for f in fields(obj):
+        if f.name not in tree:
+            if _is_set(obj, f.name):
+                raise PartialModelWriteError(
+                    f"Field '{prefix}{f.name}' was not loaded and cannot be written from a partial model"
+                )
+        elif tree[f.name] is not True:
+            value = getattr(obj, f.name, None)
+            if value is not None:
+                _check_unloaded_assignments(value, tree[f.name], prefix=f'{prefix}{f.name}.')
+
+
+def diff_documents(old: Dict[str, Any], new: Dict[str, Any], prefix: str = '') -> Dict[str, Dict[str, Any]]:
+    """
+    Minimal update turning `old` into `new`: changed leaves become dotted $set paths, and lists
+    that only grew at the end (progress notes, line items) become $push with $each.
+    """
+    sets: Dict[str, Any] = {}
+    pushes: Dict[str, Any] = {}
+    for key, value in new.items():
+        path = f'{prefix}{key}'
+        if key not in old:
+            sets[path] = value
+            continue
+        old_value = old[key]
+        if old_value == value:
+            continue
+        # Sub documents that lost keys are replaced whole, there is no $unset
+        if isinstance(old_value, dict) and isinstance(value, dict) and old_value.keys() <= value.keys():
+            nested = diff_documents(old_value, value, prefix=f'{path}.')
+            sets.update(nested.get('$set', {}))
+            pushes.update(nested.get('$push', {}))
+        elif isinstance(old_value, list) and isinstance(value, list) \
+                and len(value) > len(old_value) and value[:len(old_value)] == old_value:
+            pushes[path] = {'$each': value[len(old_value):]}
+        else:
+            sets[path] = value
+
+    update = {}
+    if sets:
+        update['$set'] = sets
+    if pushes:
+        update['$push'] = pushes
+    return update
 
 
 @dataclass
 class MongoModels:
+    # Repository state kept on the instance, declared so that slotted models can hold it
+    __slots__ = ('_mongo_snapshot', '_projection_tree', '_archived', '_stored_compact')
+    # Compact storage form of the model, written when COMPACT_STORAGE_ENABLED. Both forms are always read.
+    COMPACT_SCHEMA: ClassVar[Optional[CompactSchema]] = None
 
     def get_id(self) -> Union[str, int]:
         raise NotImplemented()
 
     def to_mongo_document(self) -> Dict[str, Any]:
-        d = asdict(self)
+        if self.is_partial():
+            raise PartialModelWriteError(f"Partial {self.__class__.__name__} cannot be written as a whole document")
+        # Models decorated with @compiled_codecs encode without the deep copies of asdict
+        encode = getattr(self, '_encode_document', asdict)
+        d = encode(self)
+        if self.stores_compact():
+            d = self.COMPACT_SCHEMA.encode(d)
+            d[COMPACT_MARKER] = 1
         d['_id'] = self.get_id()
         return d
 
+    def stores_compact(self) -> bool:
+        """Written in the compact form: the form the model was loaded in, or the setting for new models."""
+        if self.COMPACT_SCHEMA is None:
+            return False
+        stored_compact = getattr(self, '_stored_compact', None)
+        return COMPACT_STORAGE_ENABLED if stored_compact is None else stored_compact
+
+    def storage_guard(self) -> Dict[str, Any]:
+        """
+        Write filter condition that the stored document is still in the form the model writes, so
+        a document rewritten by the compaction migration meanwhile is never updated in the old form.
+        """
+        if self.COMPACT_SCHEMA is None or not (COMPACT_STORAGE_ENABLED or self.stores_compact()):
+            return {}
+        return {COMPACT_MARKER: 1} if self.stores_compact() else {COMPACT_MARKER: {'$exists': False}}
+
+    def current_document(self) -> Dict[str, Any]:
+        """What this model would write: the full document, or the loaded paths of a partial model."""
+        if self.is_partial():
+            return self.to_partial_update()
+        return self.to_mongo_document()
+
+    def mark_persisted(self, document: Optional[Dict[str, Any]] = None) -> None:
+        """Remembers the stored state, later updates only send what changed since."""
+        object.__setattr__(self, '_mongo_snapshot', document if document is not None else self.current_document())
+
+    def to_mongo_update(self, document: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Update document for the changes made since the model was loaded or last written.
+        Models that were never loaded from mongo fall back to $set of the whole document.
+        """
+        document = document if document is not None else self.current_document()
+        snapshot = getattr(self, '_mongo_snapshot', None)
+        if snapshot is None:
+            return {'$set': document}
+        return diff_documents(snapshot, document)
+
+    def is_versioned(self) -> bool:
+        """Models with a `version` field are written compare-and-swap on it."""
+        return 'version' in field_types(type(self))
+
+    def loaded_version(self) -> int:
+        """Version the model was loaded with, the compare-and-swap condition of its next write."""
+        if self.is_partial():
+            if 'version' not in self._projection_tree:
+                raise PartialModelWriteError(f"Partial {self.__class__.__name__} must load 'version' to be written")
+            # Documents stored before versioning have no version field
+            return self.version if _is_set(self, 'version') else 0
+        return self.version
+
+    def is_partial(self) -> bool:
+        return getattr(self, '_projection_tree', None) is not None
+
+    def to_partial_update(self) -> Dict[str, Any]:
+        """$set document covering exactly the loaded paths of a partial model."""
+        tree = self._projection_tree
+        _check_unloaded_assignments(self, tree)
+        update = {}
+        for path in projection_paths(tree):
+            *parents, leaf = path.split('.')
+            owner = self
+            for part in parents:
+                owner = getattr(owner, part, None)
+                if owner is None:
+                    break
+            # Paths under a null sub document, or absent from the stored document, are left alone
+            if owner is not None and _is_set(owner, leaf):
+                update[path] = to_document_value(getattr(owner, leaf))
+        if self.stores_compact():
+            update = self.COMPACT_SCHEMA.update(update)
+        return update
+
     @classmethod
     def get_kwargs_from_mongo_document(cls, doc: Dict[str, Any]) -> Dict[str, Any]:
-        return {k: v for k, v in doc.items() if k in {f.name for f in fields(cls)}}
+        names = field_names(cls)
+        return {k: v for k, v in doc.items() if k in names}
+
+    @classmethod
+    def storage_filter(cls, query: Dict[str, Any]) -> Dict[str, Any]:
+        """Query filter matching the documents of both storage forms."""
+        return cls.COMPACT_SCHEMA.filter(query) if cls.COMPACT_SCHEMA else query
+
+    @classmethod
+    def storage_projection_paths(cls, paths: List[str]) -> List[str]:
+        return cls.COMPACT_SCHEMA.projection_paths(paths) if cls.COMPACT_SCHEMA else paths
+
+    @classmethod
+    def _from_storage(cls, doc: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        compact = cls.COMPACT_SCHEMA is not None and COMPACT_MARKER in doc
+        return (cls.COMPACT_SCHEMA.decode(doc) if compact else doc), compact
+
+    @classmethod
+    def from_mongo_document(cls, doc: Dict[str, Any]) -> 'MongoModels':
+        doc, compact = cls._from_storage(doc)
+        decode = getattr(cls, '_decode_document', None)
+        with trusted_data():
+            model = decode(doc) if decode else cls(**cls.get_kwargs_from_mongo_document(doc))
+        if cls.COMPACT_SCHEMA is not None:
+            object.__setattr__(model, '_stored_compact', compact)
+        return model
+
+    @classmethod
+    def from_partial_mongo_document(cls, doc: Dict[str, Any], projection: List[str]) -> 'MongoModels':
+        """
+        Lightweight model holding only the projected paths. Unloaded fields are never set on the
+        instance (reading one raises AttributeError, or yields the field default on models without slots)
+        and are never written back.
+        """
+        doc, compact = cls._from_storage(doc)
+        tree = parse_projection(projection)
+        obj = _build_partial(cls, doc, tree)
+        object.__setattr__(obj, '_projection_tree', tree)
+        if cls.COMPACT_SCHEMA is not None:
+            object.__setattr__(obj, '_stored_compact', compact)
+        return obj
@@ -1,8 +1,13 @@
 from dataclasses import dataclass
 
+from application.models.compact_storage import CompactSchema
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Money:
     amount: int
     currency: str
-    exponent: int
\ No newline at end of file
+    exponent: int
+
+
+MONEY_COMPACT_SCHEMA = CompactSchema(aliases={'amount': 'a', 'currency': 'c', 'exponent': 'e'})
\ No newline at end of file
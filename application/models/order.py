@@ -2,7 +2,9 @@ from dataclasses import dataclass
 from typing import List, Optional, Union
 
 from application.errors import UnexpectedStatus
-from application.models.money import Money
+from application.models.compact_storage import CompactSchema
+from application.models.money import Money, MONEY_COMPACT_SCHEMA
+from application.models.model_codecs import compiled_codecs
 from application.models.models_utility import MongoModels
 from application.utils import now_in_epoch_sec
 
@@ -37,7 +39,35 @@ ORDER_STATUS_FULFILLED = 'FULFILLED'    # Payin completes, should start payout i
 ORDER_STATUS_COMPLETED = 'COMPLETED'    # everything done
 ORDER_STATUS_FAILED = 'FAILED'          # failed
 
-@dataclass
+# Compact storage. Enum codes are positions in these tuples: only ever append to them.
+LINE_ITEM_COMPACT_SCHEMA = CompactSchema(
+    aliases={'product_code': 'pc', 'product_name': 'pn', 'amount': 'a', 'type': 't', 'description': 'd'},
+    enums={'type': (LINE_ITEM_TYPE_BASE_PRODUCT, LINE_ITEM_TYPE_ADD_ON_PRODUCT, LINE_ITEM_TYPE_SALES_TAX,
+                    LINE_ITEM_TYPE_USER_PURCHASES)},
+    nested={'amount': MONEY_COMPACT_SCHEMA},
+)
+# parent_transaction_id is read from raw orders by the archiver
+INVOICE_COMPACT_SCHEMA = CompactSchema(
+    aliases={'invoice_name': 'n', 'counterparty': 'cp', 'type': 't', 'status': 's', 'amount': 'a',
+             'line_items': 'li', 'instrument_id': 'iid'},
+    enums={
+        'type': (INVOICE_TYPE_INCOMING, INVOICE_TYPE_OUTGOING),
+        'status': (INVOICE_STATUS_CREATED, INVOICE_STATUS_PENDING, INVOICE_STATUS_COMPLETED, INVOICE_STATUS_FAILED),
+    },
+    nested={'amount': MONEY_COMPACT_SCHEMA, 'line_items': LINE_ITEM_COMPACT_SCHEMA},
+)
+ORDER_COMPACT_SCHEMA = CompactSchema(
+    aliases={'entity': 'en'},
+    enums={'status': (ORDER_STATUS_CREATED, ORDER_STATUS_BOOKED, ORDER_STATUS_FULFILLED, ORDER_STATUS_COMPLETED,
+                      ORDER_STATUS_FAILED)},
+    nested={
+        'incoming_invoice': INVOICE_COMPACT_SCHEMA,
+        'outgoing_invoice': INVOICE_COMPACT_SCHEMA,
+        'refunding_invoice': INVOICE_COMPACT_SCHEMA,
+    },
+)
+
+@dataclass(frozen=True, slots=True)
 class LineItem:
     product_code: str
     product_name: str
@@ -47,7 +77,7 @@ class LineItem:
 
     def __post_init__(self) -> None:
         if isinstance(self.amount, dict):
-            self.amount = Money(**self.amount)
+            object.__setattr__(self, 'amount', Money(**self.amount))
 
     def is_base_product(self):
         return self.type == LINE_ITEM_TYPE_BASE_PRODUCT
@@ -59,7 +89,7 @@ class LineItem:
         return self.type == LINE_ITEM_TYPE_SALES_TAX
 
 
-@dataclass
+@dataclass(slots=True)
 class Invoice:
     invoice_name: str
     counterparty: str
@@ -81,7 +111,8 @@ class Invoice:
             self.amount = Money(**self.amount)
 
 
-@dataclass
+@compiled_codecs
+@dataclass(slots=True)
 class Order(MongoModels):
     order_id: str
     user_id: str
@@ -93,6 +124,12 @@ class Order(MongoModels):
     incoming_invoice: Invoice
     outgoing_invoice: Optional[Invoice] = None
     refunding_invoice: Optional[Invoice] = None
+    # Bumped by every stored update, writes are compare-and-swap on it
+    version: int = 0
+    # When a fulfillment task claimed the capture or void of the incoming invoice
+    settlement_claimed_at: Optional[int] = None
+
+    COMPACT_SCHEMA = ORDER_COMPACT_SCHEMA
 
     def __post_init__(self) -> None:
         if isinstance(self.incoming_invoice, dict):
@@ -154,6 +191,12 @@ class Order(MongoModels):
         else:
             raise UnexpectedStatus()
 
+    def is_settlement_claimed(self, lease_sec: int) -> bool:
+        return self.settlement_claimed_at is not None and now_in_epoch_sec() - self.settlement_claimed_at < lease_sec
+
+    def claim_settlement(self) -> None:
+        self.settlement_claimed_at = now_in_epoch_sec()
+
     def fail_incoming_invoice(self) -> None:
         self.incoming_invoice.status = INVOICE_STATUS_FAILED
         self.status = ORDER_STATUS_FAILED
@@ -0,0 +1,132 @@
+"""
+Pricing catalog of the FaceSwap products, loaded from a JSON file: the base product of each
+mode, the add-on of each output quality (null when free) and the face enhancer add-on.
+
+Every (mode, quality, face_enhancer) combination is priced once when the catalog is loaded,
+into a tuple of immutable line items shared by all quotes. The file is checked for changes
+every PRICING_CATALOG_RELOAD_SEC and reloaded by the first quote that notices a change: the new
+catalog is built aside and swapped in at once, so a quote never sees half of two catalogs. A
+catalog that fails to load is logged and the current one is kept.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from application.errors import ContextValidationError
+from application.models.money import Money
+from application.models.order import LineItem
+from application.settings import PRICING_CATALOG_PATH, PRICING_CATALOG_RELOAD_SEC
+
+BUNDLED_CATALOG_PATH = os.path.join(os.path.dirname(__file__), 'pricing_catalog.json')
+
+QuoteKey = Tuple[str, str, bool]
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: str
+    # File modification time the snapshot was loaded at
+    mtime: float
+    modes: frozenset
+    quotes: Dict[QuoteKey, Tuple[LineItem, ...]]
+
+    def quote(self, mode: str, quality: str, face_enhancer: bool) -> Tuple[LineItem, ...]:
+        """Line items of a product, base product first. The items are shared, never mutate them."""
+        line_items = self.quotes.get((mode, quality, bool(face_enhancer)))
+        if line_items is None:
+            if mode not in self.modes:
+                raise ContextValidationError("Unrecognizable product type")
+            raise ContextValidationError("Unrecognizable product quality")
+        return line_items
+
+
+def _line_item(spec: Dict[str, Any]) -> LineItem:
+    amount = spec['amount']
+    money = Money(amount=int(amount['amount']), currency=str(amount['currency']), exponent=int(amount['exponent']))
+    return LineItem(
+        product_code=spec['product_code'],
+        product_name=spec['product_name'],
+        type=spec['type'],
+        amount=money,
+        description=spec.get('description'),
+    )
+
+
+def parse_catalog(catalog: Dict[str, Any], mtime: float = 0.0) -> CatalogSnapshot:
+    """Catalog document -> snapshot holding the line items of every combination."""
+    modes = {mode: _line_item(spec) for mode, spec in catalog['modes'].items()}
+    qualities = {quality: spec and _line_item(spec) for quality, spec in catalog['qualities'].items()}
+    enhancer = _line_item(catalog['face_enhancer'])
+
+    quotes = {}
+    for (mode, base), (quality, add_on), face_enhancer in itertools.product(
+            modes.items(), qualities.items(), (False, True)):
+        line_items = [base]
+        if add_on is not None:
+            line_items.append(add_on)
+        if face_enhancer:
+            line_items.append(enhancer)
+        quotes[(mode, quality, face_enhancer)] = tuple(line_items)
+    return CatalogSnapshot(version=str(catalog['version']), mtime=mtime, modes=frozenset(modes), quotes=quotes)
+
+
+class PricingCatalog:
+
+    def __init__(self, path: Optional[str], reload_interval_sec: int) -> None:
+        self.path = path or BUNDLED_CATALOG_PATH
+        self.reload_interval_sec = reload_interval_sec
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._snapshot = self._load()
+
+    def _load(self) -> CatalogSnapshot:
+        mtime = os.stat(self.path).st_mtime
+        with open(self.path) as f:
+            return parse_catalog(json.load(f), mtime=mtime)
+
+    @property
+    def version(self) -> str:
+        return self.snapshot().version
+
+    def reload(self) -> bool:
+        """Loads the catalog file again, keeping the current catalog if it cannot be loaded."""
+        with self._lock:
+            try:
+                snapshot = self._load()
+            except Exception as e:
+                logger.error("Pricing catalog reload failed, keeping the current catalog", kv={
+                    'path': self.path,
+                    'version': self._snapshot.version,
+                    'error': str(e)
+                })
+                return False
+            previous, self._snapshot = self._snapshot, snapshot
+        logger.info("Pricing catalog reloaded", kv={'previous_version': previous.version, 'version': snapshot.version})
+        return True
+
+    def snapshot(self) -> CatalogSnapshot:
+        """
+        The current catalog, reloaded first if its file changed. Read it once to use its version and
+        its quotes together: a reload in between would otherwise mix two catalogs.
+        """
+        if self.reload_interval_sec and time.monotonic() - self._checked_at >= self.reload_interval_sec:
+            self._checked_at = time.monotonic()
+            try:
+                changed = os.stat(self.path).st_mtime != self._snapshot.mtime
+            except OSError:
+                changed = False
+            if changed:
+                self.reload()
+        return self._snapshot
+
+    def quote(self, mode: str, quality: str, face_enhancer: bool) -> Tuple[LineItem, ...]:
+        return self.snapshot().quote(mode, quality, face_enhancer)
+
+
+pricing_catalog = PricingCatalog(path=PRICING_CATALOG_PATH, reload_interval_sec=PRICING_CATALOG_RELOAD_SEC)
@@ -3,10 +3,16 @@ import datetime
 from dataclasses import dataclass, field
 from typing import List, Dict
 
-from application.errors import ContextValidationError
+from application.models.compact_storage import CompactSchema
 from application.models.models_utility import StrictTypeModels
 from application.models.money import Money
 from application.models.order import LineItem
+from application.models.pricing_catalog import pricing_catalog
+
+SWAP_WEB_APP_PRODUCT_DETAILS_COMPACT_SCHEMA = CompactSchema(aliases={
+    'mode': 'm', 'source_file': 'sf', 'target_file': 'tf', 'output_file': 'of', 'face_enhancer': 'fe',
+    'quality': 'q', 'expedited': 'x', 'source_file_size': 'ss', 'target_file_size': 'ts',
+})
 
 
 @dataclass
@@ -28,88 +34,8 @@ class SwapWebAppProductDetails(ProductDetails):
     target_file_size: int = 0
 
     def generate_line_items(self) -> List[LineItem]:
-        li_dict = {}
-        if self.mode == 'image':
-            li_dict['base-product'] = LineItem(
-                product_code='image_face_swap',
-                product_name='Face Swap (Image)',
-                type='base-product',
-                amount=Money(
-                    amount=0,
-                    currency='USD',
-                    exponent=2
-                ),
-                description='AI image generation for faceswap'
-            )
-        elif self.mode == 'video':
-            li_dict['base-product'] = LineItem(
-                product_code='video_face_swap',
-                product_name='Face Swap (Video)',
-                type='base-product',
-                amount=Money(
-                    amount=100,
-                    currency='USD',
-                    exponent=2
-                ),
-                description='AI video generation for faceswap'
-            )
-        elif self.mode == 'vr':
-            li_dict['base-product'] = LineItem(
-                product_code='vr_face_swap',
-                product_name='Face Swap (VR)',
-                type='base-product',
-                amount=Money(
-                    amount=200,
-                    currency='USD',
-                    exponent=2
-                ),
-                description='AI VR generation for faceswap'
-            )
-        else:
-            raise ContextValidationError("Unrecognizable product type")
-
-        if self.quality == 'low':
-            pass
-        elif self.quality == 'medium':
-            li_dict['quality'] = LineItem(
-                product_code='output_quality',
-                product_name='Medium Quality',
-                type='add-on-product',
-                amount=Money(
-                    amount=10,
-                    currency='USD',
-                    exponent=2
-                ),
-                description='Medium quality'
-            )
-        elif self.quality == 'high':
-            li_dict['quality'] = LineItem(
-                product_code='vr_face_swap',
-                product_name='Face Swap (VR)',
-                type='add-on-product',
-                amount=Money(
-                    amount=20,
-                    currency='USD',
-                    exponent=2
-                ),
-                description='High quality'
-            )
-        else:
-            raise ContextValidationError("Unrecognizable product quality")
-
-        if self.face_enhancer:
-            li_dict['enhancer'] = LineItem(
-                product_code='vr_face_swap',
-                product_name='Face Swap (VR)',
-                type='add-on-product',
-                amount=Money(
-                    amount=20,
-                    currency='USD',
-                    exponent=2
-                ),
-                description='AI VR generation for faceswap'
-            )
-        return [li_dict[key] for key in li_dict.keys()]
+        # Priced by the catalog when it is loaded, quoting is a lookup of the shared line items
+        return list(pricing_catalog.quote(self.mode, self.quality, self.face_enhancer))
 
 
 @dataclass
@@ -3,9 +3,11 @@ import time
 from dataclasses import dataclass
 from typing import Optional, Union, Dict, List
 
+from application.models.compact_storage import CompactSchema
+from application.models.model_codecs import compiled_codecs
 from application.models.models_utility import MongoModels
-from application.models.order import LineItem
-from application.models.product import SwapWebAppProductDetails
+from application.models.order import LineItem, LINE_ITEM_COMPACT_SCHEMA
+from application.models.product import SwapWebAppProductDetails, SWAP_WEB_APP_PRODUCT_DETAILS_COMPACT_SCHEMA
 from application.utils import now_in_epoch_sec
 
 PURCHASE_RECORD_CREATED = 'CREATED'
@@ -27,7 +29,17 @@ PURCHASE_RECORD_STATUSES = [
 # processing -> completed: queued call to/from service
 # processing -> failed: queued call to service or sla
 
-@dataclass
+# Compact storage. Enum codes are positions in the tuple: only ever append to it.
+PURCHASE_RECORD_COMPACT_SCHEMA = CompactSchema(
+    aliases={'last_updated_at': 'lu', 'entity': 'en', 'attempt_count': 'ac', 'product_details': 'pd',
+             'line_items': 'li', 'progress_note': 'pn', 'description': 'd'},
+    enums={'status': (PURCHASE_RECORD_CREATED, PURCHASE_RECORD_READY, PURCHASE_RECORD_PROCESSING,
+                      PURCHASE_RECORD_COMPLETED, PURCHASE_RECORD_FAILED)},
+    nested={'product_details': SWAP_WEB_APP_PRODUCT_DETAILS_COMPACT_SCHEMA, 'line_items': LINE_ITEM_COMPACT_SCHEMA},
+)
+
+@compiled_codecs
+@dataclass(slots=True)
 class PurchaseRecord(MongoModels):
     record_id: str
     created_at: int
@@ -42,6 +54,10 @@ class PurchaseRecord(MongoModels):
     description: Optional[str] = None
     user_id: Optional[str] = None
     order_id: Optional[str] = None
+    # Bumped by every stored update, writes are compare-and-swap on it
+    version: int = 0
+
+    COMPACT_SCHEMA = PURCHASE_RECORD_COMPACT_SCHEMA
 
     def __post_init__(self) -> None:
         line_items = []
@@ -1,7 +1,9 @@
-from dataclasses import dataclass, asdict
-from typing import Optional, Dict, Any, Union
+from dataclasses import dataclass, asdict, field
+from typing import Optional, Dict, Any, Union, List
 
-from application.models.money import Money
+from application.models.compact_storage import CompactSchema
+from application.models.money import Money, MONEY_COMPACT_SCHEMA
+from application.models.model_codecs import compiled_codecs
 from application.models.models_utility import MongoModels
 
 TRANSACTION_ACTION_AUTH = 'AUTH'
@@ -24,7 +26,21 @@ TRANSACTION_ACTIONS = [TRANSACTION_ACTION_AUTH, TRANSACTION_ACTION_CAPTURE, TRAN
 TRANSACTION_STATUSES = [TRANSACTION_STATUS_CREATED, TRANSACTION_STATUS_PROCESSING,
                         TRANSACTION_STATUS_COMPLETED, TRANSACTION_STATUS_FAILED, TRANSACTION_STATUS_PROCESSING_FAILED]
 
-@dataclass
+# Compact storage. Enum codes are positions in the tuples: only ever append to them.
+TRANSACTION_COMPACT_SCHEMA = CompactSchema(
+    aliases={'amount': 'a', 'instrument_id': 'iid', 'client_secret': 'cs', 'provider': 'p',
+             'provider_request': 'prq', 'provider_response': 'prs', 'provider_error_details': 'ped'},
+    enums={
+        'action': (TRANSACTION_ACTION_AUTH, TRANSACTION_ACTION_CAPTURE, TRANSACTION_ACTION_VOID,
+                   TRANSACTION_ACTION_REFUND, TRANSACTION_ACTION_PAYOUT),
+        'status': (TRANSACTION_STATUS_CREATED, TRANSACTION_STATUS_PROCESSING, TRANSACTION_STATUS_COMPLETED,
+                   TRANSACTION_STATUS_FAILED, TRANSACTION_STATUS_PROCESSING_FAILED),
+    },
+    nested={'amount': MONEY_COMPACT_SCHEMA},
+)
+
+@compiled_codecs
+@dataclass(slots=True)
 class Transaction(MongoModels):
     transaction_id: str
     parent_transaction_id: str
@@ -40,6 +56,8 @@ class Transaction(MongoModels):
     provider_response: Optional[str] = None
     provider_error_details: Optional[str] = None
 
+    COMPACT_SCHEMA = TRANSACTION_COMPACT_SCHEMA
+
     def __post_init__(self) -> None:
         if isinstance(self.amount, dict):
             self.amount = Money(**self.amount)
@@ -80,3 +98,12 @@ class Transaction(MongoModels):
     def is_payout(self) -> bool:
         return self.action == TRANSACTION_ACTION_PAYOUT
 
+
+@dataclass
+class TransactionLineage:
+    """An auth and every transaction issued against it (captures, voids, refunds)."""
+    auth: Optional[Transaction]
+    children: List[Transaction] = field(default_factory=list)
+
+    def by_action(self, action: str) -> List[Transaction]:
+        return [txn for txn in self.children if txn.action == action]
@@ -3,6 +3,7 @@ from dataclasses import dataclass
 from typing import Optional, List
 
 from application.errors import InvalidUserData
+from application.models.model_codecs import compiled_codecs
 from application.models.models_utility import MongoModels
 
 LOGIN_METHOD_PASSWORD = 'PASSWORD'
@@ -30,6 +31,7 @@ class LogoutUser:
     user_id: str
 
 
+@compiled_codecs
 @dataclass
 class User(MongoModels):
     # For now it is same as username, but may not always be. So, having another field
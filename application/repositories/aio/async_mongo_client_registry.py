@@ -0,0 +1,68 @@
+import asyncio
+import os
+import weakref
+
+from loguru import logger
+from pymongo import AsyncMongoClient
+from pymongo.server_api import ServerApi
+
+from application.repositories.memory_backend import AsyncMemoryClient
+from application.repositories.mongo_client_registry import STORAGE_BACKEND_MEMORY, mongo_client_registry
+from application.settings import MONGODB_BACKEND, MONGODB_CONNECT_URL, MONGODB_MAX_POOL_SIZE, MONGODB_MIN_POOL_SIZE, \
+    MONGODB_MAX_IDLE_TIME_MS, MONGODB_WAIT_QUEUE_TIMEOUT_MS
+
+
+class AsyncMongoClientRegistry:
+    """
+    Holds one AsyncMongoClient per running event loop.
+
+    An async client is bound to the loop it was created on, so it cannot be shared the way the
+    process-wide sync client is. Every loop gets a client and a pool of its own: use long lived
+    loops only, such as the process-wide one of `event_loop.run_async` that serves the Flask views,
+    and `close()` the client on the loop before the loop ends.
+    """
+
+    def __init__(self) -> None:
+        self._clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncMongoClient]' = \
+            weakref.WeakKeyDictionary()
+
+    def get_client(self) -> AsyncMongoClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._create_client()
+            self._clients[loop] = client
+            logger.info("Async mongo client created", kv={
+                'pid': os.getpid(),
+                'max_pool_size': MONGODB_MAX_POOL_SIZE,
+            })
+        return client
+
+    def _create_client(self) -> AsyncMongoClient:
+        if MONGODB_BACKEND == STORAGE_BACKEND_MEMORY:
+            # Same store as the sync repositories
+            return AsyncMemoryClient(mongo_client_registry.get_client())
+        return AsyncMongoClient(
+            MONGODB_CONNECT_URL,
+            server_api=ServerApi('1'),
+            ssl=True,
+            maxPoolSize=MONGODB_MAX_POOL_SIZE,
+            minPoolSize=MONGODB_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS,
+            waitQueueTimeoutMS=MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        )
+
+    def reset_after_fork(self) -> None:
+        # Loops and their clients do not survive a fork
+        self._clients = weakref.WeakKeyDictionary()
+
+    async def close(self) -> None:
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+
+async_mongo_client_registry = AsyncMongoClientRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=async_mongo_client_registry.reset_after_fork)
\ No newline at end of file
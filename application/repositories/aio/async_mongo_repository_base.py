@@ -0,0 +1,300 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Type
+
+from pymongo import DESCENDING, UpdateOne
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from application.errors import DataNotFound
+from application.models.models_utility import MongoModels
+from application.repositories.aio.async_mongo_client_registry import async_mongo_client_registry
+from application.repositories.consistency_tiers import READ_TIER_PRIMARY, tier_metrics, with_tiers
+from application.repositories.entity_cache import entity_cache
+from application.repositories.mongo_repository_base import MongoRepositoryBase, GetManyResult, Page, \
+    IN_QUERY_CHUNK_SIZE, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, failed_indexes
+
+
+class AsyncMongoRepositoryBase(MongoRepositoryBase):
+    """
+    Asyncio sibling of MongoRepositoryBase, on the pymongo async API. Only the I/O is written
+    again here, as coroutines: building writes, conflict checks, version bumps, archive merges,
+    hydration, projections, pagination cursors and the identity map are the sync base's helpers.
+
+    Writes are sent right away: the unit of work batches sync writes only. The entity cache is
+    used as well, its redis calls run in a worker thread to keep the event loop free.
+    """
+
+    def __init__(self) -> None:
+        # Not calling super().__init__(): async repositories never touch the sync client
+        self.client = async_mongo_client_registry.get_client()
+        self.db = self.client.db_marketplace_protocol
+
+    async def ensure_indexes(self) -> None:
+        for collection_name, indexes in self.all_indexes().items():
+            await self.db[collection_name].create_indexes(indexes)
+
+    async def _invalidate_cached(self, collection: AsyncCollection, ids: List[Any]) -> None:
+        if ids and self._cache_enabled():
+            await asyncio.to_thread(entity_cache.invalidate, collection.name, ids)
+
+    async def _insert(
+            self,
+            collection: AsyncCollection,
+            model: MongoModels,
+            document: Optional[Dict[str, Any]] = None,
+            write_tier: Optional[str] = None
+    ) -> None:
+        document = document if document is not None else model.to_mongo_document()
+        write_tier = write_tier or self.WRITE_TIER
+        with tier_metrics.timed('write', write_tier):
+            await with_tiers(collection, write_tier=write_tier).insert_one(document)
+        self._mark_inserted(collection, [model], [document])
+
+    async def _insert_many(
+            self,
+            collection: AsyncCollection,
+            models: List[MongoModels],
+            write_tier: Optional[str] = None
+    ) -> None:
+        if not models:
+            return
+        documents = [model.to_mongo_document() for model in models]
+        write_tier = write_tier or self.WRITE_TIER
+        try:
+            with tier_metrics.timed('write', write_tier):
+                await with_tiers(collection, write_tier=write_tier).insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            self._mark_inserted(collection, models, documents, failed_indexes(e))
+            raise
+        self._mark_inserted(collection, models, documents)
+
+    async def _update(
+            self,
+            collection: AsyncCollection,
+            model: MongoModels,
+            write_tier: Optional[str] = None
+    ) -> None:
+        writes, documents, updated = self._prepare_updates([model])
+        if writes:
+            await self._restore_archived(collection, [model])
+            write_filter, update = writes[0]
+            write_tier = write_tier or self.WRITE_TIER
+            with tier_metrics.timed('write', write_tier):
+                result = await with_tiers(collection, write_tier=write_tier).update_one(write_filter, update)
+            self._check_matched(collection, updated, result.matched_count)
+            await self._invalidate_cached(collection, [model.get_id()])
+        self._mark_updated(collection, [model], documents, updated)
+
+    async def _update_many(
+            self,
+            collection: AsyncCollection,
+            models: List[MongoModels],
+            write_tier: Optional[str] = None
+    ) -> None:
+        writes, documents, updated = self._prepare_updates(models)
+        if writes:
+            await self._restore_archived(collection, updated)
+            operations = [UpdateOne(write_filter, update) for write_filter, update in writes]
+            write_tier = write_tier or self.WRITE_TIER
+            with tier_metrics.timed('write', write_tier):
+                result = await with_tiers(collection, write_tier=write_tier).bulk_write(operations, ordered=True)
+            self._check_matched(collection, updated, result.matched_count)
+            await self._invalidate_cached(collection, [model.get_id() for model in updated])
+        self._mark_updated(collection, models, documents, updated)
+
+    async def _find_by_id(
+            self,
+            collection: AsyncCollection,
+            _id: str,
+            model_class: Type[MongoModels],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> Any:
+        result = await self._get_many(collection, [_id], model_class, projection, read_tier=read_tier)
+        if not result.found:
+            raise DataNotFound()
+        return result.found[0]
+
+    async def _get_many(
+            self,
+            collection: AsyncCollection,
+            ids: List[str],
+            model_class: Type[MongoModels],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> GetManyResult:
+        if read_tier and read_tier != READ_TIER_PRIMARY:
+            return await self._get_many_relaxed(collection, ids, model_class, projection, read_tier)
+
+        models_by_id, unique_ids = self._from_identity_map(collection, ids)
+
+        documents_by_id = {}
+        mongo_projection = self._mongo_projection(projection, model_class)
+        if unique_ids and self._cache_reads_enabled():
+            documents_by_id = await asyncio.to_thread(entity_cache.get_many, collection.name, unique_ids)
+            unique_ids = [_id for _id in unique_ids if _id not in documents_by_id]
+            mongo_projection = None
+
+        loaded = await self._find_by_ids(collection, unique_ids, mongo_projection, read_tier=read_tier)
+        documents_by_id.update(self._by_id(loaded))
+        if loaded and self._cache_reads_enabled():
+            await asyncio.to_thread(entity_cache.set_many, collection.name, loaded, self.CACHE_TTL_SEC)
+        archived_ids = await self._find_archived(collection, unique_ids, documents_by_id, mongo_projection, read_tier)
+        return self._to_get_many_result(
+            collection, ids, models_by_id, documents_by_id, model_class, projection, archived_ids
+        )
+
+    async def _get_many_relaxed(
+            self,
+            collection: AsyncCollection,
+            ids: List[str],
+            model_class: Type[MongoModels],
+            projection: Optional[List[str]],
+            read_tier: str
+    ) -> GetManyResult:
+        unique_ids = list(dict.fromkeys(ids))
+        mongo_projection = self._mongo_projection(projection, model_class)
+        documents_by_id = self._by_id(
+            await self._find_by_ids(collection, unique_ids, mongo_projection, read_tier=read_tier)
+        )
+        missing_ids = [_id for _id in unique_ids if _id not in documents_by_id]
+        if missing_ids:
+            documents_by_id.update(self._by_id(
+                await self._find_by_ids(collection, missing_ids, mongo_projection, read_tier=READ_TIER_PRIMARY)
+            ))
+        archived_ids = await self._find_archived(collection, unique_ids, documents_by_id, mongo_projection, read_tier)
+        return self._to_get_many_result(
+            collection, ids, {}, documents_by_id, model_class, projection, archived_ids, remember=False
+        )
+
+    async def _find_archived(
+            self,
+            collection: AsyncCollection,
+            ids: List[str],
+            documents_by_id: Dict[str, Dict[str, Any]],
+            mongo_projection: Optional[Dict[str, int]],
+            read_tier: Optional[str] = None
+    ) -> Set[str]:
+        missing_ids = self._archive_lookup_ids(ids, documents_by_id)
+        if not missing_ids:
+            return set()
+        archived = await self._find_by_ids(
+            self._archive_of(collection), missing_ids, mongo_projection, read_tier=read_tier
+        )
+        return self._add_archived(documents_by_id, archived)
+
+    async def _restore_archived(self, collection: AsyncCollection, models: List[MongoModels]) -> None:
+        archived = self._archived_models(models)
+        if not archived:
+            return
+        ids = [model.get_id() for model in archived]
+        archive = self._archive_of(collection)
+        for document in await self._find_by_ids(archive, ids, None):
+            try:
+                await collection.insert_one(document)
+            except DuplicateKeyError:
+                pass
+        await archive.delete_many({'_id': {'$in': ids}})
+        for model in archived:
+            model._archived = False
+
+    async def _find_by_ids(
+            self,
+            collection: AsyncCollection,
+            ids: List[str],
+            mongo_projection: Optional[Dict[str, int]],
+            read_tier: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        if not ids:
+            return []
+        tiered_collection = with_tiers(collection, read_tier=read_tier)
+        with tier_metrics.timed('read', read_tier):
+            # Chunks are independent queries, so they are sent concurrently
+            results = await asyncio.gather(*[
+                tiered_collection.find(
+                    {'_id': {'$in': ids[start:start + IN_QUERY_CHUNK_SIZE]}}, mongo_projection
+                ).to_list()
+                for start in range(0, len(ids), IN_QUERY_CHUNK_SIZE)
+            ])
+        return [document for documents in results for document in documents]
+
+    async def _find_documents(self, collection: AsyncCollection, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return await collection.find(query).to_list()
+
+    async def _find_all(
+            self,
+            collection: AsyncCollection,
+            query: Dict[str, Any],
+            model_class: Type[MongoModels]
+    ) -> List[Any]:
+        if not self.ARCHIVED:
+            return self._hydrate_with_archived(
+                collection, await self._find_documents(collection, query), [], model_class
+            )
+        documents, archived = await asyncio.gather(
+            self._find_documents(collection, query),
+            self._find_documents(self._archive_of(collection), query),
+        )
+        return self._hydrate_with_archived(collection, documents, archived, model_class)
+
+    async def _find_page(
+            self,
+            collection: AsyncCollection,
+            query: Dict[str, Any],
+            model_class: Type[MongoModels],
+            sort_field: Optional[str] = 'created_at',
+            page_size: int = DEFAULT_PAGE_SIZE,
+            cursor: Optional[str] = None,
+            read_tier: Optional[str] = None,
+    ) -> Page:
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        keys = self._page_keys(sort_field)
+        page_query = self._page_query(query, sort_field, cursor)
+        with tier_metrics.timed('read', read_tier):
+            if self.ARCHIVED:
+                documents, archived = await asyncio.gather(
+                    self._find_sorted(collection, page_query, keys, page_size + 1, read_tier),
+                    self._find_sorted(self._archive_of(collection), page_query, keys, page_size + 1, read_tier),
+                )
+            else:
+                documents = await self._find_sorted(collection, page_query, keys, page_size + 1, read_tier)
+                archived = []
+        documents, archived_ids = self._merge_archived(documents, archived, keys, page_size + 1)
+        return self._to_page(documents, model_class, keys, page_size, archived_ids)
+
+    async def _find_sorted(
+            self,
+            collection: AsyncCollection,
+            query: Dict[str, Any],
+            keys: List[str],
+            limit: int,
+            read_tier: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        sort = [(key, DESCENDING) for key in keys]
+        return await with_tiers(collection, read_tier=read_tier).find(query).sort(sort).limit(limit).to_list()
+
+    async def _iter_pages(
+            self,
+            collection: AsyncCollection,
+            query: Dict[str, Any],
+            model_class: Type[MongoModels],
+            sort_field: Optional[str] = 'created_at',
+            page_size: int = DEFAULT_PAGE_SIZE,
+            read_tier: Optional[str] = None,
+    ) -> AsyncIterator[Any]:
+        cursor = None
+        while True:
+            page = await self._find_page(
+                collection=collection,
+                query=query,
+                model_class=model_class,
+                sort_field=sort_field,
+                page_size=page_size,
+                cursor=cursor,
+                read_tier=read_tier
+            )
+            for item in page.items:
+                yield item
+            if not page.next_cursor:
+                return
+            cursor = page.next_cursor
\ No newline at end of file
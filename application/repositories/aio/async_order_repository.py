@@ -0,0 +1,85 @@
+from typing import AsyncIterator, List, Optional
+
+from application.models.order import Order
+from application.repositories.aio.async_mongo_repository_base import AsyncMongoRepositoryBase
+from application.repositories.mongo_repository_base import GetManyResult, Page, DEFAULT_PAGE_SIZE
+from application.repositories.order_repository import OrderRepository
+from application.utils import now_in_epoch_sec
+
+
+class AsyncOrderRepository(AsyncMongoRepositoryBase):
+    INDEXES = OrderRepository.INDEXES
+    CACHE_TTL_SEC = OrderRepository.CACHE_TTL_SEC
+    WRITE_TIER = OrderRepository.WRITE_TIER
+    ARCHIVED = OrderRepository.ARCHIVED
+
+    _order_projection = OrderRepository._order_projection
+    _user_query = OrderRepository._user_query
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.order_collection = self.db.orders
+
+    async def create_order(self, order: Order, write_tier: Optional[str] = None) -> Order:
+        await self._insert(self.order_collection, order, write_tier=write_tier)
+        return order
+
+    async def update_order(self, order: Order, write_tier: Optional[str] = None) -> Order:
+        order.updated_at = now_in_epoch_sec()
+        await self._update(self.order_collection, order, write_tier=write_tier)
+        return order
+
+    async def get_by_order_id(
+            self,
+            order_id: str,
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> Order:
+        return await self._find_by_id(
+            self.order_collection, order_id, Order, self._order_projection(projection), read_tier=read_tier
+        )
+
+    async def get_many(
+            self,
+            order_ids: List[str],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> GetManyResult:
+        return await self._get_many(
+            self.order_collection, order_ids, Order, self._order_projection(projection), read_tier=read_tier
+        )
+
+    async def query_by_user_id(self, user_id: str) -> List[Order]:
+        return await self._find_all(self.order_collection, {'user_id': user_id}, Order)
+
+    async def page_by_user_id(
+            self,
+            user_id: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+            cursor: Optional[str] = None,
+            status: Optional[str] = None,
+            read_tier: Optional[str] = None,
+    ) -> Page:
+        return await self._find_page(
+            collection=self.order_collection,
+            query=self._user_query(user_id=user_id, status=status),
+            model_class=Order,
+            page_size=page_size,
+            cursor=cursor,
+            read_tier=read_tier
+        )
+
+    def iter_by_user_id(
+            self,
+            user_id: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+            status: Optional[str] = None,
+            read_tier: Optional[str] = None,
+    ) -> AsyncIterator[Order]:
+        return self._iter_pages(
+            collection=self.order_collection,
+            query=self._user_query(user_id=user_id, status=status),
+            model_class=Order,
+            page_size=page_size,
+            read_tier=read_tier
+        )
\ No newline at end of file
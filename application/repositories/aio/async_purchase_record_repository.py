@@ -0,0 +1,100 @@
+from typing import AsyncIterator, List, Optional
+
+from application.models.purchase_record import PurchaseRecord
+from application.repositories.aio.async_mongo_repository_base import AsyncMongoRepositoryBase
+from application.repositories.mongo_repository_base import GetManyResult, Page, DEFAULT_PAGE_SIZE
+from application.repositories.purchase_record_repository import PurchaseRecordRepository
+
+
+class AsyncPurchaseRecordRepository(AsyncMongoRepositoryBase):
+    INDEXES = PurchaseRecordRepository.INDEXES
+    CACHE_TTL_SEC = PurchaseRecordRepository.CACHE_TTL_SEC
+    ARCHIVED = PurchaseRecordRepository.ARCHIVED
+
+    _record_projection = PurchaseRecordRepository._record_projection
+    _user_query = PurchaseRecordRepository._user_query
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.purchase_records_collection = self.db.purchase_records
+
+    async def create_record(self, record: PurchaseRecord, write_tier: Optional[str] = None) -> PurchaseRecord:
+        await self._insert(self.purchase_records_collection, record, write_tier=write_tier)
+        return record
+
+    async def create_records(
+            self,
+            records: List[PurchaseRecord],
+            write_tier: Optional[str] = None
+    ) -> List[PurchaseRecord]:
+        await self._insert_many(self.purchase_records_collection, records, write_tier=write_tier)
+        return records
+
+    async def update_record(self, record: PurchaseRecord, write_tier: Optional[str] = None) -> PurchaseRecord:
+        await self._update(self.purchase_records_collection, record, write_tier=write_tier)
+        return record
+
+    async def update_records(
+            self,
+            records: List[PurchaseRecord],
+            write_tier: Optional[str] = None
+    ) -> List[PurchaseRecord]:
+        await self._update_many(self.purchase_records_collection, records, write_tier=write_tier)
+        return records
+
+    async def get_by_id(
+            self,
+            record_id: str,
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> PurchaseRecord:
+        return await self._find_by_id(
+            self.purchase_records_collection, record_id, PurchaseRecord, self._record_projection(projection),
+            read_tier=read_tier
+        )
+
+    async def get_many(
+            self,
+            record_ids: List[str],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> GetManyResult:
+        return await self._get_many(
+            self.purchase_records_collection, record_ids, PurchaseRecord, self._record_projection(projection),
+            read_tier=read_tier
+        )
+
+    async def query_by_user_id(self, user_id: str) -> List[PurchaseRecord]:
+        return await self._find_all(self.purchase_records_collection, {'user_id': user_id}, PurchaseRecord)
+
+    async def page_by_user_id(
+            self,
+            user_id: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+            cursor: Optional[str] = None,
+            status: Optional[str] = None,
+            read_tier: Optional[str] = None,
+    ) -> Page:
+        return await self._find_page(
+            collection=self.purchase_records_collection,
+            query=self._user_query(user_id=user_id, status=status),
+            model_class=PurchaseRecord,
+            page_size=page_size,
+            cursor=cursor,
+            read_tier=read_tier
+        )
+
+    def iter_by_user_id(
+            self,
+            user_id: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+            status: Optional[str] = None,
+            read_tier: Optional[str] = None,
+    ) -> AsyncIterator[PurchaseRecord]:
+        return self._iter_pages(
+            collection=self.purchase_records_collection,
+            query=self._user_query(user_id=user_id, status=status),
+            model_class=PurchaseRecord,
+            page_size=page_size,
+            read_tier=read_tier
+        )
\ No newline at end of file
@@ -0,0 +1,77 @@
+from typing import List, Optional
+
+from application.errors import DataNotFound
+from application.models.transactions import Transaction, TransactionLineage
+from application.repositories.aio.async_mongo_repository_base import AsyncMongoRepositoryBase
+from application.repositories.mongo_repository_base import GetManyResult
+from application.repositories.transaction_repository import TransactionRepository
+
+
+class AsyncTransactionRepository(AsyncMongoRepositoryBase):
+    INDEXES = TransactionRepository.INDEXES
+    CACHE_TTL_SEC = TransactionRepository.CACHE_TTL_SEC
+    WRITE_TIER = TransactionRepository.WRITE_TIER
+    ARCHIVED = TransactionRepository.ARCHIVED
+
+    _transaction_projection = TransactionRepository._transaction_projection
+    _lineage_query = TransactionRepository._lineage_query
+    _to_lineage = TransactionRepository._to_lineage
+    _has_auth = TransactionRepository._has_auth
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.transactions_collection = self.db.transactions
+
+    async def create_record(self, transaction: Transaction, write_tier: Optional[str] = None) -> Transaction:
+        await self._insert(self.transactions_collection, transaction, write_tier=write_tier)
+        return transaction
+
+    async def update_record(self, transaction: Transaction, write_tier: Optional[str] = None) -> Transaction:
+        await self._update(self.transactions_collection, transaction, write_tier=write_tier)
+        return transaction
+
+    async def get_by_transaction_id(
+            self,
+            transaction_id: str,
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> Transaction:
+        return await self._find_by_id(
+            self.transactions_collection, transaction_id, Transaction, self._transaction_projection(projection),
+            read_tier=read_tier
+        )
+
+    async def get_many(
+            self,
+            transaction_ids: List[str],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> GetManyResult:
+        return await self._get_many(
+            self.transactions_collection, transaction_ids, Transaction, self._transaction_projection(projection),
+            read_tier=read_tier
+        )
+
+    async def query_by_parent_transaction_id(
+            self,
+            transaction_id: str,
+            action: Optional[str] = None
+    ) -> List[Transaction]:
+        collection = self.transactions_collection
+        query = self._lineage_query(parent_id=transaction_id, action=action)
+        documents = await self._find_documents(collection, query)
+        archived = []
+        if not self._has_auth(transaction_id, documents):
+            archived = await self._find_documents(self._archive_of(collection), query)
+        return self._hydrate_with_archived(collection, documents, archived, Transaction)
+
+    async def get_auth_with_children(self, parent_id: str) -> TransactionLineage:
+        transactions = await self.query_by_parent_transaction_id(parent_id)
+        if not transactions:
+            raise DataNotFound()
+        return self._to_lineage(parent_id, transactions)
+
+    async def query_by_provider_transaction_id(self, transaction_id: str) -> List[Transaction]:
+        collection = self.transactions_collection
+        documents = await self._find_documents(collection, {'provider_transaction_id': transaction_id})
+        return self._hydrate_all(collection, documents, Transaction)
\ No newline at end of file
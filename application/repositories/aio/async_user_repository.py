@@ -0,0 +1,44 @@
+from typing import List, Optional
+
+from application.models.user import User
+from application.repositories.aio.async_mongo_repository_base import AsyncMongoRepositoryBase
+from application.repositories.mongo_repository_base import GetManyResult
+from application.repositories.user_repository import UserRepository
+
+
+class AsyncUserRepository(AsyncMongoRepositoryBase):
+    CACHE_TTL_SEC = UserRepository.CACHE_TTL_SEC
+
+    _user_projection = UserRepository._user_projection
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.user_collection = self.db.users
+
+    async def create(self, user: User, write_tier: Optional[str] = None) -> User:
+        await self._insert(self.user_collection, user, write_tier=write_tier)
+        return user
+
+    async def update_record(self, user: User, write_tier: Optional[str] = None) -> User:
+        await self._update(self.user_collection, user, write_tier=write_tier)
+        return user
+
+    async def get_by_id(
+            self,
+            user_id: str,
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> User:
+        return await self._find_by_id(
+            self.user_collection, user_id, User, self._user_projection(projection), read_tier=read_tier
+        )
+
+    async def get_many(
+            self,
+            user_ids: List[str],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> GetManyResult:
+        return await self._get_many(
+            self.user_collection, user_ids, User, self._user_projection(projection), read_tier=read_tier
+        )
\ No newline at end of file
@@ -0,0 +1,83 @@
+from typing import AsyncIterator, List, Optional
+
+from application.models.instrument import Instrument
+from application.repositories.aio.async_mongo_repository_base import AsyncMongoRepositoryBase
+from application.repositories.mongo_repository_base import GetManyResult, Page, DEFAULT_PAGE_SIZE
+from application.repositories.wallet_repository import WalletRepository
+
+
+class AsyncWalletRepository(AsyncMongoRepositoryBase):
+    INDEXES = WalletRepository.INDEXES
+    CACHE_TTL_SEC = WalletRepository.CACHE_TTL_SEC
+
+    _instrument_projection = WalletRepository._instrument_projection
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.wallet_collection = self.db.wallet
+
+    async def create_record(self, instrument: Instrument, write_tier: Optional[str] = None) -> Instrument:
+        await self._insert(self.wallet_collection, instrument, write_tier=write_tier)
+        return instrument
+
+    async def update_record(self, instrument: Instrument, write_tier: Optional[str] = None) -> Instrument:
+        await self._update(self.wallet_collection, instrument, write_tier=write_tier)
+        return instrument
+
+    async def get_by_instrument_id(
+            self,
+            instrument_id: str,
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> Instrument:
+        return await self._find_by_id(
+            self.wallet_collection, instrument_id, Instrument, self._instrument_projection(projection),
+            read_tier=read_tier
+        )
+
+    async def get_many(
+            self,
+            instrument_ids: List[str],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> GetManyResult:
+        return await self._get_many(
+            self.wallet_collection, instrument_ids, Instrument, self._instrument_projection(projection),
+            read_tier=read_tier
+        )
+
+    async def query_by_user_id(self, user_id: str) -> List[Instrument]:
+        documents = await self._find_documents(self.wallet_collection, {'user_id': user_id})
+        return [self._hydrate(document, Instrument) for document in documents]
+
+    async def page_by_user_id(
+            self,
+            user_id: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+            cursor: Optional[str] = None,
+            read_tier: Optional[str] = None,
+    ) -> Page:
+        return await self._find_page(
+            collection=self.wallet_collection,
+            query={'user_id': user_id},
+            model_class=Instrument,
+            sort_field=None,
+            page_size=page_size,
+            cursor=cursor,
+            read_tier=read_tier
+        )
+
+    def iter_by_user_id(
+            self,
+            user_id: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+            read_tier: Optional[str] = None,
+    ) -> AsyncIterator[Instrument]:
+        return self._iter_pages(
+            collection=self.wallet_collection,
+            query={'user_id': user_id},
+            model_class=Instrument,
+            sort_field=None,
+            page_size=page_size,
+            read_tier=read_tier
+        )
\ No newline at end of file
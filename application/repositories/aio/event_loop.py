@@ -0,0 +1,72 @@
+"""
+One long lived event loop per process, on a daemon thread, for running the async repositories
+from sync code such as the Flask views.
+
+Flask runs `async def` views on a fresh event loop per request, and an AsyncMongoClient is bound
+to the loop it was created on: every request would open a client and a pool of its own and leave
+them behind. Views hand their coroutine to `run_async` instead, so the process keeps one async
+client for its lifetime. The loop has no app context: the request's identity map and unit of
+work do not apply to what runs on it.
+"""
+import asyncio
+import concurrent.futures
+import os
+import threading
+from typing import Any, Coroutine, Optional
+
+from application.repositories.aio.async_mongo_client_registry import async_mongo_client_registry
+from application.settings import ASYNC_CALL_TIMEOUT_SEC
+
+
+class EventLoopThread:
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def run(self, coroutine: Coroutine[Any, Any, Any], timeout: Optional[float] = ASYNC_CALL_TIMEOUT_SEC) -> Any:
+        """Runs the coroutine on the process loop and waits for its result, raising what it raises."""
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name='async-repositories', daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def stop(self) -> None:
+        """Closes the loop's mongo client, then the loop. The next `run` starts a new one."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(async_mongo_client_registry.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def reset_after_fork(self) -> None:
+        # The loop thread does not survive a fork
+        self._lock = threading.Lock()
+        self._loop = self._thread = None
+
+
+event_loop_thread = EventLoopThread()
+
+
+def run_async(coroutine: Coroutine[Any, Any, Any]) -> Any:
+    return event_loop_thread.run(coroutine)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=event_loop_thread.reset_after_fork)
\ No newline at end of file
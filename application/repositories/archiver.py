@@ -0,0 +1,152 @@
+from typing import Any, Dict, List, Optional, Type
+
+from loguru import logger
+from pymongo import DeleteOne, IndexModel, ReplaceOne
+from pymongo.collection import Collection
+from pymongo.errors import CollectionInvalid
+
+from application.models.models_utility import MongoModels
+from application.models.order import Order, ORDER_STATUS_COMPLETED, ORDER_STATUS_FAILED
+from application.models.purchase_record import PurchaseRecord, PURCHASE_RECORD_COMPLETED, PURCHASE_RECORD_FAILED
+from application.models.transactions import Transaction, TRANSACTION_STATUS_COMPLETED, TRANSACTION_STATUS_FAILED
+from application.repositories.entity_cache import entity_cache
+from application.repositories.mongo_repository_base import MongoRepositoryBase, QueryShape, IN_QUERY_CHUNK_SIZE, \
+    archive_collection_name
+from application.settings import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+from application.utils import now_in_epoch_sec
+
+ARCHIVED_COLLECTIONS = ['orders', 'purchase_records', 'transactions']
+# Block compression of the archive collections, cold documents are read rarely and compress well
+ARCHIVE_BLOCK_COMPRESSOR = 'zstd'
+
+ORDER_TERMINAL_STATUSES = [ORDER_STATUS_COMPLETED, ORDER_STATUS_FAILED]
+PURCHASE_RECORD_TERMINAL_STATUSES = [PURCHASE_RECORD_COMPLETED, PURCHASE_RECORD_FAILED]
+TRANSACTION_TERMINAL_STATUSES = [TRANSACTION_STATUS_COMPLETED, TRANSACTION_STATUS_FAILED]
+
+INVOICE_FIELDS = ['incoming_invoice', 'outgoing_invoice', 'refunding_invoice']
+
+
+class TerminalDocumentArchiver(MongoRepositoryBase):
+    """
+    Moves terminal orders not updated for ARCHIVE_AFTER_DAYS to `orders_archive`, together with
+    their terminal purchase records and transactions. Orders are the unit: records are found
+    through `purchase_record_ids` and transactions through the invoices' parent transaction ids,
+    so every move is served by an index.
+
+    Documents are copied to the archive before they are deleted from the hot collection, and the
+    delete only matches the state that was copied. A document written in between stays hot and is
+    archived again by a later run; the repositories read the hot copy first in the meantime.
+    """
+    INDEXES = {
+        'orders': [
+            IndexModel([('status', 1), ('updated_at', 1)], name='status_updated_at'),
+        ]
+    }
+
+    def __init__(self, batch_size: int = ARCHIVE_BATCH_SIZE, archive_after_days: int = ARCHIVE_AFTER_DAYS) -> None:
+        super().__init__()
+        self.batch_size = batch_size
+        self.archive_after_sec = archive_after_days * 24 * 60 * 60
+
+    def ensure_indexes(self) -> None:
+        # The repositories index their archive collections too, which would create them uncompressed
+        self.ensure_archive_collections()
+        super().ensure_indexes()
+
+    def ensure_archive_collections(self) -> None:
+        existing = set(self.db.list_collection_names())
+        for name in ARCHIVED_COLLECTIONS:
+            archive_name = archive_collection_name(name)
+            if archive_name in existing:
+                continue
+            try:
+                self.db.create_collection(
+                    archive_name,
+                    storageEngine={'wiredTiger': {'configString': f'block_compressor={ARCHIVE_BLOCK_COMPRESSOR}'}}
+                )
+            except CollectionInvalid:
+                # Created by a concurrent run
+                pass
+
+    def run(self, max_batches: int) -> Dict[str, int]:
+        self.ensure_archive_collections()
+        moved = dict.fromkeys(ARCHIVED_COLLECTIONS, 0)
+        for _ in range(max_batches):
+            orders = list(self.db.orders.find(self._archivable_query()).limit(self.batch_size))
+            if not orders:
+                break
+            batch = self._archive_batch(orders)
+            for name, count in batch.items():
+                moved[name] += count
+            logger.info("Archive batch moved", kv=batch)
+            if len(orders) < self.batch_size:
+                break
+        logger.info("Archive run completed", kv=moved)
+        return moved
+
+    def query_shapes(self) -> List[QueryShape]:
+        return [QueryShape('orders.archivable', 'orders', self._archivable_query(cutoff=0))]
+
+    def _archivable_query(self, cutoff: Optional[int] = None) -> Dict[str, Any]:
+        cutoff = cutoff if cutoff is not None else now_in_epoch_sec() - self.archive_after_sec
+        return Order.storage_filter({'status': {'$in': ORDER_TERMINAL_STATUSES}, 'updated_at': {'$lt': cutoff}})
+
+    def _archive_batch(self, orders: List[Dict[str, Any]]) -> Dict[str, int]:
+        record_ids = [record_id for order in orders for record_id in order.get('purchase_record_ids') or []]
+        records = self._find_in(
+            self.db.purchase_records, PurchaseRecord, '_id', record_ids, PURCHASE_RECORD_TERMINAL_STATUSES
+        )
+
+        parent_ids = list({
+            order[field]['parent_transaction_id']
+            for order in orders for field in INVOICE_FIELDS
+            if order.get(field) and order[field].get('parent_transaction_id')
+        })
+        transactions = self._find_in(
+            self.db.transactions, Transaction, 'parent_transaction_id', parent_ids, TRANSACTION_TERMINAL_STATUSES
+        )
+
+        # Orders last: while any of their documents are moving, the order is still found hot
+        return {
+            'purchase_records': self._move(self.db.purchase_records, records),
+            'transactions': self._move(self.db.transactions, transactions),
+            'orders': self._move(self.db.orders, orders),
+        }
+
+    def _find_in(
+            self,
+            collection: Collection,
+            model_class: Type[MongoModels],
+            field: str,
+            values: List[Any],
+            statuses: List[str]
+    ) -> List[Dict[str, Any]]:
+        documents = []
+        for start in range(0, len(values), IN_QUERY_CHUNK_SIZE):
+            chunk = values[start:start + IN_QUERY_CHUNK_SIZE]
+            query = {field: {'$in': chunk}, 'status': {'$in': statuses}}
+            documents += collection.find(model_class.storage_filter(query))
+        return documents
+
+    def _move(self, collection: Collection, documents: List[Dict[str, Any]]) -> int:
+        if not documents:
+            return 0
+        # Upserts: a run interrupted between the copy and the delete is simply repeated
+        self.db[archive_collection_name(collection.name)].bulk_write(
+            [ReplaceOne({'_id': document['_id']}, document, upsert=True) for document in documents],
+            ordered=False
+        )
+        result = collection.bulk_write(
+            [DeleteOne(self._unchanged_filter(document)) for document in documents],
+            ordered=False
+        )
+        if entity_cache.enabled:
+            entity_cache.invalidate(collection.name, [document['_id'] for document in documents])
+        return result.deleted_count
+
+    def _unchanged_filter(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        # Versioned documents change version on every write. Transactions have no version: they are
+        # matched on every field, all of them are stored, null or not, so any write changes one.
+        if 'version' in document:
+            return {'_id': document['_id'], 'status': document.get('status'), 'version': document['version']}
+        return dict(document)
\ No newline at end of file
@@ -0,0 +1,79 @@
+import contextlib
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from pymongo.write_concern import WriteConcern
+
+# Payment results and order state: acknowledged by a majority and journaled
+WRITE_TIER_DURABLE = 'durable'
+# Change stream checkpoints and telemetry: acknowledged by the primary only
+WRITE_TIER_FAST = 'fast'
+
+WRITE_CONCERNS = {
+    WRITE_TIER_DURABLE: WriteConcern(w='majority', j=True),
+    WRITE_TIER_FAST: WriteConcern(w=1),
+}
+
+# Strength order, used when writes of several tiers are sent in one batch. None is the client default.
+WRITE_TIER_RANK = {WRITE_TIER_FAST: 0, None: 1, WRITE_TIER_DURABLE: 2}
+
+READ_TIER_PRIMARY = 'primary'
+# Read-only views that tolerate a few seconds of replication lag
+READ_TIER_SECONDARY_OK = 'secondary_ok'
+
+READ_PREFERENCES = {
+    READ_TIER_PRIMARY: Primary(),
+    READ_TIER_SECONDARY_OK: SecondaryPreferred(max_staleness=90),
+}
+
+
+def with_tiers(collection: Any, write_tier: Optional[str] = None, read_tier: Optional[str] = None) -> Any:
+    """The collection with the write concern / read preference of the given tiers, None keeps the client default."""
+    options = {}
+    if write_tier:
+        options['write_concern'] = WRITE_CONCERNS[write_tier]
+    if read_tier:
+        options['read_preference'] = READ_PREFERENCES[read_tier]
+    return collection.with_options(**options) if options else collection
+
+
+def strongest_write_tier(tiers: List[Optional[str]]) -> Optional[str]:
+    return max(tiers, key=lambda tier: WRITE_TIER_RANK[tier]) if tiers else None
+
+
+class TierMetrics:
+    """Call count and latency of mongo reads and writes, per kind and tier."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    @contextlib.contextmanager
+    def timed(self, kind: str, tier: Optional[str]) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(kind, tier, (time.perf_counter() - start) * 1000)
+
+    def observe(self, kind: str, tier: Optional[str], elapsed_ms: float) -> None:
+        key = f"{kind}:{tier or 'default'}"
+        with self._lock:
+            metric = self._metrics.setdefault(key, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            metric['count'] += 1
+            metric['total_ms'] += elapsed_ms
+            metric['max_ms'] = max(metric['max_ms'], elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            metrics = {key: dict(metric) for key, metric in self._metrics.items()}
+        for metric in metrics.values():
+            metric['avg_ms'] = round(metric['total_ms'] / metric['count'], 3)
+            metric['total_ms'] = round(metric['total_ms'], 3)
+            metric['max_ms'] = round(metric['max_ms'], 3)
+        return metrics
+
+
+tier_metrics = TierMetrics()
@@ -1,3 +1,4 @@
+import functools
 
 from boto3 import client
 
@@ -8,15 +9,21 @@ from application.settings import DIGITALOCEAN_SPACES_REGION, DIGITALOCEAN_SPACES
 from loguru import logger
 
 
+@functools.lru_cache(maxsize=None)
+def shared_s3_client():
+    # boto3 clients are thread safe and slow to build, one per process serves every request
+    return client(
+        's3',
+        region_name=DIGITALOCEAN_SPACES_REGION,
+        endpoint_url=DIGITALOCEAN_SPACES_ENDPOINT,
+        aws_access_key_id=DIGITALOCEAN_SPACES_ACCESS_KEY_ID,
+        aws_secret_access_key=DIGITALOCEAN_SPACES_ACCESS_KEY_SECRET_KEY
+    )
+
+
 class DigitalOceanSpaces:
     def __init__(self) -> None:
-        self.s3_client = client(
-            's3',
-            region_name=DIGITALOCEAN_SPACES_REGION,
-            endpoint_url=DIGITALOCEAN_SPACES_ENDPOINT,
-            aws_access_key_id=DIGITALOCEAN_SPACES_ACCESS_KEY_ID,
-            aws_secret_access_key=DIGITALOCEAN_SPACES_ACCESS_KEY_SECRET_KEY
-        )
+        self.s3_client = shared_s3_client()
 
     def read_privatEdit_file(self, file_key: str) -> None:
         try:
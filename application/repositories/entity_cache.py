@@ -0,0 +1,126 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+import msgspec
+import redis
+from loguru import logger
+
+from application.settings import ENTITY_CACHE_ENABLED, ENTITY_CACHE_REDIS_URL, ENTITY_CACHE_TOMBSTONE_SEC
+
+KEY_PREFIX = 'entity'
+# Value of an invalidated entry, never a msgpack encoded document
+TOMBSTONE = b''
+
+
+class EntityCache:
+    """
+    Read-through redis cache of raw mongo documents, keyed by collection and `_id`.
+
+    Documents are stored msgpack encoded with a per-collection TTL. The cache is best effort:
+    any redis failure is logged and counted, and the caller falls back to mongo.
+
+    Fills only set absent keys, and invalidation leaves a short lived tombstone instead of
+    deleting the key: a reader that loaded a document before a write cannot put it back after
+    the write's invalidation. The tombstone is read as a miss.
+    """
+
+    def __init__(self, enabled: bool, redis_url: Optional[str], tombstone_sec: int = ENTITY_CACHE_TOMBSTONE_SEC) -> None:
+        self.enabled = enabled and bool(redis_url)
+        self.tombstone_sec = tombstone_sec
+        self._redis_url = redis_url
+        self._redis: Optional[redis.Redis] = None
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._encoder = msgspec.msgpack.Encoder()
+        self._decoder = msgspec.msgpack.Decoder(dict)
+
+    def _client(self) -> redis.Redis:
+        # The connection pool of redis-py resets itself in forked children
+        if self._redis is None:
+            with self._lock:
+                if self._redis is None:
+                    self._redis = redis.from_url(self._redis_url)
+        return self._redis
+
+    def _key(self, collection_name: str, _id: Any) -> str:
+        return f"{KEY_PREFIX}:{collection_name}:{_id}"
+
+    def _bump(self, collection_name: str, counter: str, delta: int = 1) -> None:
+        if not delta:
+            return
+        with self._lock:
+            counters = self._counters.setdefault(collection_name, {
+                'hits': 0,
+                'misses': 0,
+                'sets': 0,
+                'invalidations': 0,
+                'errors': 0,
+            })
+            counters[counter] += delta
+
+    def get_many(self, collection_name: str, ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Cached documents of the given ids, missing ids are simply left out."""
+        if not ids:
+            return {}
+        try:
+            values = self._client().mget([self._key(collection_name, _id) for _id in ids])
+        except redis.RedisError as e:
+            self._bump(collection_name, 'errors')
+            logger.warning("Entity cache read failed", kv={'collection': collection_name, 'error': str(e)})
+            return {}
+
+        documents = {}
+        for _id, value in zip(ids, values):
+            if value is None or value == TOMBSTONE:
+                continue
+            try:
+                documents[_id] = self._decoder.decode(value)
+            except msgspec.DecodeError:
+                self._bump(collection_name, 'errors')
+        self._bump(collection_name, 'hits', len(documents))
+        self._bump(collection_name, 'misses', len(ids) - len(documents))
+        return documents
+
+    def set_many(self, collection_name: str, documents: List[Dict[str, Any]], ttl_sec: int) -> None:
+        if not documents:
+            return
+        try:
+            pipeline = self._client().pipeline(transaction=False)
+            for document in documents:
+                pipeline.set(
+                    self._key(collection_name, document['_id']), self._encoder.encode(document), ex=ttl_sec, nx=True
+                )
+            pipeline.execute()
+            self._bump(collection_name, 'sets', len(documents))
+        except (redis.RedisError, TypeError) as e:
+            self._bump(collection_name, 'errors')
+            logger.warning("Entity cache write failed", kv={'collection': collection_name, 'error': str(e)})
+
+    def invalidate(self, collection_name: str, ids: List[Any]) -> None:
+        if not ids:
+            return
+        try:
+            pipeline = self._client().pipeline(transaction=False)
+            for _id in ids:
+                pipeline.set(self._key(collection_name, _id), TOMBSTONE, ex=self.tombstone_sec)
+            pipeline.execute()
+            self._bump(collection_name, 'invalidations', len(ids))
+        except redis.RedisError as e:
+            # The entry expires with its TTL at the latest
+            self._bump(collection_name, 'errors')
+            logger.warning("Entity cache invalidation failed", kv={
+                'collection': collection_name,
+                'ids': ids,
+                'error': str(e)
+            })
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            collections = {name: dict(counters) for name, counters in self._counters.items()}
+        for counters in collections.values():
+            lookups = counters['hits'] + counters['misses']
+            counters['hit_rate'] = round(counters['hits'] / lookups, 4) if lookups else None
+        return {'enabled': self.enabled, 'collections': collections}
+
+
+entity_cache = EntityCache(enabled=ENTITY_CACHE_ENABLED, redis_url=ENTITY_CACHE_REDIS_URL)
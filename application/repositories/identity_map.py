@@ -0,0 +1,44 @@
+from typing import Any, Dict, Optional, Tuple
+
+from flask import g, has_app_context
+
+from application.models.models_utility import MongoModels
+
+
+class IdentityMap:
+    """
+    Models loaded during one flask request or celery task, keyed by collection and `_id`.
+    Repeated lookups by id return the same instance instead of going back to mongo.
+
+    Only full models are kept: a partial model cannot answer a lookup for other fields.
+    """
+
+    def __init__(self) -> None:
+        self._models: Dict[Tuple[str, Any], MongoModels] = {}
+
+    def get(self, collection_name: str, _id: Any) -> Optional[MongoModels]:
+        return self._models.get((collection_name, _id))
+
+    def put(self, collection_name: str, model: MongoModels) -> None:
+        if model.is_partial():
+            # A write through a partial copy makes any full copy in the map stale
+            self._models.pop((collection_name, model.get_id()), None)
+        else:
+            self._models[(collection_name, model.get_id())] = model
+
+    def clear(self) -> None:
+        self._models = {}
+
+
+def current_identity_map() -> Optional[IdentityMap]:
+    if not has_app_context():
+        return None
+    if 'identity_map' not in g:
+        g.identity_map = IdentityMap()
+    return g.identity_map
+
+
+def clear_identity_map() -> None:
+    """Forgets every loaded model, e.g. after their pending writes were dropped."""
+    if has_app_context():
+        g.pop('identity_map', None)
@@ -0,0 +1,55 @@
+"""
+Creates the secondary indexes the repository queries rely on. Run it once per deploy, before the
+web tier and the workers start; it is never run on import, so neither blocks on an unreachable
+mongo at boot.
+
+Usage:
+    python -m application.repositories.indexes
+"""
+from typing import List
+
+from loguru import logger
+
+from application.repositories.archiver import TerminalDocumentArchiver
+from application.repositories.order_repository import OrderRepository
+from application.repositories.purchase_record_repository import PurchaseRecordRepository
+from application.repositories.transaction_repository import TransactionRepository
+from application.repositories.user_repository import UserRepository
+from application.repositories.wallet_repository import WalletRepository
+
+INDEXED_REPOSITORIES = [
+    # First, it creates the compressed archive collections the other repositories index
+    TerminalDocumentArchiver,
+    OrderRepository,
+    PurchaseRecordRepository,
+    TransactionRepository,
+    WalletRepository,
+    UserRepository,
+]
+
+
+def ensure_repository_indexes() -> List[str]:
+    """Creates the secondary indexes every repository depends on. Safe to run repeatedly."""
+    failed = []
+    for repository_class in INDEXED_REPOSITORIES:
+        try:
+            repository_class().ensure_indexes()
+        except Exception as e:
+            # The other repositories still get their indexes, the queries work (slowly) without them
+            logger.error("Failed to ensure repository indexes", kv={
+                'repository': repository_class.__name__,
+                'error_details': str(e),
+            })
+            failed.append(repository_class.__name__)
+    return failed
+
+
+def main() -> None:
+    failed = ensure_repository_indexes()
+    if failed:
+        raise SystemExit(1)
+    logger.info("Repository indexes ensured", kv={'repositories': len(INDEXED_REPOSITORIES)})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,584 @@
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pymongo import ASCENDING, DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+# Marks a path that is absent from a document, which is not the same as a null value
+_MISSING = object()
+
+
+def _copy(value: Any) -> Any:
+    # Documents only hold dicts, lists and immutable scalars, far cheaper than copy.deepcopy
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+def _get_path(document: Any, path: str) -> Any:
+    value = document
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _set_path(document: Dict[str, Any], path: str, value: Any) -> None:
+    *parents, leaf = path.split('.')
+    for part in parents:
+        document = document.setdefault(part, {})
+    document[leaf] = value
+
+
+def _compare(value: Any, bound: Any, compare: Callable[[Any, Any], bool]) -> bool:
+    # Mongo only compares values of the same type, e.g. a string is never $lt a number
+    if value is _MISSING or value is None:
+        return False
+    try:
+        return compare(value, bound)
+    except TypeError:
+        return False
+
+
+def _equals(value: Any, expected: Any) -> bool:
+    if expected is None:
+        return value is _MISSING or value is None
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    return value == expected
+
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    '$eq': _equals,
+    '$ne': lambda value, expected: not _equals(value, expected),
+    '$in': lambda value, options: any(_equals(value, option) for option in options),
+    '$nin': lambda value, options: not any(_equals(value, option) for option in options),
+    '$lt': lambda value, bound: _compare(value, bound, lambda a, b: a < b),
+    '$lte': lambda value, bound: _compare(value, bound, lambda a, b: a <= b),
+    '$gt': lambda value, bound: _compare(value, bound, lambda a, b: a > b),
+    '$gte': lambda value, bound: _compare(value, bound, lambda a, b: a >= b),
+    '$exists': lambda value, exists: (value is not _MISSING) == bool(exists),
+}
+
+
+def matches(document: Dict[str, Any], query: Optional[Dict[str, Any]]) -> bool:
+    """Subset of the mongo query language the repositories use."""
+    for key, condition in (query or {}).items():
+        if key == '$or':
+            if not any(matches(document, clause) for clause in condition):
+                return False
+        elif key == '$and':
+            if not all(matches(document, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(op.startswith('$') for op in condition):
+            value = _get_path(document, key)
+            for operator, argument in condition.items():
+                if operator not in _OPERATORS:
+                    raise ValueError(f"Unsupported query operator {operator}")
+                if not _OPERATORS[operator](value, argument):
+                    return False
+        elif not _equals(_get_path(document, key), condition):
+            return False
+    return True
+
+
+def project(document: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not projection:
+        return document
+    fields = {path: value for path, value in projection.items() if path != '_id'}
+    if fields and all(fields.values()):
+        projected = {}
+        for path in fields:
+            value = _get_path(document, path)
+            if value is not _MISSING:
+                _set_path(projected, path, value)
+        if projection.get('_id', 1) and '_id' in document:
+            projected['_id'] = document['_id']
+        return projected
+    # Exclusion projection
+    projected = _copy(document)
+    for path, include in projection.items():
+        if not include:
+            *parents, leaf = path.split('.')
+            owner = _get_path(projected, '.'.join(parents)) if parents else projected
+            if isinstance(owner, dict):
+                owner.pop(leaf, None)
+    return projected
+
+
+def apply_update(document: Dict[str, Any], update: Dict[str, Any]) -> None:
+    for operator, fields in update.items():
+        for path, value in fields.items():
+            if operator == '$set':
+                _set_path(document, path, _copy(value))
+            elif operator == '$unset':
+                *parents, leaf = path.split('.')
+                owner = _get_path(document, '.'.join(parents)) if parents else document
+                if isinstance(owner, dict):
+                    owner.pop(leaf, None)
+            elif operator == '$inc':
+                current = _get_path(document, path)
+                _set_path(document, path, (0 if current in (_MISSING, None) else current) + value)
+            elif operator == '$push':
+                current = _get_path(document, path)
+                items = value['$each'] if isinstance(value, dict) and '$each' in value else [value]
+                _set_path(document, path, (current if isinstance(current, list) else []) + _copy(items))
+            else:
+                raise ValueError(f"Unsupported update operator {operator}")
+
+
+def _write_error(index: int, error: DuplicateKeyError, op: Any) -> Dict[str, Any]:
+    return {'index': index, 'code': 11000, 'errmsg': str(error), 'op': op}
+
+
+class MemoryCursor:
+    """Lazy like a pymongo cursor: the query runs on first iteration, after sort() and limit()."""
+
+    def __init__(self, collection: 'MemoryCollection', query: Optional[Dict[str, Any]], projection: Any) -> None:
+        self._collection = collection
+        self._query = query
+        self._projection = dict.fromkeys(projection, 1) if isinstance(projection, list) else projection
+        self._sort: List[Tuple[str, int]] = []
+        self._limit = 0
+        self._skip = 0
+
+    def sort(self, key_or_list: Any, direction: int = ASCENDING) -> 'MemoryCursor':
+        self._sort = [(key_or_list, direction)] if isinstance(key_or_list, str) else list(key_or_list)
+        return self
+
+    def limit(self, limit: int) -> 'MemoryCursor':
+        self._limit = limit
+        return self
+
+    def skip(self, skip: int) -> 'MemoryCursor':
+        self._skip = skip
+        return self
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        documents = self._collection._find(self._query)
+        # Stable sorts applied from the least to the most significant key
+        for key, direction in reversed(self._sort):
+            documents.sort(key=lambda document: _sort_key(_get_path(document, key)), reverse=direction < 0)
+        documents = documents[self._skip:]
+        if self._limit:
+            documents = documents[:self._limit]
+        return iter([project(document, self._projection) for document in documents])
+
+
+def _sort_key(value: Any) -> Tuple[int, str, Any]:
+    # Missing and null values sort first, like in mongo. Mixed types are grouped by type name.
+    if value is _MISSING or value is None:
+        return 0, '', 0
+    return 1, type(value).__name__, value
+
+
+class MemoryCollection:
+    """
+    Thread-safe, in-process stand-in for a pymongo Collection, limited to the calls the
+    repositories make. Documents are copied in and out, so callers never share state with the store.
+    """
+
+    def __init__(self, database: 'MemoryDatabase', name: str) -> None:
+        self.database = database
+        self.name = name
+        self.full_name = f'{database.name}.{name}'
+        self._lock = threading.RLock()
+        self._documents: Dict[Any, Dict[str, Any]] = {}
+        self._indexes: List[str] = []
+
+    def with_options(self, **kwargs: Any) -> 'MemoryCollection':
+        # Write concerns and read preferences have no meaning for a single in-process copy
+        return self
+
+    def create_indexes(self, indexes: List[Any], **kwargs: Any) -> List[str]:
+        names = [index.document['name'] for index in indexes]
+        with self._lock:
+            self._indexes.extend(name for name in names if name not in self._indexes)
+        return names
+
+    def index_names(self) -> List[str]:
+        return ['_id_', *self._indexes]
+
+    def _candidates(self, query: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Stored documents the query may match. Queries on _id do not scan the collection, like the _id index."""
+        ids = query.get('_id') if query else None
+        if ids is None:
+            return list(self._documents.values())
+        if isinstance(ids, dict):
+            if set(ids) != {'$in'}:
+                return list(self._documents.values())
+            ids = ids['$in']
+        else:
+            ids = [ids]
+        return [self._documents[_id] for _id in ids if _id in self._documents]
+
+    def _matching(self, query: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [document for document in self._candidates(query) if matches(document, query)]
+
+    def _find(self, query: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [_copy(document) for document in self._matching(query)]
+
+    def find(
+            self,
+            filter: Optional[Dict[str, Any]] = None,
+            projection: Any = None,
+            session: Any = None,
+            **kwargs: Any
+    ) -> MemoryCursor:
+        return MemoryCursor(self, filter, projection)
+
+    def find_one(self, filter: Optional[Dict[str, Any]] = None, projection: Any = None, **kwargs: Any) -> Any:
+        return next(iter(self.find(filter, projection).limit(1)), None)
+
+    def count_documents(self, filter: Dict[str, Any], **kwargs: Any) -> int:
+        with self._lock:
+            return len(self._matching(filter))
+
+    def insert_one(self, document: Dict[str, Any], session: Any = None, **kwargs: Any) -> InsertOneResult:
+        with self._lock:
+            self._insert(document)
+        return InsertOneResult(document['_id'], True)
+
+    def insert_many(
+            self,
+            documents: List[Dict[str, Any]],
+            ordered: bool = True,
+            session: Any = None,
+            **kwargs: Any
+    ) -> InsertManyResult:
+        inserted_ids = []
+        write_errors = []
+        with self._lock:
+            for index, document in enumerate(documents):
+                try:
+                    self._insert(document)
+                except DuplicateKeyError as e:
+                    write_errors.append(_write_error(index, e, document))
+                    if ordered:
+                        break
+                    continue
+                inserted_ids.append(document['_id'])
+        if write_errors:
+            raise BulkWriteError({
+                'writeErrors': write_errors, 'writeConcernErrors': [], 'nInserted': len(inserted_ids),
+                'nUpserted': 0, 'nMatched': 0, 'nModified': 0, 'nRemoved': 0, 'upserted': [],
+            })
+        return InsertManyResult(inserted_ids, True)
+
+    def _insert(self, document: Dict[str, Any]) -> None:
+        if '_id' not in document:
+            raise ValueError("Memory backend documents need an _id")
+        if document['_id'] in self._documents:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.full_name} _id: {document['_id']}")
+        self._documents[document['_id']] = _copy(document)
+
+    def update_one(
+            self,
+            filter: Dict[str, Any],
+            update: Dict[str, Any],
+            upsert: bool = False,
+            session: Any = None,
+            **kwargs: Any
+    ) -> UpdateResult:
+        with self._lock:
+            return UpdateResult(self._update(filter, update, upsert, many=False), True)
+
+    def update_many(
+            self,
+            filter: Dict[str, Any],
+            update: Dict[str, Any],
+            upsert: bool = False,
+            session: Any = None,
+            **kwargs: Any
+    ) -> UpdateResult:
+        with self._lock:
+            return UpdateResult(self._update(filter, update, upsert, many=True), True)
+
+    def _update(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool, many: bool) -> Dict[str, Any]:
+        matched = self._matching(query)
+        if not many:
+            matched = matched[:1]
+        modified = 0
+        for document in matched:
+            before = _copy(document)
+            apply_update(document, update)
+            modified += document != before
+        raw_result = {'n': len(matched), 'nModified': modified, 'ok': 1.0}
+        if not matched and upsert:
+            document = {key: value for key, value in query.items() if not key.startswith('$')}
+            apply_update(document, update)
+            self._insert(document)
+            raw_result.update({'n': 1, 'upserted': document['_id']})
+        return raw_result
+
+    def replace_one(
+            self,
+            filter: Dict[str, Any],
+            replacement: Dict[str, Any],
+            upsert: bool = False,
+            session: Any = None,
+            **kwargs: Any
+    ) -> UpdateResult:
+        with self._lock:
+            return UpdateResult(self._replace(filter, replacement, upsert), True)
+
+    def _replace(self, query: Dict[str, Any], replacement: Dict[str, Any], upsert: bool) -> Dict[str, Any]:
+        matched = next(iter(self._matching(query)), None)
+        if matched is not None:
+            replaced = {**_copy(replacement), '_id': matched['_id']}
+            self._documents[matched['_id']] = replaced
+            return {'n': 1, 'nModified': int(replaced != matched), 'ok': 1.0}
+        if upsert:
+            document = {'_id': query.get('_id'), **replacement}
+            self._insert(document)
+            return {'n': 1, 'nModified': 0, 'upserted': document['_id'], 'ok': 1.0}
+        return {'n': 0, 'nModified': 0, 'ok': 1.0}
+
+    def delete_one(self, filter: Dict[str, Any], session: Any = None, **kwargs: Any) -> DeleteResult:
+        with self._lock:
+            return DeleteResult({'n': self._delete(filter, many=False), 'ok': 1.0}, True)
+
+    def delete_many(self, filter: Dict[str, Any], session: Any = None, **kwargs: Any) -> DeleteResult:
+        with self._lock:
+            return DeleteResult({'n': self._delete(filter, many=True), 'ok': 1.0}, True)
+
+    def _delete(self, query: Dict[str, Any], many: bool) -> int:
+        ids = [document['_id'] for document in self._matching(query)]
+        for _id in ids if many else ids[:1]:
+            del self._documents[_id]
+        return len(ids) if many else len(ids[:1])
+
+    def bulk_write(self, requests: List[Any], ordered: bool = True, session: Any = None, **kwargs: Any) -> Any:
+        counts = {'nInserted': 0, 'nMatched': 0, 'nModified': 0, 'nRemoved': 0, 'nUpserted': 0}
+        upserted = []
+        write_errors = []
+        with self._lock:
+            for index, request in enumerate(requests):
+                try:
+                    self._bulk_request(index, request, counts, upserted)
+                except DuplicateKeyError as e:
+                    write_errors.append(_write_error(index, e, request._doc))
+                    if ordered:
+                        break
+        if write_errors:
+            raise BulkWriteError({
+                **counts, 'upserted': upserted, 'writeErrors': write_errors, 'writeConcernErrors': [],
+            })
+        return BulkWriteResult({**counts, 'upserted': upserted, 'writeErrors': [], 'writeConcernErrors': []}, True)
+
+    def _bulk_request(self, index: int, request: Any, counts: Dict[str, int], upserted: List[Dict[str, Any]]) -> None:
+        if isinstance(request, InsertOne):
+            self._insert(request._doc)
+            counts['nInserted'] += 1
+        elif isinstance(request, (UpdateOne, UpdateMany, ReplaceOne)):
+            if isinstance(request, ReplaceOne):
+                raw_result = self._replace(request._filter, request._doc, bool(request._upsert))
+            else:
+                raw_result = self._update(
+                    request._filter, request._doc, bool(request._upsert), many=isinstance(request, UpdateMany)
+                )
+            if 'upserted' in raw_result:
+                counts['nUpserted'] += 1
+                upserted.append({'index': index, '_id': raw_result['upserted']})
+            else:
+                counts['nMatched'] += raw_result['n']
+                counts['nModified'] += raw_result['nModified']
+        elif isinstance(request, (DeleteOne, DeleteMany)):
+            counts['nRemoved'] += self._delete(request._filter, many=isinstance(request, DeleteMany))
+        else:
+            raise ValueError(f"Unsupported bulk write request {type(request).__name__}")
+
+    def drop(self) -> None:
+        with self._lock:
+            self._documents = {}
+            self._indexes = []
+
+
+class MemoryDatabase:
+    def __init__(self, client: 'MemoryClient', name: str) -> None:
+        self.client = client
+        self.name = name
+        self._lock = threading.Lock()
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MemoryCollection(self, name)
+            return self._collections[name]
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    def create_collection(self, name: str, **kwargs: Any) -> MemoryCollection:
+        # Storage options (block compression) do not apply in memory
+        with self._lock:
+            if name in self._collections:
+                raise CollectionInvalid(f"collection {name} already exists")
+            self._collections[name] = MemoryCollection(self, name)
+            return self._collections[name]
+
+    def list_collection_names(self) -> List[str]:
+        with self._lock:
+            return list(self._collections)
+
+
+class MemorySession:
+    """
+    Transactions run their callback once under the client's transaction lock. Concurrent writes
+    outside a transaction are not isolated from it and nothing is rolled back if it raises.
+    """
+
+    def __init__(self, client: 'MemoryClient') -> None:
+        self.client = client
+
+    def __enter__(self) -> 'MemorySession':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+    def with_transaction(self, callback: Callable[['MemorySession'], Any], **kwargs: Any) -> Any:
+        with self.client._transaction_lock:
+            return callback(self)
+
+    def end_session(self) -> None:
+        pass
+
+
+class MemoryClient:
+    """Stand-in for MongoClient, selected with MONGODB_BACKEND=memory. Data lives as long as the process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._transaction_lock = threading.RLock()
+        self._databases: Dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        with self._lock:
+            if name not in self._databases:
+                self._databases[name] = MemoryDatabase(self, name)
+            return self._databases[name]
+
+    def __getattr__(self, name: str) -> MemoryDatabase:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    def start_session(self, **kwargs: Any) -> MemorySession:
+        return MemorySession(self)
+
+    def drop_database(self, name: str) -> None:
+        with self._lock:
+            self._databases.pop(name, None)
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncMemoryCursor:
+    def __init__(self, cursor: MemoryCursor) -> None:
+        self._cursor = cursor
+
+    def sort(self, key_or_list: Any, direction: int = ASCENDING) -> 'AsyncMemoryCursor':
+        self._cursor.sort(key_or_list, direction)
+        return self
+
+    def limit(self, limit: int) -> 'AsyncMemoryCursor':
+        self._cursor.limit(limit)
+        return self
+
+    def skip(self, skip: int) -> 'AsyncMemoryCursor':
+        self._cursor.skip(skip)
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        documents = list(self._cursor)
+        return documents[:length] if length else documents
+
+
+class AsyncMemoryCollection:
+    """Coroutine facade of a MemoryCollection, for the async repositories. Calls never actually wait."""
+
+    def __init__(self, collection: MemoryCollection) -> None:
+        self._collection = collection
+        self.name = collection.name
+        self.full_name = collection.full_name
+
+    def with_options(self, **kwargs: Any) -> 'AsyncMemoryCollection':
+        return self
+
+    def find(self, *args: Any, **kwargs: Any) -> AsyncMemoryCursor:
+        return AsyncMemoryCursor(self._collection.find(*args, **kwargs))
+
+    async def find_one(self, *args: Any, **kwargs: Any) -> Any:
+        return self._collection.find_one(*args, **kwargs)
+
+    async def count_documents(self, *args: Any, **kwargs: Any) -> int:
+        return self._collection.count_documents(*args, **kwargs)
+
+    async def create_indexes(self, *args: Any, **kwargs: Any) -> List[str]:
+        return self._collection.create_indexes(*args, **kwargs)
+
+    async def insert_one(self, *args: Any, **kwargs: Any) -> InsertOneResult:
+        return self._collection.insert_one(*args, **kwargs)
+
+    async def insert_many(self, *args: Any, **kwargs: Any) -> InsertManyResult:
+        return self._collection.insert_many(*args, **kwargs)
+
+    async def update_one(self, *args: Any, **kwargs: Any) -> UpdateResult:
+        return self._collection.update_one(*args, **kwargs)
+
+    async def update_many(self, *args: Any, **kwargs: Any) -> UpdateResult:
+        return self._collection.update_many(*args, **kwargs)
+
+    async def replace_one(self, *args: Any, **kwargs: Any) -> UpdateResult:
+        return self._collection.replace_one(*args, **kwargs)
+
+    async def delete_one(self, *args: Any, **kwargs: Any) -> DeleteResult:
+        return self._collection.delete_one(*args, **kwargs)
+
+    async def delete_many(self, *args: Any, **kwargs: Any) -> DeleteResult:
+        return self._collection.delete_many(*args, **kwargs)
+
+    async def bulk_write(self, *args: Any, **kwargs: Any) -> Any:
+        return self._collection.bulk_write(*args, **kwargs)
+
+
+class AsyncMemoryDatabase:
+    def __init__(self, database: MemoryDatabase) -> None:
+        self._database = database
+        self.name = database.name
+
+    def __getitem__(self, name: str) -> AsyncMemoryCollection:
+        return AsyncMemoryCollection(self._database[name])
+
+    def __getattr__(self, name: str) -> AsyncMemoryCollection:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+
+class AsyncMemoryClient:
+    """Stand-in for AsyncMongoClient over a MemoryClient, so the sync and async repositories share their data."""
+
+    def __init__(self, client: MemoryClient) -> None:
+        self._client = client
+
+    def __getitem__(self, name: str) -> AsyncMemoryDatabase:
+        return AsyncMemoryDatabase(self._client[name])
+
+    def __getattr__(self, name: str) -> AsyncMemoryDatabase:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,162 @@
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from loguru import logger
+from pymongo import monitoring
+from pymongo.mongo_client import MongoClient
+from pymongo.server_api import ServerApi
+
+from application.repositories.memory_backend import MemoryClient
+from application.settings import MONGODB_BACKEND, MONGODB_CONNECT_URL, MONGODB_MAX_POOL_SIZE, MONGODB_MIN_POOL_SIZE, \
+    MONGODB_MAX_IDLE_TIME_MS, MONGODB_WAIT_QUEUE_TIMEOUT_MS
+
+STORAGE_BACKEND_MONGO = 'mongo'
+STORAGE_BACKEND_MEMORY = 'memory'
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Keeps per-server connection pool counters for the process-wide client."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._servers: Dict[str, Dict[str, int]] = {}
+
+    def _bump(self, address: Any, counter: str, delta: int = 1) -> None:
+        key = f"{address[0]}:{address[1]}"
+        with self._lock:
+            server = self._servers.setdefault(key, {
+                'open_connections': 0,
+                'checked_out': 0,
+                'max_checked_out': 0,
+                'connections_created': 0,
+                'connections_closed': 0,
+                'checkouts': 0,
+                'checkout_failures': 0,
+                'pool_clears': 0,
+            })
+            server[counter] += delta
+            if server['checked_out'] > server['max_checked_out']:
+                server['max_checked_out'] = server['checked_out']
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        self._bump(event.address, 'pool_clears')
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        pass
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        self._bump(event.address, 'connections_created')
+        self._bump(event.address, 'open_connections')
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        self._bump(event.address, 'connections_closed')
+        self._bump(event.address, 'open_connections', -1)
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        pass
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        self._bump(event.address, 'checkout_failures')
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        self._bump(event.address, 'checkouts')
+        self._bump(event.address, 'checked_out')
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        self._bump(event.address, 'checked_out', -1)
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {address: dict(counters) for address, counters in self._servers.items()}
+
+
+class MongoClientRegistry:
+    """
+    Holds the single MongoClient of the current process.
+
+    MongoClient is thread-safe but not fork-safe, so the registry remembers the
+    pid that built the client and builds a fresh one the first time it is used
+    in a forked child (gunicorn workers, celery prefork children).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._client: Optional[MongoClient] = None
+        self._pid: Optional[int] = None
+        self._stats_listener = PoolStatsListener()
+
+    def get_client(self) -> MongoClient:
+        client = self._client
+        if client is not None and self._pid == os.getpid():
+            return client
+
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                self._client = self._create_client()
+                self._pid = os.getpid()
+                logger.info("Mongo client created", kv={
+                    'pid': self._pid,
+                    'backend': MONGODB_BACKEND,
+                    'max_pool_size': MONGODB_MAX_POOL_SIZE,
+                    'min_pool_size': MONGODB_MIN_POOL_SIZE,
+                })
+            return self._client
+
+    def _create_client(self) -> MongoClient:
+        if MONGODB_BACKEND == STORAGE_BACKEND_MEMORY:
+            # Same collection API as pymongo for what the repositories call, every process gets its own data
+            return MemoryClient()
+        if MONGODB_BACKEND != STORAGE_BACKEND_MONGO:
+            raise ValueError(f"Unknown MONGODB_BACKEND {MONGODB_BACKEND}")
+        return MongoClient(
+            MONGODB_CONNECT_URL,
+            server_api=ServerApi('1'),
+            ssl=True,
+            maxPoolSize=MONGODB_MAX_POOL_SIZE,
+            minPoolSize=MONGODB_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS,
+            waitQueueTimeoutMS=MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            event_listeners=[self._stats_listener],
+        )
+
+    def reset_after_fork(self) -> None:
+        # The parent's client (and its monitor threads) must not be reused or closed in the child
+        self._lock = threading.Lock()
+        self._stats_listener = PoolStatsListener()
+        self._client = None
+        self._pid = None
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = None
+            self._pid = None
+
+    def pool_stats(self) -> Dict[str, Any]:
+        return {
+            'pid': os.getpid(),
+            'backend': MONGODB_BACKEND,
+            'client_initialized': self._client is not None and self._pid == os.getpid(),
+            'max_pool_size': MONGODB_MAX_POOL_SIZE,
+            'min_pool_size': MONGODB_MIN_POOL_SIZE,
+            'max_idle_time_ms': MONGODB_MAX_IDLE_TIME_MS,
+            'wait_queue_timeout_ms': MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            'servers': self._stats_listener.snapshot(),
+        }
+
+
+mongo_client_registry = MongoClientRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=mongo_client_registry.reset_after_fork)
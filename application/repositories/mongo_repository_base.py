@@ -1,14 +1,724 @@
-from application.settings import MONGODB_CONNECT_URL
+import base64
+import contextlib
+import heapq
+import itertools
+import json
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type
 
-from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
+from pymongo import IndexModel, DESCENDING, InsertOne, UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from application.errors import DataNotFound, ValidationError, ConcurrentModificationError
+from application.models.models_utility import MongoModels, parse_projection, projection_paths
+from application.repositories.consistency_tiers import READ_TIER_PRIMARY, tier_metrics, with_tiers
+from application.repositories.entity_cache import entity_cache
+from application.repositories.identity_map import current_identity_map, clear_identity_map
+from application.repositories.mongo_client_registry import mongo_client_registry
+from application.repositories.unit_of_work import current_unit_of_work
+
+# Upper bound of IDs sent in a single $in query
+IN_QUERY_CHUNK_SIZE = 500
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+ARCHIVE_SUFFIX = '_archive'
+
+# Set while reloading after a lost compare-and-swap, the entity cache may still hold the old version
+_fresh_reads: ContextVar[bool] = ContextVar('fresh_reads', default=False)
+
+
+@contextlib.contextmanager
+def fresh_reads() -> Iterator[None]:
+    """
+    Lookups inside go to mongo, past the identity map and the entity cache. For retries after a
+    ConcurrentModificationError: a concurrent reader may have cached the pre-conflict document
+    again since the write that invalidated it, and reloading it would only lose the race again.
+    """
+    clear_identity_map()
+    token = _fresh_reads.set(True)
+    try:
+        yield
+    finally:
+        _fresh_reads.reset(token)
+
+
+def archive_collection_name(name: str) -> str:
+    return f'{name}{ARCHIVE_SUFFIX}'
+
+
+def failed_indexes(error: BulkWriteError) -> Set[int]:
+    """Positions, in the submitted batch, of the operations a bulk write rejected."""
+    return {write_error['index'] for write_error in error.details.get('writeErrors', [])}
+
+
+@dataclass
+class GetManyResult:
+    # Found models, in the order the IDs were requested
+    found: List[Any]
+    missing_ids: List[str]
+
+    def found_or_raise(self) -> List[Any]:
+        if self.missing_ids:
+            raise DataNotFound(f"Missing ids: {self.missing_ids}")
+        return self.found
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    # Opaque keyset cursor of the last item, None when there are no more pages
+    next_cursor: Optional[str] = None
+
+
+@dataclass
+class QueryShape:
+    # A filter/sort a repository sends, with sample values, so its query plan can be checked
+    name: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[List[Tuple[str, int]]] = None
+
+
+def encode_cursor(values: List[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValidationError("Malformed cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValidationError("Malformed cursor")
+    return values
 
 
 class MongoRepositoryBase:
+    # collection name -> secondary indexes the repository queries rely on
+    INDEXES: Dict[str, List[IndexModel]] = {}
+    # TTL of the read-through entity cache for lookups by id, None keeps the repository uncached
+    CACHE_TTL_SEC: Optional[int] = None
+    # Durability tier of writes that do not ask for one, None keeps the client default
+    WRITE_TIER: Optional[str] = None
+    # Old terminal documents are moved to `<collection>_archive`. Lookups by id fall back to it on a miss,
+    # listings merge it into their pages.
+    ARCHIVED: bool = False
+
     def __init__(self) -> None:
-        self.client = MongoClient(
-            MONGODB_CONNECT_URL,
-            server_api=ServerApi('1'),
-            ssl = True
+        # Shared, process-wide client. Repositories are cheap to construct per request.
+        self.client = mongo_client_registry.get_client()
+        self.db = self.client.db_marketplace_protocol
+
+    @classmethod
+    def all_indexes(cls) -> Dict[str, List[IndexModel]]:
+        """INDEXES, repeated on the archive collections: listings run the same queries on both."""
+        if not cls.ARCHIVED:
+            return cls.INDEXES
+        return {
+            **cls.INDEXES,
+            **{archive_collection_name(name): indexes for name, indexes in cls.INDEXES.items()}
+        }
+
+    def ensure_indexes(self) -> None:
+        # create_indexes is a no-op for indexes that already exist with the same spec
+        for collection_name, indexes in self.all_indexes().items():
+            self.db[collection_name].create_indexes(indexes)
+
+    def query_shapes(self) -> List[QueryShape]:
+        """
+        Every query the repository sends, built with its own query helpers.
+        `python -m application.repositories.query_plan_check` fails when one of them is not served by an index.
+        """
+        return []
+
+    def _id_shape(self, collection: Collection) -> QueryShape:
+        return QueryShape(f'{collection.name}.get_many', collection.name, {'_id': {'$in': ['sample_id']}})
+
+    def _page_shapes(
+            self,
+            name: str,
+            collection: Collection,
+            query: Dict[str, Any],
+            sort_field: Optional[str] = 'created_at'
+    ) -> List[QueryShape]:
+        # The first page and the pages after a cursor filter differently, both must use the index
+        keys = self._page_keys(sort_field)
+        sort = [(key, DESCENDING) for key in keys]
+        cursor = encode_cursor([0, 'sample_id'] if sort_field else ['sample_id'])
+        shapes = [
+            QueryShape(f'{name}:first', collection.name, self._page_query(query, sort_field, None), sort),
+            QueryShape(f'{name}:next', collection.name, self._page_query(query, sort_field, cursor), sort),
+        ]
+        if self.ARCHIVED:
+            # Listings page through the archive alongside the hot collection
+            archive_name = archive_collection_name(collection.name)
+            shapes += [
+                QueryShape(f'{shape.name}:archive', archive_name, shape.filter, shape.sort) for shape in shapes
+            ]
+        return shapes
+
+    def _cache_enabled(self) -> bool:
+        return entity_cache.enabled and bool(self.CACHE_TTL_SEC)
+
+    def _cache_reads_enabled(self) -> bool:
+        return self._cache_enabled() and not _fresh_reads.get()
+
+    def _invalidate_cached(self, collection: Collection, ids: List[Any]) -> None:
+        if not ids or not self._cache_enabled():
+            return
+        uow = current_unit_of_work()
+        if uow:
+            # Dropped only once the write is stored, so a concurrent read cannot cache the old state again
+            uow.after_flush(lambda: entity_cache.invalidate(collection.name, ids))
+        else:
+            entity_cache.invalidate(collection.name, ids)
+
+    def _remember(self, collection: Collection, models: List[MongoModels]) -> None:
+        # Written models are what later lookups in the same request must see
+        identity_map = current_identity_map()
+        if identity_map:
+            for model in models:
+                identity_map.put(collection.full_name, model)
+
+    def _hydrate(
+            self,
+            document: Dict[str, Any],
+            model_class: Type[MongoModels],
+            projection: Optional[List[str]] = None,
+            track_changes: bool = True
+    ) -> Any:
+        if projection:
+            model = model_class.from_partial_mongo_document(document, projection)
+        else:
+            model = model_class.from_mongo_document(document)
+        if track_changes:
+            model.mark_persisted()
+        return model
+
+    def _hydrate_all(
+            self,
+            collection: Collection,
+            documents: List[Dict[str, Any]],
+            model_class: Type[MongoModels]
+    ) -> List[Any]:
+        # Query results that are already loaded in this request resolve to the same instance
+        identity_map = current_identity_map()
+        models = []
+        for document in documents:
+            model = identity_map.get(collection.full_name, document['_id']) if identity_map else None
+            if model is None:
+                model = self._hydrate(document, model_class)
+                if identity_map:
+                    identity_map.put(collection.full_name, model)
+            models.append(model)
+        return models
+
+    def _mongo_projection(
+            self,
+            projection: Optional[List[str]],
+            model_class: Type[MongoModels]
+    ) -> Optional[Dict[str, int]]:
+        if not projection:
+            return None
+        paths = model_class.storage_projection_paths(projection_paths(parse_projection(projection)))
+        return {path: 1 for path in paths}
+
+    def _insert(
+            self,
+            collection: Collection,
+            model: MongoModels,
+            document: Optional[Dict[str, Any]] = None,
+            write_tier: Optional[str] = None
+    ) -> None:
+        document = document if document is not None else model.to_mongo_document()
+        write_tier = write_tier or self.WRITE_TIER
+        uow = current_unit_of_work()
+        if uow:
+            uow.add(collection, InsertOne(document), write_tier=write_tier)
+        else:
+            with tier_metrics.timed('write', write_tier):
+                with_tiers(collection, write_tier=write_tier).insert_one(document)
+        self._mark_inserted(collection, [model], [document])
+
+    def _insert_many(
+            self,
+            collection: Collection,
+            models: List[MongoModels],
+            write_tier: Optional[str] = None
+    ) -> None:
+        """
+        One round trip for all the models instead of an insert each. The insert is unordered: on a
+        BulkWriteError every model without a write error was inserted, and is marked so before the
+        error is raised.
+        """
+        if not models:
+            return
+        documents = [model.to_mongo_document() for model in models]
+        write_tier = write_tier or self.WRITE_TIER
+        uow = current_unit_of_work()
+        if uow:
+            for document in documents:
+                uow.add(collection, InsertOne(document), write_tier=write_tier)
+        else:
+            try:
+                with tier_metrics.timed('write', write_tier):
+                    with_tiers(collection, write_tier=write_tier).insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                self._mark_inserted(collection, models, documents, failed_indexes(e))
+                raise
+        self._mark_inserted(collection, models, documents)
+
+    def _mark_inserted(
+            self,
+            collection: Collection,
+            models: List[MongoModels],
+            documents: List[Dict[str, Any]],
+            failed: Set[int] = frozenset()
+    ) -> None:
+        inserted = [(model, document) for index, (model, document) in enumerate(zip(models, documents))
+                    if index not in failed]
+        for model, document in inserted:
+            model.mark_persisted(document)
+        self._remember(collection, [model for model, _ in inserted])
+
+    def _update(self, collection: Collection, model: MongoModels, write_tier: Optional[str] = None) -> None:
+        writes, documents, updated = self._prepare_updates([model])
+        if writes:
+            self._restore_archived(collection, [model])
+            write_filter, update = writes[0]
+            write_tier = write_tier or self.WRITE_TIER
+            uow = current_unit_of_work()
+            if uow:
+                uow.add(
+                    collection,
+                    UpdateOne(write_filter, update),
+                    versioned_id=self._versioned_id(model),
+                    write_tier=write_tier
+                )
+            else:
+                with tier_metrics.timed('write', write_tier):
+                    result = with_tiers(collection, write_tier=write_tier).update_one(write_filter, update)
+                self._check_matched(collection, updated, result.matched_count)
+            self._invalidate_cached(collection, [model.get_id()])
+        self._mark_updated(collection, [model], documents, updated)
+
+    def _update_many(
+            self,
+            collection: Collection,
+            models: List[MongoModels],
+            write_tier: Optional[str] = None
+    ) -> None:
+        writes, documents, updated = self._prepare_updates(models)
+        if writes:
+            self._restore_archived(collection, updated)
+            operations = [UpdateOne(write_filter, update) for write_filter, update in writes]
+            write_tier = write_tier or self.WRITE_TIER
+            uow = current_unit_of_work()
+            if uow:
+                for operation, model in zip(operations, updated):
+                    uow.add(collection, operation, versioned_id=self._versioned_id(model), write_tier=write_tier)
+            else:
+                with tier_metrics.timed('write', write_tier):
+                    result = with_tiers(collection, write_tier=write_tier).bulk_write(operations, ordered=True)
+                self._check_matched(collection, updated, result.matched_count)
+            self._invalidate_cached(collection, [model.get_id() for model in updated])
+        self._mark_updated(collection, models, documents, updated)
+
+    def _prepare_updates(
+            self,
+            models: List[MongoModels]
+    ) -> Tuple[List[Tuple[Dict[str, Any], Dict[str, Any]]], List[Dict[str, Any]], List[MongoModels]]:
+        """
+        Filter and update of each model that changed, the current document of every model, and the
+        models that changed. Only the paths changed since a model was loaded or last written are
+        sent, and a partial model only ever writes back the paths it loaded.
+        """
+        writes = []
+        documents = []
+        updated = []
+        for model in models:
+            document = model.current_document()
+            update = model.to_mongo_update(document)
+            if update:
+                writes.append(self._versioned_write(model, update))
+                updated.append(model)
+            documents.append(document)
+        return writes, documents, updated
+
+    def _check_matched(self, collection: Collection, updated: List[MongoModels], matched_count: int) -> None:
+        # A conditional write that matched nothing lost to a concurrent writer
+        conditional_ids = [model.get_id() for model in updated if self._is_conditional(model)]
+        if conditional_ids and matched_count < len(updated):
+            raise ConcurrentModificationError(collection.name, conditional_ids)
+
+    def _mark_updated(
+            self,
+            collection: Collection,
+            models: List[MongoModels],
+            documents: List[Dict[str, Any]],
+            updated: List[MongoModels]
+    ) -> None:
+        # Keeps the in-memory models and their snapshots on the versions now stored
+        changed = {id(model) for model in updated}
+        for model, document in zip(models, documents):
+            if id(model) in changed and model.is_versioned():
+                model.version = model.loaded_version() + 1
+                document['version'] = model.version
+            model.mark_persisted(document)
+        self._remember(collection, models)
+
+    def _archive_of(self, collection: Collection) -> Collection:
+        return self.db[archive_collection_name(collection.name)]
+
+    def _find_all(self, collection: Collection, query: Dict[str, Any], model_class: Type[MongoModels]) -> List[Any]:
+        """Every document matching `query`, archived ones included."""
+        documents = list(collection.find(query))
+        archived = list(self._archive_of(collection).find(query)) if self.ARCHIVED else []
+        return self._hydrate_with_archived(collection, documents, archived, model_class)
+
+    def _hydrate_with_archived(
+            self,
+            collection: Collection,
+            documents: List[Dict[str, Any]],
+            archived: List[Dict[str, Any]],
+            model_class: Type[MongoModels]
+    ) -> List[Any]:
+        # Archived models are written back to the hot collection, the identity map knows them by it
+        hot_ids = {document['_id'] for document in documents}
+        archived = [document for document in archived if document['_id'] not in hot_ids]
+        models = self._hydrate_all(collection, documents + archived, model_class)
+        self._mark_archived(models, {document['_id'] for document in archived})
+        return models
+
+    def _find_archived(
+            self,
+            collection: Collection,
+            ids: List[str],
+            documents_by_id: Dict[str, Dict[str, Any]],
+            mongo_projection: Optional[Dict[str, int]],
+            read_tier: Optional[str] = None
+    ) -> Set[str]:
+        # Archived documents are not cached: they are rarely read, and a cached copy would lose its origin
+        missing_ids = self._archive_lookup_ids(ids, documents_by_id)
+        if not missing_ids:
+            return set()
+        archived = self._find_by_ids(self._archive_of(collection), missing_ids, mongo_projection, read_tier=read_tier)
+        return self._add_archived(documents_by_id, archived)
+
+    def _archive_lookup_ids(self, ids: List[str], documents_by_id: Dict[str, Dict[str, Any]]) -> List[str]:
+        if not self.ARCHIVED:
+            return []
+        return [_id for _id in ids if _id not in documents_by_id]
+
+    def _add_archived(self, documents_by_id: Dict[str, Dict[str, Any]], archived: List[Dict[str, Any]]) -> Set[str]:
+        for document in archived:
+            documents_by_id[document['_id']] = document
+        return {document['_id'] for document in archived}
+
+    def _mark_archived(self, models: List[MongoModels], archived_ids: Set[str]) -> None:
+        for model in models:
+            if model.get_id() in archived_ids:
+                model._archived = True
+
+    def _archived_models(self, models: List[MongoModels]) -> List[MongoModels]:
+        return [model for model in models if getattr(model, '_archived', False)]
+
+    def _restore_archived(self, collection: Collection, models: List[MongoModels]) -> None:
+        """Moves archived documents back to the hot collection before they are written again."""
+        archived = self._archived_models(models)
+        if not archived:
+            return
+        ids = [model.get_id() for model in archived]
+        archive = self._archive_of(collection)
+        for document in self._find_by_ids(archive, ids, None):
+            try:
+                collection.insert_one(document)
+            except DuplicateKeyError:
+                # Restored concurrently, the hot copy may already carry newer writes
+                pass
+        archive.delete_many({'_id': {'$in': ids}})
+        for model in archived:
+            model._archived = False
+
+    def _versioned_write(self, model: MongoModels, update: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Filter and update of a write. Versioned models only match the version they were loaded
+        with, and the write bumps it, so a concurrent writer in between makes the write match nothing.
+        Models with a compact storage form only match the form they write.
+        """
+        write_filter = {'_id': model.get_id(), **model.storage_guard()}
+        if not model.is_versioned():
+            return write_filter, update
+        version = model.loaded_version()
+        # Documents stored before versioning have no version field, they count as version 0
+        write_filter['version'] = version if version else {'$in': [0, None]}
+        update = dict(update)
+        if 'version' in update.get('$set', {}):
+            # Models without a snapshot $set their whole document, which conflicts with the $inc
+            update['$set'] = {path: value for path, value in update['$set'].items() if path != 'version'}
+        update['$inc'] = {'version': 1}
+        return write_filter, update
+
+    def _is_conditional(self, model: MongoModels) -> bool:
+        # Writes that may match nothing, which then is a concurrent modification
+        return model.is_versioned() or bool(model.storage_guard())
+
+    def _versioned_id(self, model: MongoModels) -> Optional[Any]:
+        return model.get_id() if self._is_conditional(model) else None
+
+    def _find_by_id(
+            self,
+            collection: Collection,
+            _id: str,
+            model_class: Type[MongoModels],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> Any:
+        result = self._get_many(collection, [_id], model_class, projection, read_tier=read_tier)
+        if not result.found:
+            raise DataNotFound()
+        return result.found[0]
+
+    def _get_many(
+            self,
+            collection: Collection,
+            ids: List[str],
+            model_class: Type[MongoModels],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> GetManyResult:
+        """
+        Looks the ids up in the request's identity map first, then in the entity cache and
+        finally in mongo. Full models loaded here are added to the identity map.
+
+        Documents read from a secondary (`read_tier`) may lag behind: they neither fill the cache
+        nor the identity map, and ids a secondary does not have yet are looked up on the primary.
+        """
+        if read_tier and read_tier != READ_TIER_PRIMARY:
+            return self._get_many_relaxed(collection, ids, model_class, projection, read_tier)
+
+        models_by_id, unique_ids = self._from_identity_map(collection, ids)
+
+        documents_by_id = {}
+        mongo_projection = self._mongo_projection(projection, model_class)
+        if unique_ids and self._cache_reads_enabled():
+            # Cache misses load whole documents so they can fill the cache for any later projection
+            documents_by_id = entity_cache.get_many(collection.name, unique_ids)
+            unique_ids = [_id for _id in unique_ids if _id not in documents_by_id]
+            mongo_projection = None
+
+        loaded = self._find_by_ids(collection, unique_ids, mongo_projection, read_tier=read_tier)
+        documents_by_id.update(self._by_id(loaded))
+        if loaded and self._cache_reads_enabled():
+            entity_cache.set_many(collection.name, loaded, ttl_sec=self.CACHE_TTL_SEC)
+        archived_ids = self._find_archived(collection, unique_ids, documents_by_id, mongo_projection, read_tier)
+        return self._to_get_many_result(
+            collection, ids, models_by_id, documents_by_id, model_class, projection, archived_ids
         )
-        self.db = self.client.db_marketplace_protocol
\ No newline at end of file
+
+    def _get_many_relaxed(
+            self,
+            collection: Collection,
+            ids: List[str],
+            model_class: Type[MongoModels],
+            projection: Optional[List[str]],
+            read_tier: str
+    ) -> GetManyResult:
+        unique_ids = list(dict.fromkeys(ids))
+        mongo_projection = self._mongo_projection(projection, model_class)
+        documents_by_id = self._by_id(self._find_by_ids(collection, unique_ids, mongo_projection, read_tier=read_tier))
+        missing_ids = [_id for _id in unique_ids if _id not in documents_by_id]
+        if missing_ids:
+            # Likely written a moment ago and not replicated yet
+            documents_by_id.update(self._by_id(
+                self._find_by_ids(collection, missing_ids, mongo_projection, read_tier=READ_TIER_PRIMARY)
+            ))
+        archived_ids = self._find_archived(collection, unique_ids, documents_by_id, mongo_projection, read_tier)
+        return self._to_get_many_result(
+            collection, ids, {}, documents_by_id, model_class, projection, archived_ids, remember=False
+        )
+
+    def _find_by_ids(
+            self,
+            collection: Collection,
+            ids: List[str],
+            mongo_projection: Optional[Dict[str, int]],
+            read_tier: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        if not ids:
+            return []
+        documents = []
+        tiered_collection = with_tiers(collection, read_tier=read_tier)
+        with tier_metrics.timed('read', read_tier):
+            for start in range(0, len(ids), IN_QUERY_CHUNK_SIZE):
+                chunk = ids[start:start + IN_QUERY_CHUNK_SIZE]
+                documents += tiered_collection.find({'_id': {'$in': chunk}}, mongo_projection)
+        return documents
+
+    def _by_id(self, documents: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        return {document['_id']: document for document in documents}
+
+    def _from_identity_map(self, collection: Collection, ids: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        # Models already loaded in this request, and the unique ids that still need a lookup
+        models_by_id = {}
+        unique_ids = list(dict.fromkeys(ids))
+        identity_map = current_identity_map()
+        if identity_map:
+            # A full model in the map serves any projection
+            for _id in unique_ids:
+                model = identity_map.get(collection.full_name, _id)
+                if model is not None:
+                    models_by_id[_id] = model
+            unique_ids = [_id for _id in unique_ids if _id not in models_by_id]
+        return models_by_id, unique_ids
+
+    def _to_get_many_result(
+            self,
+            collection: Collection,
+            ids: List[str],
+            models_by_id: Dict[str, Any],
+            documents_by_id: Dict[str, Dict[str, Any]],
+            model_class: Type[MongoModels],
+            projection: Optional[List[str]] = None,
+            archived_ids: Set[str] = frozenset(),
+            remember: bool = True
+    ) -> GetManyResult:
+        identity_map = current_identity_map() if remember else None
+        for _id, document in documents_by_id.items():
+            model = self._hydrate(document, model_class, projection)
+            if _id in archived_ids:
+                model._archived = True
+            models_by_id[_id] = model
+            if identity_map:
+                identity_map.put(collection.full_name, model)
+
+        found = []
+        missing_ids = []
+        for _id in ids:
+            if _id in models_by_id:
+                found.append(models_by_id[_id])
+            else:
+                missing_ids.append(_id)
+        return GetManyResult(found=found, missing_ids=missing_ids)
+
+    def _find_page(
+            self,
+            collection: Collection,
+            query: Dict[str, Any],
+            model_class: Type[MongoModels],
+            sort_field: Optional[str] = 'created_at',
+            page_size: int = DEFAULT_PAGE_SIZE,
+            cursor: Optional[str] = None,
+            read_tier: Optional[str] = None,
+    ) -> Page:
+        """
+        Keyset pagination, newest first, on (sort_field, _id). The next page starts strictly
+        after the last returned document, so pages stay cheap however deep the caller goes.
+        """
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        keys = self._page_keys(sort_field)
+        page_query = self._page_query(query, sort_field, cursor)
+        with tier_metrics.timed('read', read_tier):
+            documents = self._find_sorted(collection, page_query, keys, page_size + 1, read_tier)
+            archived = []
+            if self.ARCHIVED:
+                archived = self._find_sorted(self._archive_of(collection), page_query, keys, page_size + 1, read_tier)
+        documents, archived_ids = self._merge_archived(documents, archived, keys, page_size + 1)
+        return self._to_page(documents, model_class, keys, page_size, archived_ids)
+
+    def _find_sorted(
+            self,
+            collection: Collection,
+            query: Dict[str, Any],
+            keys: List[str],
+            limit: int,
+            read_tier: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        sort = [(key, DESCENDING) for key in keys]
+        return list(with_tiers(collection, read_tier=read_tier).find(query).sort(sort).limit(limit))
+
+    def _merge_archived(
+            self,
+            documents: List[Dict[str, Any]],
+            archived: List[Dict[str, Any]],
+            keys: List[str],
+            limit: int
+    ) -> Tuple[List[Dict[str, Any]], Set[str]]:
+        """
+        Merges the hot and the archived documents of a page, both sorted newest first on `keys`, and
+        returns the ids taken from the archive. A document restored while the page was read is in
+        both collections, the hot copy wins.
+        """
+        if not archived:
+            return documents, set()
+        hot_ids = {document['_id'] for document in documents}
+        archived = [document for document in archived if document['_id'] not in hot_ids]
+        merged = list(itertools.islice(
+            heapq.merge(documents, archived, key=lambda document: [document[key] for key in keys], reverse=True),
+            limit
+        ))
+        return merged, {document['_id'] for document in merged if document['_id'] not in hot_ids}
+
+    def _page_keys(self, sort_field: Optional[str]) -> List[str]:
+        return [sort_field, '_id'] if sort_field else ['_id']
+
+    def _page_query(self, query: Dict[str, Any], sort_field: Optional[str], cursor: Optional[str]) -> Dict[str, Any]:
+        query = dict(query)
+        if cursor:
+            last_values = decode_cursor(cursor, size=len(self._page_keys(sort_field)))
+            if sort_field:
+                query['$or'] = [
+                    {sort_field: {'$lt': last_values[0]}},
+                    {sort_field: last_values[0], '_id': {'$lt': last_values[1]}},
+                ]
+            else:
+                query['_id'] = {'$lt': last_values[0]}
+        return query
+
+    def _to_page(
+            self,
+            documents: List[Dict[str, Any]],
+            model_class: Type[MongoModels],
+            keys: List[str],
+            page_size: int,
+            archived_ids: Set[str] = frozenset()
+    ) -> Page:
+        # `documents` holds up to page_size + 1 documents, the extra one only tells that more pages exist
+        next_cursor = None
+        if len(documents) > page_size:
+            documents = documents[:page_size]
+            next_cursor = encode_cursor([documents[-1][key] for key in keys])
+        # Listings are read-only views, their models are not tracked for partial updates
+        items = [self._hydrate(document, model_class, track_changes=False) for document in documents]
+        self._mark_archived(items, archived_ids)
+        return Page(items=items, next_cursor=next_cursor)
+
+    def _iter_pages(
+            self,
+            collection: Collection,
+            query: Dict[str, Any],
+            model_class: Type[MongoModels],
+            sort_field: Optional[str] = 'created_at',
+            page_size: int = DEFAULT_PAGE_SIZE,
+            read_tier: Optional[str] = None,
+    ) -> Iterator[Any]:
+        # Holds at most one page in memory and never keeps a server cursor open between pages
+        cursor = None
+        while True:
+            page = self._find_page(
+                collection=collection,
+                query=query,
+                model_class=model_class,
+                sort_field=sort_field,
+                page_size=page_size,
+                cursor=cursor,
+                read_tier=read_tier
+            )
+            yield from page.items
+            if not page.next_cursor:
+                return
+            cursor = page.next_cursor
\ No newline at end of file
@@ -1,71 +1,116 @@
-from typing import List
+from typing import Iterator, List, Optional
+
+from pymongo import IndexModel, DESCENDING
 
-from application.errors import DataNotFound
 from application.models.order import Order
-from application.repositories.mongo_repository_base import MongoRepositoryBase
+from application.repositories.consistency_tiers import WRITE_TIER_DURABLE
+from application.repositories.mongo_repository_base import MongoRepositoryBase, GetManyResult, Page, \
+    QueryShape, DEFAULT_PAGE_SIZE
 from application.utils import now_in_epoch_sec
+from application.settings import ENTITY_CACHE_TTL_ORDERS_SEC
 
 
 class OrderRepository(MongoRepositoryBase):
+    INDEXES = {
+        'orders': [
+            # Serves query_by_user_id and the keyset pagination, with and without a status filter
+            IndexModel([('user_id', 1), ('created_at', DESCENDING), ('_id', DESCENDING)],
+                       name='user_id_created_at'),
+            IndexModel([('user_id', 1), ('status', 1), ('created_at', DESCENDING), ('_id', DESCENDING)],
+                       name='user_id_status_created_at'),
+        ]
+    }
+    CACHE_TTL_SEC = ENTITY_CACHE_TTL_ORDERS_SEC
+    WRITE_TIER = WRITE_TIER_DURABLE
+    ARCHIVED = True
+
     def __init__(self) -> None:
         super().__init__()
         self.order_collection = self.db.orders
-        self.user_id_index = self.db.order_user_index
 
-    def create_order(self, order: Order) -> Order:
-        document = order.to_mongo_document()
-        self.order_collection.insert_one(document)
-        self._manage_indexes_write(order=order)
+    def create_order(self, order: Order, write_tier: Optional[str] = None) -> Order:
+        self._insert(self.order_collection, order, write_tier=write_tier)
         return order
 
-    def update_order(self, order: Order) -> Order:
+    def update_order(self, order: Order, write_tier: Optional[str] = None) -> Order:
         order.updated_at = now_in_epoch_sec()
-        self.order_collection.update_one(
-            {'_id': order.order_id},
-            {"$set": order.to_mongo_document()}
-        )
+        self._update(self.order_collection, order, write_tier=write_tier)
         return order
 
-    def get_by_order_id(self, order_id: str) -> Order:
-        document = self.order_collection.find_one(
-            {'_id': order_id}
+    def get_by_order_id(
+            self,
+            order_id: str,
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> Order:
+        return self._find_by_id(
+            self.order_collection, order_id, Order, self._order_projection(projection), read_tier=read_tier
         )
-        if not document:
-            raise DataNotFound()
-        data_dict = Order.get_kwargs_from_mongo_document(document)
-        return Order(**data_dict)
 
-    def query_by_user_id(self, user_id: str) -> List[Order]:
-        user_index_doc = self.user_id_index.find_one(
-            {'_id': user_id}
+    def get_many(
+            self,
+            order_ids: List[str],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> GetManyResult:
+        return self._get_many(
+            self.order_collection, order_ids, Order, self._order_projection(projection), read_tier=read_tier
         )
-        if not user_index_doc:
-            return []
 
-        user_order_ids = user_index_doc['data']
-        return [self.get_by_order_id(order_id) for order_id in user_order_ids]
+    def query_by_user_id(self, user_id: str) -> List[Order]:
+        return self._find_all(self.order_collection, {'user_id': user_id}, Order)
+
+    def page_by_user_id(
+            self,
+            user_id: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+            cursor: Optional[str] = None,
+            status: Optional[str] = None,
+            read_tier: Optional[str] = None,
+    ) -> Page:
+        return self._find_page(
+            collection=self.order_collection,
+            query=self._user_query(user_id=user_id, status=status),
+            model_class=Order,
+            page_size=page_size,
+            cursor=cursor,
+            read_tier=read_tier
+        )
 
-    def _manage_indexes_write(self, order: Order) -> None:
-        user_index_doc = self.user_id_index.find_one(
-            {'_id': order.user_id}
+    def iter_by_user_id(
+            self,
+            user_id: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+            status: Optional[str] = None,
+            read_tier: Optional[str] = None,
+    ) -> Iterator[Order]:
+        return self._iter_pages(
+            collection=self.order_collection,
+            query=self._user_query(user_id=user_id, status=status),
+            model_class=Order,
+            page_size=page_size,
+            read_tier=read_tier
         )
 
-        # New
-        if not user_index_doc:
-            user_orders = [order.order_id]
-            self.user_id_index.insert_one(
-                {
-                    '_id': order.user_id,
-                    'data': user_orders
-                }
-            )
-        # Exists
-        else:
-            user_orders = user_index_doc['data']
-            user_orders.append(order.order_id)
-            self.user_id_index.update_one(
-                {'_id': order.user_id},
-                {"$set": {'data': user_orders}}
-            )
+    def query_shapes(self) -> List[QueryShape]:
+        return [
+            self._id_shape(self.order_collection),
+            QueryShape('orders.query_by_user_id', 'orders', {'user_id': 'sample_user'}),
+            *self._page_shapes('orders.page_by_user_id', self.order_collection, self._user_query('sample_user')),
+            *self._page_shapes(
+                'orders.page_by_user_id_status', self.order_collection, self._user_query('sample_user', 'CREATED')
+            ),
+        ]
+
+    def _order_projection(self, projection: Optional[List[str]]) -> Optional[List[str]]:
+        # update_order always writes order_id and updated_at, and checks version, so partial orders always carry them
+        if not projection:
+            return None
+        return [*projection, 'order_id', 'updated_at', 'version']
 
-        return None
\ No newline at end of file
+    def _user_query(self, user_id: str, status: Optional[str] = None) -> dict:
+        query = {'user_id': user_id}
+        if status:
+            query['status'] = status
+        # Statuses are matched in both storage forms
+        return Order.storage_filter(query)
\ No newline at end of file
@@ -1,71 +1,124 @@
-from typing import List
+from typing import Iterator, List, Optional
+
+from pymongo import IndexModel, DESCENDING
 
-from application.errors import DataNotFound
 from application.models.purchase_record import PurchaseRecord
-from application.repositories.mongo_repository_base import MongoRepositoryBase
-from application.utils import now_in_epoch_sec
+from application.repositories.mongo_repository_base import MongoRepositoryBase, GetManyResult, Page, \
+    QueryShape, DEFAULT_PAGE_SIZE
+from application.settings import ENTITY_CACHE_TTL_PURCHASE_RECORDS_SEC
 
 
 class PurchaseRecordRepository(MongoRepositoryBase):
+    INDEXES = {
+        'purchase_records': [
+            # Serves query_by_user_id and the keyset pagination, with and without a status filter
+            IndexModel([('user_id', 1), ('created_at', DESCENDING), ('_id', DESCENDING)],
+                       name='user_id_created_at'),
+            IndexModel([('user_id', 1), ('status', 1), ('created_at', DESCENDING), ('_id', DESCENDING)],
+                       name='user_id_status_created_at'),
+        ]
+    }
+    CACHE_TTL_SEC = ENTITY_CACHE_TTL_PURCHASE_RECORDS_SEC
+    ARCHIVED = True
+
     def __init__(self) -> None:
         super().__init__()
         self.purchase_records_collection = self.db.purchase_records
-        self.user_id_index = self.db.purchase_records_user_id_index
 
-    def create_record(self, record: PurchaseRecord) -> PurchaseRecord:
-        document = record.to_mongo_document()
-        self.purchase_records_collection.insert_one(document)
-        self._manage_indexes_write(record=record)
+    def create_record(self, record: PurchaseRecord, write_tier: Optional[str] = None) -> PurchaseRecord:
+        self._insert(self.purchase_records_collection, record, write_tier=write_tier)
         return record
 
-    def update_record(self, record: PurchaseRecord) -> PurchaseRecord:
-        record.updated_at = now_in_epoch_sec()
-        self.purchase_records_collection.update_one(
-            {'_id': record.record_id},
-            {"$set": record.to_mongo_document()}
-        )
+    def create_records(self, records: List[PurchaseRecord], write_tier: Optional[str] = None) -> List[PurchaseRecord]:
+        self._insert_many(self.purchase_records_collection, records, write_tier=write_tier)
+        return records
+
+    def update_record(self, record: PurchaseRecord, write_tier: Optional[str] = None) -> PurchaseRecord:
+        self._update(self.purchase_records_collection, record, write_tier=write_tier)
         return record
 
-    def get_by_id(self, record_id: str) -> PurchaseRecord:
-        document = self.purchase_records_collection.find_one(
-            {'_id': record_id}
+    def update_records(self, records: List[PurchaseRecord], write_tier: Optional[str] = None) -> List[PurchaseRecord]:
+        # One bulk write for all the records instead of a round trip each
+        self._update_many(self.purchase_records_collection, records, write_tier=write_tier)
+        return records
+
+    def get_by_id(
+            self,
+            record_id: str,
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> PurchaseRecord:
+        return self._find_by_id(
+            self.purchase_records_collection, record_id, PurchaseRecord, self._record_projection(projection),
+            read_tier=read_tier
         )
-        if not document:
-            raise DataNotFound()
-        data_dict = PurchaseRecord.get_kwargs_from_mongo_document(document)
-        return PurchaseRecord(**data_dict)
 
-    def query_by_user_id(self, user_id: str) -> List[PurchaseRecord]:
-        purchase_record_index_doc = self.user_id_index.find_one(
-            {'_id': user_id}
+    def get_many(
+            self,
+            record_ids: List[str],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> GetManyResult:
+        return self._get_many(
+            self.purchase_records_collection, record_ids, PurchaseRecord, self._record_projection(projection),
+            read_tier=read_tier
         )
-        if not purchase_record_index_doc:
-            return []
 
-        purchase_record_ids = purchase_record_index_doc['data']
-        return [self.get_by_id(purchase_record_id) for purchase_record_id in purchase_record_ids]
+    def query_by_user_id(self, user_id: str) -> List[PurchaseRecord]:
+        return self._find_all(self.purchase_records_collection, {'user_id': user_id}, PurchaseRecord)
+
+    def page_by_user_id(
+            self,
+            user_id: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+            cursor: Optional[str] = None,
+            status: Optional[str] = None,
+            read_tier: Optional[str] = None,
+    ) -> Page:
+        return self._find_page(
+            collection=self.purchase_records_collection,
+            query=self._user_query(user_id=user_id, status=status),
+            model_class=PurchaseRecord,
+            page_size=page_size,
+            cursor=cursor,
+            read_tier=read_tier
+        )
 
-    def _manage_indexes_write(self, record: PurchaseRecord) -> None:
-        user_record_doc = self.user_id_index.find_one(
-            {'_id': record.user_id}
+    def iter_by_user_id(
+            self,
+            user_id: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+            status: Optional[str] = None,
+            read_tier: Optional[str] = None,
+    ) -> Iterator[PurchaseRecord]:
+        return self._iter_pages(
+            collection=self.purchase_records_collection,
+            query=self._user_query(user_id=user_id, status=status),
+            model_class=PurchaseRecord,
+            page_size=page_size,
+            read_tier=read_tier
         )
 
-        # New
-        if not user_record_doc:
-            user_purchase_records = [record.record_id]
-            self.user_id_index.insert_one(
-                {
-                    '_id': record.user_id,
-                    'data': user_purchase_records
-                }
-            )
-        # Exists
-        else:
-            user_purchase_records = user_record_doc['data']
-            user_purchase_records.append(record.record_id)
-            self.user_id_index.update_one(
-                {'_id': record.user_id},
-                {"$set": {'data': user_purchase_records}}
-            )
-
-        return None
\ No newline at end of file
+    def query_shapes(self) -> List[QueryShape]:
+        collection = self.purchase_records_collection
+        return [
+            self._id_shape(collection),
+            QueryShape('purchase_records.query_by_user_id', collection.name, {'user_id': 'sample_user'}),
+            *self._page_shapes('purchase_records.page_by_user_id', collection, self._user_query('sample_user')),
+            *self._page_shapes(
+                'purchase_records.page_by_user_id_status', collection, self._user_query('sample_user', 'CREATED')
+            ),
+        ]
+
+    def _record_projection(self, projection: Optional[List[str]]) -> Optional[List[str]]:
+        # Record writes are compare-and-swap on version, so partial records always carry it
+        if not projection:
+            return None
+        return [*projection, 'record_id', 'version']
+
+    def _user_query(self, user_id: str, status: Optional[str] = None) -> dict:
+        query = {'user_id': user_id}
+        if status:
+            query['status'] = status
+        # Statuses are matched in both storage forms
+        return PurchaseRecord.storage_filter(query)
\ No newline at end of file
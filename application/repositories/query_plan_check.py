@@ -0,0 +1,120 @@
+"""
+Runs explain() on every repository query shape and fails when one of them is answered by a
+collection scan, so that new queries cannot go unindexed while the collections grow.
+
+The check runs against a scratch database on a local mongod. It is dropped, given the
+repositories' INDEXES and seeded first: on a missing collection the planner answers with an
+empty plan, which says nothing about the indexes.
+
+Usage:
+    python -m application.repositories.query_plan_check [--mongo-url mongodb://localhost:27017]
+"""
+import argparse
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Set
+
+from loguru import logger
+from pymongo import MongoClient
+from pymongo.database import Database
+
+from application.repositories.indexes import INDEXED_REPOSITORIES
+from application.repositories.mongo_repository_base import QueryShape
+
+SEED_DOCUMENT_COUNT = 1000
+
+
+def plan_stages(plan: Any) -> Set[str]:
+    """Every stage name in an explain() plan tree, for both the classic and the slot based engine."""
+    stages = set()
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.add(plan['stage'])
+        for value in plan.values():
+            stages |= plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            stages |= plan_stages(item)
+    return stages
+
+
+def winning_plan_stages(explain: Dict[str, Any]) -> Set[str]:
+    # Rejected plans often include a collection scan, only the chosen one matters
+    return plan_stages(explain['queryPlanner']['winningPlan'])
+
+
+def seed_documents(shapes: List[QueryShape]) -> List[Dict[str, Any]]:
+    # The equality fields the shapes filter on, one document in ten matches the sample values
+    fields = {}
+    for shape in shapes:
+        for key, value in shape.filter.items():
+            if not key.startswith('$') and key != '_id' and not isinstance(value, dict):
+                fields[key] = value
+    return [
+        {
+            '_id': f'seed_{i:05d}',
+            'created_at': i,
+            **{key: value if i % 10 == 0 else f'{value}_{i}' for key, value in fields.items()}
+        }
+        for i in range(SEED_DOCUMENT_COUNT)
+    ]
+
+
+def prepare_database(db: Database, shapes: List[QueryShape]) -> None:
+    for repository_class in INDEXED_REPOSITORIES:
+        for collection_name, indexes in repository_class.all_indexes().items():
+            db[collection_name].create_indexes(indexes)
+
+    shapes_by_collection = defaultdict(list)
+    for shape in shapes:
+        shapes_by_collection[shape.collection].append(shape)
+    for collection_name, collection_shapes in shapes_by_collection.items():
+        db[collection_name].insert_many(seed_documents(collection_shapes))
+
+
+def check_query_plans(db: Database, shapes: List[QueryShape]) -> List[str]:
+    """Names of the shapes whose winning plan scans the collection."""
+    failures = []
+    for shape in shapes:
+        cursor = db[shape.collection].find(shape.filter)
+        if shape.sort:
+            cursor = cursor.sort(shape.sort)
+        stages = winning_plan_stages(cursor.explain())
+        logger.info("Query plan", kv={
+            'shape': shape.name,
+            'collection': shape.collection,
+            'stages': sorted(stages),
+        })
+        if 'COLLSCAN' in stages:
+            failures.append(shape.name)
+        elif 'SORT' in stages:
+            # Served by an index but sorted in memory, pages get slower as the user's data grows
+            logger.warning("Query sorts in memory", kv={'shape': shape.name})
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Fail when a repository query is not served by an index')
+    parser.add_argument('--mongo-url', default='mongodb://localhost:27017')
+    parser.add_argument('--database', default='query_plan_check')
+    args = parser.parse_args()
+
+    shapes = [shape for repository_class in INDEXED_REPOSITORIES for shape in repository_class().query_shapes()]
+    client = MongoClient(args.mongo_url)
+    try:
+        client.drop_database(args.database)
+        db = client[args.database]
+        prepare_database(db, shapes)
+        failures = check_query_plans(db, shapes)
+    finally:
+        client.drop_database(args.database)
+        client.close()
+
+    if failures:
+        logger.error("Queries fall back to a collection scan", kv={'shapes': failures})
+        sys.exit(1)
+    logger.info("Every repository query is served by an index", kv={'shape_count': len(shapes)})
+
+
+if __name__ == '__main__':
+    main()
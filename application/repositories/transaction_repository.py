@@ -1,7 +1,13 @@
-from typing import List
+from typing import List, Optional
 
-from application.models.transactions import Transaction
-from application.repositories.mongo_repository_base import MongoRepositoryBase
+from pymongo import IndexModel
+
+from application.errors import DataNotFound
+from application.models.transactions import Transaction, TransactionLineage
+from application.repositories.consistency_tiers import WRITE_TIER_DURABLE
+from application.repositories.mongo_repository_base import MongoRepositoryBase, GetManyResult, QueryShape, \
+    archive_collection_name
+from application.settings import ENTITY_CACHE_TTL_TRANSACTIONS_SEC
 
 
 class TransactionRepository(MongoRepositoryBase):
@@ -9,100 +15,113 @@ class TransactionRepository(MongoRepositoryBase):
     # test : 9mJWKfSjDNfehfVPWzLw8q
     # child: K4L2mttXfXaDkfVQ4awZmT
 
+    INDEXES = {
+        'transactions': [
+            # The auth is its own parent, so one scan of a parent id yields the auth and all its children
+            IndexModel([('parent_transaction_id', 1), ('action', 1)], name='parent_transaction_id_action'),
+            IndexModel([('provider_transaction_id', 1)], name='provider_transaction_id'),
+        ]
+    }
+    CACHE_TTL_SEC = ENTITY_CACHE_TTL_TRANSACTIONS_SEC
+    WRITE_TIER = WRITE_TIER_DURABLE
+    ARCHIVED = True
+
     def __init__(self) -> None:
         super().__init__()
-        # Single txn table, 1 indexes
+        # Single txn table, lineage is looked up through secondary indexes on the transaction itself
         self.transactions_collection = self.db.transactions
-        # TODO: Consider persisting as part of transaction document itself
-        self.parent_transaction_index = self.db.transaction_parent_transaction_index_collection
-        self.provider_transaction_index = self.db.transaction_provider_transaction_index_collection
-
-    def create_record(self, transaction: Transaction) -> Transaction:
-        document = transaction.to_mongo_document()
-        self.transactions_collection.insert_one(document)
-        self._manage_indexes_write(transaction=transaction)
+
+    def create_record(self, transaction: Transaction, write_tier: Optional[str] = None) -> Transaction:
+        self._insert(self.transactions_collection, transaction, write_tier=write_tier)
         return transaction
 
-    def update_record(self, transaction: Transaction) -> Transaction:
-        self.transactions_collection.update_one(
-            {'_id': transaction.transaction_id},
-            {"$set": transaction.to_mongo_document()}
-        )
+    def update_record(self, transaction: Transaction, write_tier: Optional[str] = None) -> Transaction:
+        self._update(self.transactions_collection, transaction, write_tier=write_tier)
         return transaction
 
-    def get_by_transaction_id(self, transaction_id: str) -> Transaction:
-        document = self.transactions_collection.find_one(
-            {'_id': transaction_id}
+    def get_by_transaction_id(
+            self,
+            transaction_id: str,
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> Transaction:
+        return self._find_by_id(
+            self.transactions_collection, transaction_id, Transaction, self._transaction_projection(projection),
+            read_tier=read_tier
         )
-        data_dict = Transaction.get_kwargs_from_mongo_document(document)
-        return Transaction(**data_dict)
 
-    def query_by_parent_transaction_id(self, transaction_id: str) -> List[Transaction]:
-        child_transactions_doc = self.parent_transaction_index.find_one(
-            {'_id': transaction_id}
+    def get_many(
+            self,
+            transaction_ids: List[str],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> GetManyResult:
+        return self._get_many(
+            self.transactions_collection, transaction_ids, Transaction, self._transaction_projection(projection),
+            read_tier=read_tier
         )
-        if not child_transactions_doc:
-            return []
 
-        child_transactions = child_transactions_doc['data']
-        return [self.get_by_transaction_id(txn_id) for txn_id in child_transactions]
+    def query_by_parent_transaction_id(self, transaction_id: str, action: Optional[str] = None) -> List[Transaction]:
+        collection = self.transactions_collection
+        query = self._lineage_query(parent_id=transaction_id, action=action)
+        documents = list(collection.find(query))
+        archived = []
+        if not self._has_auth(transaction_id, documents):
+            # The auth was archived with its order (or filtered out by action), children created since then are hot
+            archived = list(self._archive_of(collection).find(query))
+        return self._hydrate_with_archived(collection, documents, archived, Transaction)
+
+    def get_auth_with_children(self, parent_id: str) -> TransactionLineage:
+        transactions = self.query_by_parent_transaction_id(parent_id)
+        if not transactions:
+            raise DataNotFound()
+        return self._to_lineage(parent_id, transactions)
 
     def query_by_provider_transaction_id(self, transaction_id: str) -> List[Transaction]:
-        transactions_doc = self.provider_transaction_index.find_one(
-            {'_id': transaction_id}
-        )
-        if not transactions_doc:
-            return []
-
-        transactions = transactions_doc['data']
-        return [self.get_by_transaction_id(txn_id) for txn_id in transactions]
-
-    def _manage_indexes_write2(self, transaction: Transaction) -> None:
-        pass
-
-    def _manage_indexes_write(self, transaction: Transaction) -> None:
-        child_transactions_doc = self.parent_transaction_index.find_one(
-            {'_id': transaction.parent_transaction_id}
-        )
-
-        # New
-        if not child_transactions_doc:
-            child_transactions = [transaction.transaction_id]
-            self.parent_transaction_index.insert_one(
-                {
-                    '_id': transaction.parent_transaction_id,
-                    'data': child_transactions
-                }
-            )
-        # Exists
-        else:
-            child_transactions = child_transactions_doc['data']
-            child_transactions.append(transaction.transaction_id)
-            self.parent_transaction_index.update_one(
-                {'_id': transaction.parent_transaction_id},
-                {"$set": {'data': child_transactions}}
-            )
-
-        transactions_doc = self.provider_transaction_index.find_one(
-            {'_id': transaction.provider_transaction_id}
-        )
-
-        # New
-        if not transactions_doc:
-            provider_transactions = [transaction.transaction_id]
-            self.provider_transaction_index.insert_one(
-                {
-                    '_id': transaction.provider_transaction_id,
-                    'data': provider_transactions
-                }
-            )
-        # Exists
-        else:
-            provider_transactions = transactions_doc['data']
-            provider_transactions.append(transaction.transaction_id)
-            self.provider_transaction_index.update_one(
-                {'_id': transaction.provider_transaction_id},
-                {"$set": {'data': provider_transactions}}
-            )
-
-        return None
+        collection = self.transactions_collection
+        documents = list(collection.find({'provider_transaction_id': transaction_id}))
+        return self._hydrate_all(collection, documents, Transaction)
+
+    def query_shapes(self) -> List[QueryShape]:
+        collection = self.transactions_collection
+        return [
+            self._id_shape(collection),
+            QueryShape('transactions.lineage', collection.name, self._lineage_query('sample_parent')),
+            QueryShape(
+                'transactions.lineage_action', collection.name, self._lineage_query('sample_parent', 'CAPTURE_AUTH')
+            ),
+            QueryShape(
+                'transactions_archive.lineage',
+                archive_collection_name(collection.name),
+                self._lineage_query('sample_parent')
+            ),
+            QueryShape(
+                'transactions.query_by_provider_transaction_id',
+                collection.name,
+                {'provider_transaction_id': 'sample_provider_id'}
+            ),
+        ]
+
+    def _transaction_projection(self, projection: Optional[List[str]]) -> Optional[List[str]]:
+        if not projection:
+            return None
+        return [*projection, 'transaction_id']
+
+    def _lineage_query(self, parent_id: str, action: Optional[str] = None) -> dict:
+        query = {'parent_transaction_id': parent_id}
+        if action:
+            query['action'] = action
+        # Actions are matched in both storage forms
+        return Transaction.storage_filter(query)
+
+    def _has_auth(self, parent_id: str, documents: List[dict]) -> bool:
+        return any(document.get('transaction_id') == parent_id for document in documents)
+
+    def _to_lineage(self, parent_id: str, transactions: List[Transaction]) -> TransactionLineage:
+        lineage = TransactionLineage(auth=None)
+        for txn in transactions:
+            if txn.transaction_id == parent_id:
+                lineage.auth = txn
+            else:
+                lineage.children.append(txn)
+        return lineage
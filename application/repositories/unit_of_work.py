@@ -0,0 +1,154 @@
+import contextlib
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from flask import g, has_app_context
+from loguru import logger
+from pymongo import UpdateOne
+from pymongo.client_session import ClientSession
+from pymongo.collection import Collection
+
+from application.errors import ConcurrentModificationError
+from application.repositories.consistency_tiers import WRITE_CONCERNS, strongest_write_tier, tier_metrics, with_tiers
+from application.repositories.identity_map import clear_identity_map
+from application.repositories.mongo_client_registry import mongo_client_registry
+
+
+class UnitOfWork:
+    """
+    Collects repository writes made during one request or celery task and sends them as one
+    ordered bulk_write per collection. Writes to the same collection keep their order; collections
+    are flushed in the order they were first written to.
+    """
+
+    def __init__(self, use_transaction: bool = False) -> None:
+        # Mongo multi-document transaction around each flush, for flows where atomicity matters.
+        # Requires a replica set.
+        self.use_transaction = use_transaction
+        self._collections: Dict[str, Collection] = {}
+        self._operations: Dict[str, List[Any]] = {}
+        # collection -> ids of the compare-and-swap updates in its pending operations
+        self._versioned_ids: Dict[str, List[Any]] = {}
+        # collection -> durability tiers of its pending operations, the batch is sent with the strongest
+        self._write_tiers: Dict[str, List[Optional[str]]] = {}
+        self._after_flush: List[Callable[[], None]] = []
+
+    def add(
+            self,
+            collection: Collection,
+            operation: Any,
+            versioned_id: Optional[Any] = None,
+            write_tier: Optional[str] = None
+    ) -> None:
+        name = collection.full_name
+        self._collections.setdefault(name, collection)
+        self._operations.setdefault(name, []).append(operation)
+        self._write_tiers.setdefault(name, []).append(write_tier)
+        if versioned_id is not None:
+            self._versioned_ids.setdefault(name, []).append(versioned_id)
+
+    def after_flush(self, callback: Callable[[], None]) -> None:
+        """Runs `callback` once the pending writes are stored, e.g. to invalidate cached copies."""
+        self._after_flush.append(callback)
+
+    def has_pending(self) -> bool:
+        return any(self._operations.values())
+
+    def flush(self) -> None:
+        if not self.has_pending():
+            return
+
+        operations = self._operations
+        versioned_ids = self._versioned_ids
+        write_tiers = {name: strongest_write_tier(tiers) for name, tiers in self._write_tiers.items()}
+        callbacks = self._after_flush
+        self.discard()
+        try:
+            if self.use_transaction:
+                # Write concerns only apply to the commit of a transaction, not to its operations
+                transaction_tier = strongest_write_tier(list(write_tiers.values()))
+                with mongo_client_registry.get_client().start_session() as session:
+                    session.with_transaction(
+                        lambda s: self._execute(operations, versioned_ids, write_tiers, session=s),
+                        write_concern=WRITE_CONCERNS[transaction_tier] if transaction_tier else None
+                    )
+            else:
+                self._execute(operations, versioned_ids, write_tiers)
+        finally:
+            # Also after a failed flush: part of the writes may be stored, and dropping a cached copy is harmless
+            for callback in callbacks:
+                callback()
+
+    def _execute(
+            self,
+            operations: Dict[str, List[Any]],
+            versioned_ids: Dict[str, List[Any]],
+            write_tiers: Dict[str, Optional[str]],
+            session: Optional[ClientSession] = None
+    ) -> None:
+        for name, collection_operations in operations.items():
+            if not collection_operations:
+                continue
+            write_tier = write_tiers.get(name)
+            collection = with_tiers(self._collections[name], write_tier=write_tier)
+            with tier_metrics.timed('write', write_tier):
+                result = collection.bulk_write(collection_operations, ordered=True, session=session)
+            logger.info("Unit of work flushed", kv={
+                'collection': name,
+                'operation_count': len(collection_operations),
+                'write_tier': write_tier,
+                'in_transaction': session is not None
+            })
+            # Every update targets an existing document, so a short match count means a version moved.
+            # The bulk result is not per operation: all the versioned ids of the collection are reported.
+            update_count = sum(1 for operation in collection_operations if isinstance(operation, UpdateOne))
+            if versioned_ids.get(name) and result.matched_count < update_count:
+                raise ConcurrentModificationError(collection.name, versioned_ids[name])
+
+    def discard(self) -> None:
+        self._operations = {}
+        self._versioned_ids = {}
+        self._write_tiers = {}
+        self._after_flush = []
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    if not has_app_context():
+        return None
+    return g.get('unit_of_work', None)
+
+
+def flush_unit_of_work() -> None:
+    """
+    Sends pending writes now, e.g. around a payment provider call: before it, so its side effects
+    can be traced, and right after recording its outcome, so a later failure cannot discard it.
+    """
+    uow = current_unit_of_work()
+    if uow:
+        uow.flush()
+
+
+@contextlib.contextmanager
+def unit_of_work(use_transaction: bool = False) -> Iterator[UnitOfWork]:
+    """
+    Binds a unit of work to the current flask request / celery task and commits it on a clean exit.
+    Pending writes, and the models loaded in the identity map, are dropped if the block raises.
+    Nested blocks join the outer unit of work.
+    Outside of an app context writes are not deferred.
+    """
+    existing = current_unit_of_work()
+    if existing is not None or not has_app_context():
+        yield existing
+        return
+
+    uow = UnitOfWork(use_transaction=use_transaction)
+    g.unit_of_work = uow
+    try:
+        yield uow
+        uow.flush()
+    except BaseException:
+        uow.discard()
+        # Loaded models may carry changes that were never stored
+        clear_identity_map()
+        raise
+    finally:
+        g.pop('unit_of_work', None)
@@ -1,32 +1,45 @@
-from application.errors import DataNotFound
+from typing import List, Optional
+
 from application.models.user import User
-from application.repositories.mongo_repository_base import MongoRepositoryBase
+from application.repositories.mongo_repository_base import MongoRepositoryBase, GetManyResult, QueryShape
+from application.settings import ENTITY_CACHE_TTL_USERS_SEC
 
 
 
 class UserRepository(MongoRepositoryBase):
+    CACHE_TTL_SEC = ENTITY_CACHE_TTL_USERS_SEC
 
     def __init__(self) -> None:
         super().__init__()
         self.user_collection = self.db.users
 
-    def create(self, user: User) -> User:
-        document = user.to_mongo_document()
-        self.user_collection.insert_one(document)
+    def create(self, user: User, write_tier: Optional[str] = None) -> User:
+        self._insert(self.user_collection, user, write_tier=write_tier)
         return user
 
-    def update_record(self, user: User) -> User:
-        self.user_collection.update_one(
-            {'_id': user.user_id},
-            {"$set": user.to_mongo_document()}
-        )
+    def update_record(self, user: User, write_tier: Optional[str] = None) -> User:
+        self._update(self.user_collection, user, write_tier=write_tier)
         return user
 
-    def get_by_id(self, user_id: str) -> User:
-        document = self.user_collection.find_one(
-            {'_id': user_id}
+    def get_by_id(self, user_id: str, projection: Optional[List[str]] = None, read_tier: Optional[str] = None) -> User:
+        return self._find_by_id(
+            self.user_collection, user_id, User, self._user_projection(projection), read_tier=read_tier
+        )
+
+    def get_many(
+            self,
+            user_ids: List[str],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> GetManyResult:
+        return self._get_many(
+            self.user_collection, user_ids, User, self._user_projection(projection), read_tier=read_tier
         )
-        if not document:
-            raise DataNotFound()
-        data_dict = User.get_kwargs_from_mongo_document(document)
-        return User(**data_dict)
\ No newline at end of file
+
+    def query_shapes(self) -> List[QueryShape]:
+        return [self._id_shape(self.user_collection)]
+
+    def _user_projection(self, projection: Optional[List[str]]) -> Optional[List[str]]:
+        if not projection:
+            return None
+        return [*projection, 'user_id']
\ No newline at end of file
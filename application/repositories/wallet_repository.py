@@ -1,70 +1,106 @@
-from typing import List
+from typing import Iterator, List, Optional
+
+from pymongo import IndexModel, DESCENDING
 
 from application.models.instrument import Instrument
-from application.repositories.mongo_repository_base import MongoRepositoryBase
+from application.repositories.mongo_repository_base import MongoRepositoryBase, GetManyResult, Page, \
+    QueryShape, DEFAULT_PAGE_SIZE
+from application.settings import ENTITY_CACHE_TTL_WALLET_SEC
 
 from loguru import logger
 
 
 class WalletRepository(MongoRepositoryBase):
+    INDEXES = {
+        'wallet': [
+            # Instruments carry no timestamp, so they are paginated on _id alone
+            IndexModel([('user_id', 1), ('_id', DESCENDING)], name='user_id_id'),
+        ]
+    }
+    CACHE_TTL_SEC = ENTITY_CACHE_TTL_WALLET_SEC
 
     def __init__(self) -> None:
         super().__init__()
         self.wallet_collection = self.db.wallet
-        self.user_id_index = self.db.wallet_user_id_index_collection
 
-    def create_record(self, instrument: Instrument) -> Instrument:
+    def create_record(self, instrument: Instrument, write_tier: Optional[str] = None) -> Instrument:
         document = instrument.to_mongo_document()
         logger.info(document)
-        self.wallet_collection.insert_one(document)
-        self._manage_indexes_write(instrument=instrument)
+        self._insert(self.wallet_collection, instrument, document, write_tier=write_tier)
         return instrument
 
-    def update_record(self, instrument: Instrument) -> Instrument:
-        self.wallet_collection.update_one(
-            {'_id': instrument.instrument_id},
-            {"$set": instrument.to_mongo_document()}
-        )
+    def update_record(self, instrument: Instrument, write_tier: Optional[str] = None) -> Instrument:
+        self._update(self.wallet_collection, instrument, write_tier=write_tier)
         return instrument
 
-    def get_by_instrument_id(self, instrument_id: str) -> Instrument:
-        document = self.wallet_collection.find_one(
-            {'_id': instrument_id}
+    def get_by_instrument_id(
+            self,
+            instrument_id: str,
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> Instrument:
+        return self._find_by_id(
+            self.wallet_collection, instrument_id, Instrument, self._instrument_projection(projection),
+            read_tier=read_tier
         )
-        data_dict = Instrument.get_kwargs_from_mongo_document(document)
-        return Instrument(**data_dict)
 
-    def query_by_user_id(self, user_id: str) -> List[Instrument]:
-        document = self.user_id_index.find_one(
-            {'_id': user_id}
+    def get_many(
+            self,
+            instrument_ids: List[str],
+            projection: Optional[List[str]] = None,
+            read_tier: Optional[str] = None
+    ) -> GetManyResult:
+        return self._get_many(
+            self.wallet_collection, instrument_ids, Instrument, self._instrument_projection(projection),
+            read_tier=read_tier
         )
-        if not document:
-            return []
 
-        user_instrument_ids = document['data']
-        return [self.get_by_instrument_id(instrument_id) for instrument_id in user_instrument_ids]
+    def query_shapes(self) -> List[QueryShape]:
+        return [
+            self._id_shape(self.wallet_collection),
+            QueryShape('wallet.query_by_user_id', 'wallet', {'user_id': 'sample_user'}),
+            *self._page_shapes('wallet.page_by_user_id', self.wallet_collection, {'user_id': 'sample_user'}, None),
+        ]
 
-    def _manage_indexes_write(self, instrument: Instrument) -> None:
-        user_instruments_document = self.user_id_index.find_one(
-            {'_id': instrument.user_id}
+    def _instrument_projection(self, projection: Optional[List[str]]) -> Optional[List[str]]:
+        if not projection:
+            return None
+        return [*projection, 'instrument_id']
+
+    def query_by_user_id(self, user_id: str) -> List[Instrument]:
+        documents = self.wallet_collection.find(
+            {'user_id': user_id}
         )
+        return [self._hydrate(document, Instrument) for document in documents]
 
-        # New
-        if not user_instruments_document:
-            user_instruments = [instrument.instrument_id]
-            self.user_id_index.insert_one(
-                {
-                    '_id': instrument.user_id,
-                    'data': user_instruments
-                }
-            )
-        # Exists
-        else:
-            user_instruments = user_instruments_document['data']
-            user_instruments.append(instrument.instrument_id)
-            self.user_id_index.update_one(
-                {'_id': instrument.user_id},
-                {"$set": {'data': user_instruments}}
-            )
+    def page_by_user_id(
+            self,
+            user_id: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+            cursor: Optional[str] = None,
+            read_tier: Optional[str] = None,
+    ) -> Page:
+        return self._find_page(
+            collection=self.wallet_collection,
+            query={'user_id': user_id},
+            model_class=Instrument,
+            sort_field=None,
+            page_size=page_size,
+            cursor=cursor,
+            read_tier=read_tier
+        )
 
-        return None
+    def iter_by_user_id(
+            self,
+            user_id: str,
+            page_size: int = DEFAULT_PAGE_SIZE,
+            read_tier: Optional[str] = None,
+    ) -> Iterator[Instrument]:
+        return self._iter_pages(
+            collection=self.wallet_collection,
+            query={'user_id': user_id},
+            model_class=Instrument,
+            sort_field=None,
+            page_size=page_size,
+            read_tier=read_tier
+        )
\ No newline at end of file
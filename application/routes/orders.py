@@ -3,23 +3,58 @@ from flask import Blueprint
 from flask import request
 
 from application.controllers.orders.create_order_controller import CreateOrderController
+from application.controllers.orders.get_order_details_controller import GetOrderDetailsController
+from application.controllers.orders.get_orders_controller import GetOrdersController
 from application.decorators import order_error_handler
+from application.repositories.aio.async_order_repository import AsyncOrderRepository
+from application.repositories.aio.async_purchase_record_repository import AsyncPurchaseRecordRepository
+from application.repositories.aio.async_transaction_repository import AsyncTransactionRepository
+from application.repositories.aio.event_loop import run_async
+from application.repositories.order_repository import OrderRepository
 
 orders_blueprint = Blueprint('orders', __name__, url_prefix='/orders')
 
 @orders_blueprint.route("/get", methods=['POST'])
+@order_error_handler
 def get_orders():
     """
     requires
-    user_id or [order_id]
+    user_id, optional page_size, cursor (from the previous page) and status
     Returns
     -------
-    order, status of processing, expected time, delivery method
+    one page of the user's orders, newest first, and the cursor of the next page
     """
-    res = {'hello': 'world'}
+    data = request.get_json()
+    controller = GetOrdersController(order_repo=OrderRepository())
+    res = controller.process(data)
+    return json.dumps(res), 200
+
+
+@orders_blueprint.route("/get_details", methods=['POST'])
+@order_error_handler
+def get_order_details():
+    """
+    requires
+    user_id, order_id
+    Returns
+    -------
+    the order with its purchase records and payment transaction
+    """
+    data = request.get_json()
+    res = run_async(_get_order_details(data))
     return json.dumps(res), 200
 
 
+async def _get_order_details(data):
+    # Async repositories take the client of the loop they are built on
+    controller = GetOrderDetailsController(
+        order_repo=AsyncOrderRepository(),
+        purchase_record_repo=AsyncPurchaseRecordRepository(),
+        txn_repo=AsyncTransactionRepository()
+    )
+    return await controller.process(data)
+
+
 @orders_blueprint.route("/create", methods=['POST'])
 @order_error_handler
 def create_order():
@@ -30,4 +30,15 @@ def create():
         digitalocean_spaces=DigitalOceanSpaces(),
         purchase_record_repo=PurchaseRecordRepository()
     ).create(request=data)
+    return json.dumps(result), 200
+
+
+@purchase_intent_blueprint.route("/create_batch", methods=['POST'])
+@purchase_intent_error_handler
+def create_batch():
+    data = request.get_json()
+    result = PurchaseIntentController(
+        digitalocean_spaces=DigitalOceanSpaces(),
+        purchase_record_repo=PurchaseRecordRepository()
+    ).create_batch(request=data)
     return json.dumps(result), 200
\ No newline at end of file
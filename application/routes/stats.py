@@ -0,0 +1,39 @@
+import json
+from flask import Blueprint
+
+from application.repositories.consistency_tiers import tier_metrics
+from application.repositories.entity_cache import entity_cache
+from application.repositories.mongo_client_registry import mongo_client_registry
+
+stats_blueprint = Blueprint('stats', __name__, url_prefix='/stats')
+
+
+@stats_blueprint.route("/mongo_pool", methods=['GET'])
+def get_mongo_pool_stats():
+    """
+    Returns
+    -------
+    connection pool settings and per-server counters of this worker process
+    """
+    return json.dumps(mongo_client_registry.pool_stats()), 200
+
+
+@stats_blueprint.route("/entity_cache", methods=['GET'])
+def get_entity_cache_stats():
+    """
+    Returns
+    -------
+    per-collection hit/miss/invalidation counters of the entity cache in this worker process
+    """
+    return json.dumps(entity_cache.stats()), 200
+
+
+
+@stats_blueprint.route("/mongo_tiers", methods=['GET'])
+def get_mongo_tier_stats():
+    """
+    Returns
+    -------
+    call count and latency of mongo reads and writes per consistency tier in this worker process
+    """
+    return json.dumps(tier_metrics.snapshot()), 200
\ No newline at end of file
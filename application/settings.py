@@ -14,7 +14,50 @@ ELASTICSEARCH_USERNAME = environ.get("ELASTICSEARCH_USERNAME")
 ELASTICSEARCH_PASSWORD = environ.get("ELASTICSEARCH_PASSWORD")
 
 # Mongo
+# "mongo", or "memory" for an in-process store without a server (load tests and benchmarks)
+MONGODB_BACKEND = environ.get("MONGODB_BACKEND", "mongo").lower()
+# Decoding of stored documents into models: "compiled" (generated per model) or "msgspec" (validating)
+MODEL_CODEC_BACKEND = environ.get("MODEL_CODEC_BACKEND", "compiled").lower()
+# New order, purchase record and transaction documents are written in their compact storage form
+COMPACT_STORAGE_ENABLED = environ.get("COMPACT_STORAGE_ENABLED", "false").lower() == "true"
 MONGODB_CONNECT_URL = environ.get("MONGODB_CONNECT_URL")
+MONGODB_MAX_POOL_SIZE = int(environ.get("MONGODB_MAX_POOL_SIZE", 100))
+MONGODB_MIN_POOL_SIZE = int(environ.get("MONGODB_MIN_POOL_SIZE", 0))
+MONGODB_MAX_IDLE_TIME_MS = int(environ.get("MONGODB_MAX_IDLE_TIME_MS", 60 * 1000))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(environ.get("MONGODB_WAIT_QUEUE_TIMEOUT_MS", 10 * 1000))
+# Longest a view waits on async repository calls run on the process event loop
+ASYNC_CALL_TIMEOUT_SEC = int(environ.get("ASYNC_CALL_TIMEOUT_SEC", 30))
+
+# Entity cache (read-through redis cache of repository lookups by id)
+ENTITY_CACHE_ENABLED = environ.get("ENTITY_CACHE_ENABLED", "false").lower() == "true"
+ENTITY_CACHE_REDIS_URL = environ.get("ENTITY_CACHE_REDIS_URL", FLASK_SESSION_REDIS)
+ENTITY_CACHE_TTL_ORDERS_SEC = int(environ.get("ENTITY_CACHE_TTL_ORDERS_SEC", 300))
+ENTITY_CACHE_TTL_PURCHASE_RECORDS_SEC = int(environ.get("ENTITY_CACHE_TTL_PURCHASE_RECORDS_SEC", 300))
+ENTITY_CACHE_TTL_TRANSACTIONS_SEC = int(environ.get("ENTITY_CACHE_TTL_TRANSACTIONS_SEC", 600))
+ENTITY_CACHE_TTL_WALLET_SEC = int(environ.get("ENTITY_CACHE_TTL_WALLET_SEC", 3600))
+ENTITY_CACHE_TTL_USERS_SEC = int(environ.get("ENTITY_CACHE_TTL_USERS_SEC", 600))
+# How long an invalidated entry refuses fills, longer than a read from mongo to its cache fill
+ENTITY_CACHE_TOMBSTONE_SEC = int(environ.get("ENTITY_CACHE_TOMBSTONE_SEC", 10))
+
+# Archiving of terminal orders with their purchase records and transactions
+ARCHIVE_AFTER_DAYS = int(environ.get("ARCHIVE_AFTER_DAYS", 90))
+ARCHIVE_BATCH_SIZE = int(environ.get("ARCHIVE_BATCH_SIZE", 1000))
+ARCHIVE_MAX_BATCHES_PER_RUN = int(environ.get("ARCHIVE_MAX_BATCHES_PER_RUN", 50))
+ARCHIVE_INTERVAL_SEC = int(environ.get("ARCHIVE_INTERVAL_SEC", 60 * 60))
+
+# Order progression from the purchase_records change stream, the fulfillment retries become a fallback
+ORDER_PROGRESSION_STREAM_ENABLED = environ.get("ORDER_PROGRESSION_STREAM_ENABLED", "false").lower() == "true"
+ORDER_PROGRESSION_FALLBACK_RETRY_SEC = int(environ.get("ORDER_PROGRESSION_FALLBACK_RETRY_SEC", 5 * 60))
+# How long a fulfillment task holds the capture or void of an order, longer than a payment provider call
+ORDER_SETTLEMENT_CLAIM_SEC = int(environ.get("ORDER_SETTLEMENT_CLAIM_SEC", 5 * 60))
+ORDER_PROGRESSION_CHECKPOINT_INTERVAL_SEC = int(environ.get("ORDER_PROGRESSION_CHECKPOINT_INTERVAL_SEC", 10))
+
+# Pricing catalog of the product line items, the bundled catalog when unset
+PRICING_CATALOG_PATH = environ.get("PRICING_CATALOG_PATH")
+# How often the catalog file is checked for changes, 0 disables hot reload
+PRICING_CATALOG_RELOAD_SEC = int(environ.get("PRICING_CATALOG_RELOAD_SEC", 30))
+# Upper bound of the purchase intents of a single /purchase_intent/create_batch request
+PURCHASE_INTENT_BATCH_MAX_SIZE = int(environ.get("PURCHASE_INTENT_BATCH_MAX_SIZE", 100))
 
 # Stripe
 STRIPE_KEY = environ.get("STRIPE_KEY")
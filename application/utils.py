@@ -1,5 +1,9 @@
+import dataclasses
+import functools
 import re
 import time
+import typing
+from typing import Any, Callable, Optional, Tuple, Union
 
 
 def now_in_epoch_sec():
@@ -11,11 +15,57 @@ def _convert_from_camel_to_snake(s: str) -> str:
     return re.sub('([a-z0-9])([A-Z])', r'\1_\2', name).lower()
 
 
+def _allowed_types(hint: Any) -> Optional[Tuple[type, ...]]:
+    """Exact runtime types accepted for a type hint, None when anything goes."""
+    if hint is Any:
+        return None
+    if typing.get_origin(hint) is Union:
+        allowed = ()
+        for arg in typing.get_args(hint):
+            arg_types = _allowed_types(arg)
+            if arg_types is None:
+                return None
+            allowed += arg_types
+        return allowed
+    # Generic containers (List[str], Dict[str, int]) are checked on the container type only
+    origin = typing.get_origin(hint)
+    return (origin if origin is not None else hint,)
+
+
+def _type_name(hint: Any) -> str:
+    return hint.__name__ if isinstance(hint, type) else str(hint).replace('typing.', '')
+
+
+def _type_error(field_name: str, expected_name: str, value: Any) -> TypeError:
+    return TypeError(f"Invalid type for field '{field_name}'. "
+                     f"Expected {expected_name}, got {type(value).__name__}")
+
+
+@functools.lru_cache(maxsize=None)
+def type_validator(cls: type) -> Callable[[Any], None]:
+    """
+    Checks of every dataclass field of `cls`, resolved once (string annotations and Optional
+    included) and generated as straight-line code.
+    """
+    hints = typing.get_type_hints(cls)
+    namespace = {'_type_error': _type_error}
+    lines = ['def validate(obj):']
+    for i, field in enumerate(dataclasses.fields(cls)):
+        allowed = _allowed_types(hints[field.name])
+        if allowed is None:
+            continue
+        namespace[f'_allowed_{i}'] = allowed[0] if len(allowed) == 1 else frozenset(allowed)
+        condition = f'type(value) is not _allowed_{i}' if len(allowed) == 1 else f'type(value) not in _allowed_{i}'
+        lines += [
+            f'    value = obj.{field.name}',
+            f'    if {condition}:',
+            f'        raise _type_error({field.name!r}, {_type_name(hints[field.name])!r}, value)',
+        ]
+    lines.append('    return None')
+    exec('\n'.join(lines), namespace)
+    return namespace['validate']
+
+
 def enforce_type_check(obj):
     """Function to enforce type checking for dataclass fields."""
-    for field_name, field_obj in obj.__dataclass_fields__.items():
-        actual_type = type(getattr(obj, field_name))
-        expected_type = field_obj.type
-        if actual_type != expected_type:
-            raise TypeError(f"Invalid type for field '{field_name}'. "
-                            f"Expected {expected_type.__name__}, got {actual_type.__name__}")
\ No newline at end of file
+    type_validator(type(obj))(obj)
\ No newline at end of file
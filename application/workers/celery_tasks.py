@@ -1,10 +1,18 @@
+import contextlib
+
 from flask import g
 from loguru import logger
 from app import celery_app  # Import your Celery app
 
 from application.controllers.orders.fulfill_order_controller import fulfill_order_controller
 from application.errors import DataNotFound, PaymentContextValidationError, UserActionRequiredError, OrderProcessing, \
-    OrderFulfilled, UnexpectedStatus
+    OrderFulfilled, UnexpectedStatus, ConcurrentModificationError
+from application.repositories.archiver import TerminalDocumentArchiver
+from application.repositories.mongo_repository_base import fresh_reads
+from application.settings import ARCHIVE_MAX_BATCHES_PER_RUN
+
+# Another writer moved the order on, the next attempt only has to re-read it
+CONCURRENT_MODIFICATION_RETRY_COUNTDOWN = 5
 
 ORDER_FULFILLMENT_AUTO_RETRY = [
 
@@ -12,12 +20,14 @@ ORDER_FULFILLMENT_AUTO_RETRY = [
 
 
 @celery_app.task(name='workers.celery_tasks.fulfill_order')
-def fulfill_order(data):
+def fulfill_order(data, after_conflict=False):
     try:
         logger.info("fulfill_order received")
-        fulfill_order_controller.process(
-            order_id=data['order_id']
-        )
+        # A retry after a lost update reads past the caches, which may still hold the losing version
+        with fresh_reads() if after_conflict else contextlib.nullcontext():
+            fulfill_order_controller.process(
+                order_id=data['order_id']
+            )
         logger.info("fulfill_order completed")
     except (DataNotFound, PaymentContextValidationError, UnexpectedStatus) as exc:
         # Permafail
@@ -25,6 +35,16 @@ def fulfill_order(data):
     except OrderProcessing as exc:
         schedule = exc.get_next_schedule()
         raise fulfill_order.retry(exc=exc, countdown=schedule)
+    except ConcurrentModificationError as exc:
+        logger.info("fulfill_order lost a concurrent update", kv={
+            'collection': exc.collection,
+            'ids': exc.ids
+        })
+        raise fulfill_order.retry(
+            exc=exc,
+            countdown=CONCURRENT_MODIFICATION_RETRY_COUNTDOWN,
+            kwargs={'data': data, 'after_conflict': True}
+        )
     except Exception as exc:
         logger.info("fulfill_order failed")
         logger.info(str(exc))
@@ -36,4 +56,11 @@ def force_complete_purchase_record(data):
     logger.info("force_complete_purchase_record received", kv={
         'record_id': data['record_id']
     })
-    return 200
\ No newline at end of file
+    return 200
+
+
+@celery_app.task(name='workers.celery_tasks.archive_terminal_documents')
+def archive_terminal_documents():
+    # Bounded per run, the next scheduled run continues where this one stopped
+    moved = TerminalDocumentArchiver().run(max_batches=ARCHIVE_MAX_BATCHES_PER_RUN)
+    logger.info("archive_terminal_documents completed", kv=moved)
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+Queues the fulfillment of a booked order as soon as the last of its purchase records becomes
+terminal, from a change stream on `purchase_records`. The fulfillment task keeps rescheduling
+itself, but only as a fallback for events this consumer misses.
+
+The resume token is checkpointed in the `change_stream_checkpoints` collection, so a restarted
+consumer continues after the last event it handled. Events are handled at least once: an event
+handled right before a crash is handled again. The queued fulfillment may also run while the
+polling retry of the same order does: the fulfillment claims the order before its payment call,
+so only one of them captures or voids it, and the other finds the order claimed or settled.
+Change streams require a replica set.
+
+Usage:
+    python -m application.workers.order_progression_stream
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from pymongo.errors import OperationFailure
+
+from application.errors import DataNotFound
+from application.models.purchase_record import PurchaseRecord, PURCHASE_RECORD_COMPLETED, PURCHASE_RECORD_FAILED
+from application.repositories.consistency_tiers import WRITE_TIER_FAST, tier_metrics, with_tiers
+from application.repositories.mongo_repository_base import MongoRepositoryBase
+from application.repositories.order_repository import OrderRepository
+from application.repositories.purchase_record_repository import PurchaseRecordRepository
+from application.services.task_queue import TaskQueueService
+from application.settings import ORDER_PROGRESSION_CHECKPOINT_INTERVAL_SEC
+from application.utils import now_in_epoch_sec
+
+TERMINAL_RECORD_STATUSES = [PURCHASE_RECORD_COMPLETED, PURCHASE_RECORD_FAILED]
+# The resume token fell off the oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+MAX_AWAIT_TIME_MS = 1000
+
+
+class OrderProgressionStream(MongoRepositoryBase):
+    name: str = 'order_progression'
+
+    def __init__(self, task_queue: Optional[TaskQueueService] = None) -> None:
+        super().__init__()
+        self.checkpoints = self.db.change_stream_checkpoints
+        self.order_repo = OrderRepository()
+        self.purchase_record_repo = PurchaseRecordRepository()
+        self.task_queue = task_queue or TaskQueueService()
+
+    def pipeline(self) -> List[Dict[str, Any]]:
+        # Status changes to a terminal status only. Record updates only $set the changed fields,
+        # so progress notes and other writes to a terminal record are filtered out by the server.
+        statuses = PurchaseRecord.storage_filter({'status': {'$in': TERMINAL_RECORD_STATUSES}})['status']
+        return [
+            {'$match': {
+                'fullDocument.status': statuses,
+                '$or': [
+                    {'operationType': 'replace'},
+                    {'operationType': 'update', 'updateDescription.updatedFields.status': {'$exists': True}},
+                ]
+            }},
+            {'$project': {'operationType': 1, 'documentKey': 1, 'fullDocument.order_id': 1}},
+        ]
+
+    def load_resume_token(self) -> Optional[Dict[str, Any]]:
+        checkpoint = self.checkpoints.find_one({'_id': self.name})
+        return checkpoint.get('resume_token') if checkpoint else None
+
+    def save_resume_token(self, resume_token: Dict[str, Any]) -> None:
+        # A checkpoint lost in a failover only replays the events after the previous one
+        with tier_metrics.timed('write', WRITE_TIER_FAST):
+            with_tiers(self.checkpoints, write_tier=WRITE_TIER_FAST).update_one(
+                {'_id': self.name},
+                {"$set": {
+                    'resume_token': resume_token,
+                    'updated_at': now_in_epoch_sec()
+                }},
+                upsert=True
+            )
+
+    def clear_resume_token(self) -> None:
+        self.checkpoints.delete_one({'_id': self.name})
+
+    def handle_change(self, change: Dict[str, Any]) -> bool:
+        """Queues the owning order's fulfillment when all of its records are terminal."""
+        order_id = (change.get('fullDocument') or {}).get('order_id')
+        if not order_id:
+            return False
+        try:
+            order = self.order_repo.get_by_order_id(order_id=order_id, projection=['status', 'purchase_record_ids'])
+            records = self.purchase_record_repo.get_many(
+                record_ids=order.purchase_record_ids,
+                projection=['status']
+            ).found_or_raise()
+        except DataNotFound:
+            logger.info("Order progression skipped, order or records not found", kv={
+                'order_id': order_id,
+                'record_id': change['documentKey']['_id']
+            })
+            return False
+
+        if not order.is_booked() or not all(record.is_terminal() for record in records):
+            return False
+
+        logger.info("Order progression queued fulfillment", kv={
+            'order_id': order_id,
+            'record_ids': [record.record_id for record in records],
+        })
+        self.task_queue.queue_order_fulfillment(payload={'order_id': order_id}, delay=0)
+        return True
+
+    def run(self) -> None:
+        while True:
+            resume_token = self.load_resume_token()
+            try:
+                self._consume(resume_token)
+            except OperationFailure as exc:
+                if exc.code != CHANGE_STREAM_HISTORY_LOST:
+                    raise
+                # Orders completed in the gap are picked up by the fulfillment retries
+                logger.warning("Order progression resume token expired, restarting from now", kv={
+                    'resume_token': resume_token
+                })
+                self.clear_resume_token()
+
+    def _consume(self, resume_token: Optional[Dict[str, Any]]) -> None:
+        logger.info("Order progression stream started", kv={'resumed': resume_token is not None})
+        with self.db.purchase_records.watch(
+                self.pipeline(),
+                full_document='updateLookup',
+                resume_after=resume_token,
+                max_await_time_ms=MAX_AWAIT_TIME_MS
+        ) as stream:
+            saved_token, saved_at = resume_token, time.monotonic()
+            while stream.alive:
+                change = stream.try_next()
+                if change is not None:
+                    self.handle_change(change)
+                # The token also moves on while idle, checkpoint it now and then so a restart
+                # does not have to skip over the filtered events again
+                elapsed = time.monotonic() - saved_at
+                if stream.resume_token != saved_token and (
+                        change is not None or elapsed >= ORDER_PROGRESSION_CHECKPOINT_INTERVAL_SEC):
+                    self.save_resume_token(stream.resume_token)
+                    saved_token, saved_at = stream.resume_token, time.monotonic()
+
+
+def main() -> None:
+    OrderProgressionStream().run()
+
+
+if __name__ == '__main__':
+    main()
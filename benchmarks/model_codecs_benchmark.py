@@ -0,0 +1,94 @@
+"""
+Mongo document encode / decode of realistic orders: dataclasses.asdict and keyword filtering
+against the codecs generated by @compiled_codecs.
+
+Usage:
+    python -m benchmarks.model_codecs_benchmark [--number 20000]
+"""
+import argparse
+import timeit
+from dataclasses import asdict, fields
+
+from application.models.money import Money
+from application.models.order import Order, Invoice, LineItem, INVOICE_TYPE_INCOMING, INVOICE_TYPE_OUTGOING
+
+
+def realistic_order() -> Order:
+    def line_item(code: str, amount: int, li_type: str) -> LineItem:
+        return LineItem(
+            product_code=code,
+            product_name=code.replace('_', ' ').title(),
+            amount=Money(amount=amount, currency='USD', exponent=2),
+            type=li_type,
+            description=f'{code} line item',
+        )
+
+    incoming_items = [
+        line_item('video_face_swap', 1500, 'base-product'),
+        line_item('face_enhancer', 300, 'add-on-product'),
+        line_item('expedited', 500, 'add-on-product'),
+        line_item('sales_tax', 184, 'sales-tax'),
+    ]
+    return Order(
+        order_id='order_01HZX3Q9W6',
+        user_id='user_01HZX3Q9W6',
+        entity='PrivatEdit',
+        status='BOOKED',
+        created_at=1718000000,
+        updated_at=1718000042,
+        purchase_record_ids=['record_01HZX3Q9W6', 'record_01HZX3Q9W7'],
+        incoming_invoice=Invoice(
+            invoice_name='Purchase',
+            counterparty='user_01HZX3Q9W6',
+            type=INVOICE_TYPE_INCOMING,
+            status='PENDING',
+            amount=Money(amount=2484, currency='USD', exponent=2),
+            line_items=incoming_items,
+            instrument_id='instrument_01HZX3Q9W6',
+            parent_transaction_id='txn_01HZX3Q9W6',
+        ),
+        outgoing_invoice=Invoice(
+            invoice_name='Payout',
+            counterparty='PrivatEdit',
+            type=INVOICE_TYPE_OUTGOING,
+            status='CREATED',
+            amount=Money(amount=1800, currency='USD', exponent=2),
+            line_items=[line_item('user_purchases', 1800, 'user-purchases')],
+        ),
+        version=3,
+    )
+
+
+def encode_with_asdict(order: Order) -> dict:
+    document = asdict(order)
+    document['_id'] = order.get_id()
+    return document
+
+
+def decode_with_kwargs(document: dict) -> Order:
+    return Order(**{k: v for k, v in document.items() if k in {f.name for f in fields(Order)}})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the compiled model codecs')
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    order = realistic_order()
+    document = order.to_mongo_document()
+    assert document == encode_with_asdict(order)
+    assert Order.from_mongo_document(document) == decode_with_kwargs(document)
+
+    cases = [
+        ('encode', lambda: encode_with_asdict(order), order.to_mongo_document),
+        ('decode', lambda: decode_with_kwargs(document), lambda: Order.from_mongo_document(document)),
+    ]
+    for name, baseline, compiled in cases:
+        baseline_us = min(timeit.repeat(baseline, number=args.number, repeat=5)) / args.number * 1e6
+        compiled_us = min(timeit.repeat(compiled, number=args.number, repeat=5)) / args.number * 1e6
+        print(f'{name}: asdict/kwargs {baseline_us:.2f}us  compiled {compiled_us:.2f}us  '
+              f'speedup {baseline_us / compiled_us:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
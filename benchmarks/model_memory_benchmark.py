@@ -0,0 +1,72 @@
+"""
+Memory held by 10k hydrated orders: the slotted models against the same dataclasses with a
+per-instance __dict__, as the models were declared before.
+
+Usage:
+    python -m benchmarks.model_memory_benchmark [--count 10000]
+"""
+import argparse
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from typing import Any, Callable, Dict, List
+
+from application.models.money import Money
+from application.models.order import Order, Invoice, LineItem
+from benchmarks.model_codecs_benchmark import realistic_order
+
+
+def _unslotted(cls: type) -> type:
+    return make_dataclass(f'Dict{cls.__name__}', [(f.name, Any, f) for f in fields(cls)])
+
+
+DictMoney, DictLineItem, DictInvoice, DictOrder = (_unslotted(cls) for cls in (Money, LineItem, Invoice, Order))
+
+
+def _dict_invoice(document: Dict[str, Any]) -> Any:
+    if document is None:
+        return None
+    return DictInvoice(**{
+        **document,
+        'amount': DictMoney(**document['amount']),
+        'line_items': [
+            DictLineItem(**{**item, 'amount': DictMoney(**item['amount'])}) for item in document['line_items']
+        ],
+    })
+
+
+def hydrate_with_dict(document: Dict[str, Any]) -> Any:
+    return DictOrder(**{
+        **{k: v for k, v in document.items() if k != '_id'},
+        'incoming_invoice': _dict_invoice(document['incoming_invoice']),
+        'outgoing_invoice': _dict_invoice(document['outgoing_invoice']),
+        'refunding_invoice': _dict_invoice(document['refunding_invoice']),
+    })
+
+
+def retained_bytes(documents: List[Dict[str, Any]], hydrate: Callable[[Dict[str, Any]], Any]) -> int:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        orders = [hydrate(document) for document in documents]
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert len(orders) == len(documents)
+    return retained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the memory of hydrated orders')
+    parser.add_argument('--count', type=int, default=10000)
+    args = parser.parse_args()
+
+    # Distinct documents, so no two orders share their nested values
+    documents = [realistic_order().to_mongo_document() for _ in range(args.count)]
+    with_dict = retained_bytes(documents, hydrate_with_dict)
+    slotted = retained_bytes(documents, Order.from_mongo_document)
+    print(f'{args.count} orders: __dict__ {with_dict:,} bytes  slots {slotted:,} bytes  '
+          f'saved {1 - slotted / with_dict:.0%}')
+
+
+if __name__ == '__main__':
+    main()
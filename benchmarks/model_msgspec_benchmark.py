@@ -0,0 +1,43 @@
+"""
+Round trip of realistic orders through the model codec backends: dataclasses.asdict with keyword
+filtering, the generated codecs, and msgspec decoding. Also JSON payload -> Order, through
+json.loads or natively through msgspec.
+
+Usage:
+    python -m benchmarks.model_msgspec_benchmark [--number 20000]
+"""
+import argparse
+import json
+import timeit
+
+from application.models.model_codecs import compile_decoder, msgspec_decoder, decode_json
+from application.models.order import Order
+from benchmarks.model_codecs_benchmark import realistic_order, encode_with_asdict, decode_with_kwargs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the msgspec model codec backend')
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    order = realistic_order()
+    compiled_decode = compile_decoder(Order)
+    msgspec_decode = msgspec_decoder(Order)
+    payload = json.dumps(order.to_mongo_document())
+    assert msgspec_decode(order.to_mongo_document()) == compiled_decode(order.to_mongo_document()) == order
+    assert decode_json(Order, payload) == order
+
+    cases = [
+        ('round trip, asdict/kwargs', lambda: decode_with_kwargs(encode_with_asdict(order))),
+        ('round trip, compiled', lambda: compiled_decode(order.to_mongo_document())),
+        ('round trip, msgspec', lambda: msgspec_decode(order.to_mongo_document())),
+        ('json, json.loads/compiled', lambda: compiled_decode(json.loads(payload))),
+        ('json, msgspec', lambda: decode_json(Order, payload)),
+    ]
+    for name, case in cases:
+        elapsed_us = min(timeit.repeat(case, number=args.number, repeat=5)) / args.number * 1e6
+        print(f'{name}: {elapsed_us:.2f}us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Hydration of product details with the type check of StrictTypeModels: the per-instance walk of
+__dataclass_fields__ it replaced, the validator cached per class, and trusted mongo data that
+skips the check.
+
+Usage:
+    python -m benchmarks.product_details_validation_benchmark [--count 100000]
+"""
+import argparse
+import time
+from typing import Any, Callable
+
+from application.models.models_utility import trusted_data
+from application.models.product import SwapWebAppProductDetails
+
+DOCUMENT = {
+    'mode': 'video',
+    'source_file': 'uploads/source.png',
+    'target_file': 'uploads/target.mp4',
+    'output_file': 'outputs/output.mp4',
+    'face_enhancer': True,
+    'quality': 'high',
+    'expedited': False,
+    'source_file_size': 1048576,
+    'target_file_size': 52428800,
+}
+
+
+def uncached_type_check(obj: Any) -> None:
+    for field_name, field_obj in obj.__dataclass_fields__.items():
+        actual_type = type(getattr(obj, field_name))
+        if actual_type != field_obj.type:
+            raise TypeError(f"Invalid type for field '{field_name}'")
+
+
+def timed(count: int, hydrate: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        hydrate()
+    return time.perf_counter() - start
+
+
+def hydrate_trusted(count: int, type_check: Callable[[Any], None] = lambda details: None) -> float:
+    # The built in check is off, `type_check` runs in its place
+    with trusted_data():
+        return timed(count, lambda: type_check(SwapWebAppProductDetails(**DOCUMENT)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the product details type check')
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args()
+
+    results = [
+        ('uncached check', hydrate_trusted(args.count, uncached_type_check)),
+        ('cached validator', timed(args.count, lambda: SwapWebAppProductDetails(**DOCUMENT))),
+        ('trusted, no check', hydrate_trusted(args.count)),
+    ]
+    for name, elapsed in results:
+        print(f'{args.count} product details, {name}: {elapsed * 1000:.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
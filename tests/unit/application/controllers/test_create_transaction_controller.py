@@ -0,0 +1,36 @@
+import pytest
+from flask import Flask
+
+from application.controllers.transactions.create_transaction_controller import CreateAuthController
+from application.models.transactions import TRANSACTION_STATUS_COMPLETED
+from application.repositories.mongo_client_registry import mongo_client_registry
+from application.repositories.transaction_repository import TransactionRepository
+from application.repositories.unit_of_work import unit_of_work
+from tests.objects.transaction import generate_mock_auth_transaction_object
+
+
+class ChargingProvider:
+
+    def create_auth(self, txn, instrument=None):
+        txn.status = TRANSACTION_STATUS_COMPLETED
+        txn.provider_transaction_id = 'pi_123'
+        return txn
+
+
+def test_provider_outcome_survives_a_later_failure_of_the_unit_of_work(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    monkeypatch.setitem(CreateAuthController.PROVIDER_MAPPING, 'stripe', ChargingProvider())
+    mongo_client_registry.close()
+    try:
+        txn = generate_mock_auth_transaction_object()
+        txn.instrument_id = None
+        with Flask(__name__).app_context():
+            with pytest.raises(RuntimeError):
+                with unit_of_work():
+                    CreateAuthController().process(txn=txn)
+                    raise RuntimeError('failure after the charge')
+
+        stored = TransactionRepository().get_by_transaction_id(transaction_id=txn.transaction_id)
+        assert (stored.status, stored.provider_transaction_id) == (TRANSACTION_STATUS_COMPLETED, 'pi_123')
+    finally:
+        mongo_client_registry.close()
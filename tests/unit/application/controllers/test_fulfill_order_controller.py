@@ -0,0 +1,88 @@
+import pytest
+from flask import Flask
+
+from application.controllers.orders.fulfill_order_controller import FulfillOrderController
+from application.controllers.orders.order_base_controller import ORDER_PAYMENT_PROJECTION
+from application.errors import ConcurrentModificationError, OrderProcessing
+from application.models.order import Order, ORDER_STATUS_BOOKED
+from application.models.product import SwapWebAppProductDetails
+from application.models.purchase_record import PurchaseRecord, PURCHASE_RECORD_COMPLETED
+from application.models.transactions import TRANSACTION_STATUS_PROCESSING
+from application.repositories.mongo_client_registry import mongo_client_registry
+from application.repositories.order_repository import OrderRepository
+from application.repositories.purchase_record_repository import PurchaseRecordRepository
+from application.utils import now_in_epoch_sec
+from tests.objects.order import generate_mock_invoice
+
+
+class CapturingController:
+
+    def __init__(self, captures, during_capture=None):
+        self.captures = captures
+        self.during_capture = during_capture
+
+    def process(self, txn):
+        self.captures.append(txn)
+        if self.during_capture:
+            self.during_capture()
+        txn.status = TRANSACTION_STATUS_PROCESSING
+        return txn
+
+
+def _booked_order(order_id: str) -> None:
+    PurchaseRecordRepository().create_record(PurchaseRecord(
+        record_id=f'{order_id}_r',
+        created_at=1,
+        last_updated_at=1,
+        entity='FaceSwapApp',
+        status=PURCHASE_RECORD_COMPLETED,
+        attempt_count=1,
+        product_details=SwapWebAppProductDetails(
+            mode='video', source_file='s', target_file='t', output_file='o',
+            face_enhancer=False, quality='low', expedited=False, source_file_size=1
+        ),
+        line_items=[],
+        progress_note=[],
+        order_id=order_id,
+    ))
+    OrderRepository().create_order(Order(
+        order_id=order_id,
+        user_id='u1',
+        entity='entity',
+        status=ORDER_STATUS_BOOKED,
+        created_at=now_in_epoch_sec(),
+        updated_at=now_in_epoch_sec(),
+        purchase_record_ids=[f'{order_id}_r'],
+        incoming_invoice=generate_mock_invoice(),
+    ))
+
+
+def test_concurrent_fulfillments_capture_an_order_once(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    mongo_client_registry.close()
+    try:
+        _booked_order('o1')
+        captures = []
+        polling, queued = FulfillOrderController(), FulfillOrderController()
+
+        def queued_fulfillment():
+            # Runs while the polling task is at the provider, in a task of its own
+            with Flask(__name__).app_context():
+                with pytest.raises(OrderProcessing):
+                    queued.process(order_id='o1')
+
+        polling.capture_auth_controller = CapturingController(captures, during_capture=queued_fulfillment)
+        queued.capture_auth_controller = CapturingController(captures)
+        with Flask(__name__).app_context():
+            with pytest.raises(OrderProcessing):
+                polling.process(order_id='o1')
+        assert len(captures) == 1
+
+        # Tasks that loaded the same version: the compare-and-swap lets only the first claim it
+        _booked_order('o2')
+        first, second = [OrderRepository().get_by_order_id('o2', projection=ORDER_PAYMENT_PROJECTION) for _ in '12']
+        polling.claim_settlement(order=first)
+        with pytest.raises(ConcurrentModificationError):
+            polling.claim_settlement(order=second)
+    finally:
+        mongo_client_registry.close()
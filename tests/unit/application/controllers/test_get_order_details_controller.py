@@ -0,0 +1,76 @@
+import pytest
+
+from application.controllers.orders.get_order_details_controller import GetOrderDetailsController
+from application.errors import DataNotFound
+from application.models.order import Order
+from application.models.product import SwapWebAppProductDetails
+from application.models.purchase_record import PurchaseRecord
+from application.repositories.aio.async_order_repository import AsyncOrderRepository
+from application.repositories.aio.async_purchase_record_repository import AsyncPurchaseRecordRepository
+from application.repositories.aio.async_transaction_repository import AsyncTransactionRepository
+from application.repositories.aio.event_loop import EventLoopThread
+from application.repositories.mongo_client_registry import mongo_client_registry
+from application.repositories.order_repository import OrderRepository
+from application.repositories.purchase_record_repository import PurchaseRecordRepository
+from application.repositories.transaction_repository import TransactionRepository
+from tests.objects.order import generate_mock_invoice
+from tests.objects.transaction import generate_mock_auth_transaction_object
+
+
+def _record(record_id: str) -> PurchaseRecord:
+    return PurchaseRecord(
+        record_id=record_id,
+        created_at=1,
+        last_updated_at=1,
+        entity='FaceSwapApp',
+        status='CREATED',
+        attempt_count=1,
+        product_details=SwapWebAppProductDetails(
+            mode='video', source_file='s', target_file='t', output_file='o',
+            face_enhancer=False, quality='low', expedited=False, source_file_size=1
+        ),
+        line_items=[],
+        progress_note=[],
+        user_id='u1',
+        order_id='o1',
+    )
+
+
+async def _get_order_details(request: dict) -> dict:
+    controller = GetOrderDetailsController(
+        order_repo=AsyncOrderRepository(),
+        purchase_record_repo=AsyncPurchaseRecordRepository(),
+        txn_repo=AsyncTransactionRepository()
+    )
+    return await controller.process(request)
+
+
+def test_order_details_read_the_order_records_and_transaction(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    monkeypatch.setattr('application.repositories.aio.async_mongo_client_registry.MONGODB_BACKEND', 'memory')
+    mongo_client_registry.close()
+    loop_thread = EventLoopThread()
+    try:
+        transaction = TransactionRepository().create_record(generate_mock_auth_transaction_object())
+        PurchaseRecordRepository().create_records([_record('r0'), _record('r1')])
+        OrderRepository().create_order(Order(
+            order_id='o1',
+            user_id='u1',
+            entity='entity',
+            status='CREATED',
+            created_at=1,
+            updated_at=1,
+            purchase_record_ids=['r0', 'r1'],
+            incoming_invoice=generate_mock_invoice(parent_transaction_id=transaction.transaction_id),
+        ))
+
+        details = loop_thread.run(_get_order_details({'user_id': 'u1', 'order_id': 'o1'}))
+        assert details['order']['order_id'] == 'o1'
+        assert [record['record_id'] for record in details['purchase_records']] == ['r0', 'r1']
+        assert details['transaction']['transaction_id'] == transaction.transaction_id
+
+        with pytest.raises(DataNotFound):
+            loop_thread.run(_get_order_details({'user_id': 'u2', 'order_id': 'o1'}))
+    finally:
+        loop_thread.stop()
+        mongo_client_registry.close()
\ No newline at end of file
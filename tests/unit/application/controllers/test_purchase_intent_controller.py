@@ -0,0 +1,79 @@
+import pytest
+
+from application.controllers.purchase_intent_controller import PurchaseIntentController
+from application.errors import ValidationError
+from application.repositories.mongo_client_registry import mongo_client_registry
+from application.repositories.purchase_record_repository import PurchaseRecordRepository
+
+
+class FakeSpaces:
+
+    def __init__(self):
+        self.signed = []
+
+    def generate_pre_signed_url(self, file_key: str) -> str:
+        self.signed.append(file_key)
+        return f'https://spaces{file_key}'
+
+
+def _intent(mode: str) -> dict:
+    return {
+        'entity': 'FaceSwapApp',
+        'description': 'swap',
+        'product_details': {
+            'mode': mode,
+            'quality': 'medium',
+            'face_enhancer': False,
+            'expedited': False,
+            'input_file': {'file_size': 10},
+            'target_file': {'file_size': 20},
+        }
+    }
+
+
+def test_create_batch_inserts_priced_intents_and_reports_failed_ones(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    mongo_client_registry.close()
+    try:
+        repo = PurchaseRecordRepository()
+        controller = PurchaseIntentController(digitalocean_spaces=FakeSpaces(), purchase_record_repo=repo)
+
+        response = controller.create_batch(
+            request={'purchase_intents': [_intent('video'), _intent('audio'), {'entity': 'FaceSwapApp'}]}
+        )
+
+        assert (response['created'], response['failed']) == (1, 2)
+        created, unknown_mode, malformed = response['results']
+        assert created['result']['offer']['total_price']['amount'] == 110
+        assert created['result']['storage_provider_urls']['source_file'].startswith('https://spaces/sources/')
+        assert repo.get_by_id(created['result']['record_id']).line_items[0].product_code == 'video_face_swap'
+        assert unknown_mode['error_details']['error_type'] == 'pricing_generation_error'
+        assert malformed['error_details']['error_type'] == 'validation_error'
+
+        with pytest.raises(ValidationError):
+            controller.create_batch(request={'purchase_intents': []})
+    finally:
+        mongo_client_registry.close()
+
+
+def test_create_batch_reports_records_the_insert_rejects(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    mongo_client_registry.close()
+    record_ids = iter(['r1', 'taken', 'r3'])
+    monkeypatch.setattr('application.controllers.purchase_intent_controller.shortuuid.uuid', lambda: next(record_ids))
+    try:
+        repo = PurchaseRecordRepository()
+        repo.purchase_records_collection.insert_one({'_id': 'taken', 'record_id': 'taken'})
+        spaces = FakeSpaces()
+        controller = PurchaseIntentController(digitalocean_spaces=spaces, purchase_record_repo=repo)
+
+        response = controller.create_batch(request={'purchase_intents': [_intent('video')] * 3})
+
+        assert (response['created'], response['failed']) == (2, 1)
+        first, duplicate, third = response['results']
+        assert (first['result']['record_id'], third['result']['record_id']) == ('r1', 'r3')
+        assert duplicate['error_details']['error_type'] == 'data_already_exists'
+        assert repo.get_many(['r1', 'r3']).missing_ids == []
+        assert not any('taken' in file_key for file_key in spaces.signed)
+    finally:
+        mongo_client_registry.close()
\ No newline at end of file
@@ -0,0 +1,51 @@
+import bson
+
+import application.models.models_utility as models_utility
+from application.models.compact_storage import COMPACT_MARKER
+from application.models.order import Order, ORDER_COMPACT_SCHEMA
+from tests.objects.order import generate_mock_invoice
+
+
+def _order() -> Order:
+    return Order(
+        order_id='order_id',
+        user_id='user_id',
+        entity='entity',
+        status='BOOKED',
+        created_at=1,
+        updated_at=2,
+        purchase_record_ids=['r1'],
+        incoming_invoice=generate_mock_invoice(),
+    )
+
+
+def test_compact_documents_round_trip_and_keep_their_form(monkeypatch):
+    legacy = _order().to_mongo_document()
+    monkeypatch.setattr(models_utility, 'COMPACT_STORAGE_ENABLED', True)
+    compact = _order().to_mongo_document()
+
+    assert compact[COMPACT_MARKER] == 1
+    assert compact['status'] == 1
+    assert len(bson.encode(compact)) < len(bson.encode(legacy))
+    assert Order.from_mongo_document(compact) == Order.from_mongo_document(legacy) == _order()
+
+    # Models are written back in the form they were loaded from
+    assert Order.from_mongo_document(compact).storage_guard() == {COMPACT_MARKER: 1}
+    loaded_legacy = Order.from_mongo_document(legacy)
+    assert loaded_legacy.storage_guard() == {COMPACT_MARKER: {'$exists': False}}
+    assert loaded_legacy.to_mongo_document() == legacy
+
+
+def test_compact_schema_queries_and_updates():
+    assert Order.storage_filter({'user_id': 'u1', 'status': 'BOOKED'}) == {
+        'user_id': 'u1', 'status': {'$in': ['BOOKED', 1]}
+    }
+    assert Order.storage_filter({'status': {'$in': ['COMPLETED', 'FAILED']}}) == {
+        'status': {'$in': ['COMPLETED', 3, 'FAILED', 4]}
+    }
+    assert ORDER_COMPACT_SCHEMA.update({'incoming_invoice.status': 'COMPLETED', 'entity': 'e'}) == {
+        'incoming_invoice.s': 2, 'en': 'e'
+    }
+    assert ORDER_COMPACT_SCHEMA.projection_paths(['incoming_invoice.amount.amount']) == [
+        'incoming_invoice.amount.amount', 'incoming_invoice.a.a', COMPACT_MARKER
+    ]
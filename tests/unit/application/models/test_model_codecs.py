@@ -0,0 +1,75 @@
+import json
+from dataclasses import asdict
+
+import msgspec
+import pytest
+
+from application.models.instrument import Instrument, ProviderToken
+from application.models.model_codecs import compile_decoder, msgspec_decoder, decode_json
+from application.models.order import Order
+from application.models.user import User
+from tests.objects.order import generate_mock_invoice
+
+
+def test_compiled_codecs_match_asdict_and_round_trip():
+    order = Order(
+        order_id='order_id',
+        user_id='user_id',
+        entity='entity',
+        status='BOOKED',
+        created_at=1,
+        updated_at=2,
+        purchase_record_ids=['r1', 'r2'],
+        incoming_invoice=generate_mock_invoice(),
+        refunding_invoice=generate_mock_invoice(),
+    )
+    instrument = Instrument(
+        instrument_id='instrument_id',
+        user_id='user_id',
+        usage='payin',
+        payment_method='card',
+        tokens=[ProviderToken(token='token', provider='stripe')],
+    )
+    for model in [order, instrument]:
+        document = model.to_mongo_document()
+        assert document == {**asdict(model), '_id': model.get_id()}
+        assert type(model).from_mongo_document(document) == model
+
+
+def test_compiled_encoder_does_not_share_mutable_values():
+    user = User(user_id='u1', username='u1', preferences={'theme': {'dark': True}}, login_method='PASSWORD')
+    document = user.to_mongo_document()
+    user.preferences['theme']['dark'] = False
+    assert document['preferences'] == {'theme': {'dark': True}}
+
+    instrument = Instrument(
+        instrument_id='instrument_id',
+        user_id='user_id',
+        usage='payin',
+        payment_method='card',
+        tokens=[ProviderToken(token='token', provider='stripe')],
+    )
+    document = instrument.to_mongo_document()
+    instrument.tokens.append(ProviderToken(token='token_2', provider='stripe'))
+    instrument.tokens[0].customer_id = 'customer_id'
+    assert document['tokens'] == [{'token': 'token', 'provider': 'stripe', 'customer_id': None}]
+
+
+def test_msgspec_decoder_matches_compiled_and_validates():
+    order = Order(
+        order_id='order_id',
+        user_id='user_id',
+        entity='entity',
+        status='BOOKED',
+        created_at=1,
+        updated_at=2,
+        purchase_record_ids=['r1'],
+        incoming_invoice=generate_mock_invoice(),
+    )
+    document = order.to_mongo_document()
+    assert msgspec_decoder(Order)(document) == compile_decoder(Order)(document) == order
+    assert decode_json(Order, json.dumps(document)) == order
+
+    document['incoming_invoice']['amount']['amount'] = 'not an int'
+    with pytest.raises(msgspec.ValidationError):
+        msgspec_decoder(Order)(document)
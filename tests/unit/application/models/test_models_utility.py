@@ -0,0 +1,117 @@
+import pickle
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from application.errors import PartialModelWriteError
+from application.models.models_utility import parse_projection, diff_documents, trusted_data
+from application.models.order import Order
+from application.models.product import SwapWebAppProductDetails
+from tests.objects.order import generate_mock_invoice
+
+
+def generate_order_document():
+    return Order(
+        order_id='test_order_id',
+        user_id='test_user_id',
+        entity='test_entity',
+        status='CREATED',
+        created_at=1,
+        updated_at=1,
+        purchase_record_ids=['test_record_id'],
+        incoming_invoice=generate_mock_invoice(),
+    ).to_mongo_document()
+
+
+def test_parse_projection_whole_path_absorbs_sub_paths():
+    assert parse_projection(['incoming_invoice.status', 'incoming_invoice', 'status']) == {
+        'incoming_invoice': True,
+        'status': True,
+    }
+
+
+def test_partial_update_only_sets_loaded_paths():
+    order = Order.from_partial_mongo_document(
+        generate_order_document(),
+        ['order_id', 'status', 'incoming_invoice.status']
+    )
+    order.on_auth_success()
+
+    assert order.to_partial_update() == {
+        'order_id': 'test_order_id',
+        'status': 'BOOKED',
+        'incoming_invoice.status': 'PENDING',
+    }
+
+
+def test_partial_write_of_unloaded_field_is_rejected():
+    order = Order.from_partial_mongo_document(generate_order_document(), ['order_id', 'status'])
+    order.entity = 'other_entity'
+
+    with pytest.raises(PartialModelWriteError):
+        order.to_partial_update()
+    with pytest.raises(PartialModelWriteError):
+        order.to_mongo_document()
+
+
+def test_diff_documents_emits_nested_set_and_push():
+    old = {'status': 'CREATED', 'invoice': {'status': 'CREATED', 'amount': 10}, 'notes': ['a'], 'errors': {'a': 1}}
+    new = {'status': 'BOOKED', 'invoice': {'status': 'PENDING', 'amount': 10}, 'notes': ['a', 'b'], 'errors': {}}
+
+    assert diff_documents(old, new) == {
+        '$set': {'status': 'BOOKED', 'invoice.status': 'PENDING', 'errors': {}},
+        '$push': {'notes': {'$each': ['b']}},
+    }
+
+
+def test_to_mongo_update_only_sends_changes_since_persisted():
+    order = Order(**Order.get_kwargs_from_mongo_document(generate_order_document()))
+    assert order.to_mongo_update() == {'$set': order.to_mongo_document()}
+
+    order.mark_persisted()
+    order.on_auth_success()
+    order.purchase_record_ids.append('other_record_id')
+
+    assert order.to_mongo_update() == {
+        '$set': {'status': 'BOOKED', 'incoming_invoice.status': 'PENDING'},
+        '$push': {'purchase_record_ids': {'$each': ['other_record_id']}},
+    }
+
+
+def test_loaded_version_of_partial_models():
+    document = generate_order_document()
+    del document['version']
+
+    legacy = Order.from_partial_mongo_document(document, ['status', 'version'])
+    assert legacy.is_versioned()
+    assert legacy.loaded_version() == 0
+
+    without_version = Order.from_partial_mongo_document(document, ['status'])
+    with pytest.raises(PartialModelWriteError):
+        without_version.loaded_version()
+
+
+def test_slotted_models_pickle_with_their_snapshot():
+    order = Order.from_mongo_document(generate_order_document())
+    order.mark_persisted()
+    assert not hasattr(order, '__dict__')
+
+    restored = pickle.loads(pickle.dumps(order))
+    assert restored == order
+    restored.status = 'BOOKED'
+    assert restored.to_mongo_update() == {'$set': {'status': 'BOOKED'}}
+
+    with pytest.raises(FrozenInstanceError):
+        restored.incoming_invoice.amount.amount = 0
+
+
+def test_strict_models_type_check_unless_trusted():
+    details = {
+        'mode': 'image', 'source_file': 's', 'target_file': 't', 'output_file': 'o',
+        'face_enhancer': False, 'quality': 'low', 'expedited': False, 'source_file_size': '10',
+    }
+    with pytest.raises(TypeError, match="Invalid type for field 'source_file_size'. Expected int, got str"):
+        SwapWebAppProductDetails(**details)
+
+    with trusted_data():
+        assert SwapWebAppProductDetails(**details).source_file_size == '10'
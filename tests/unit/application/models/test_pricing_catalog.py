@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from application.errors import ContextValidationError
+from application.models.money import Money
+from application.models.pricing_catalog import PricingCatalog, BUNDLED_CATALOG_PATH
+
+
+def test_catalog_quotes_shared_line_items():
+    catalog = PricingCatalog(path=None, reload_interval_sec=0)
+
+    line_items = catalog.quote('vr', 'high', True)
+    assert [li.description for li in line_items] == [
+        'AI VR generation for faceswap', 'High quality', 'AI VR generation for faceswap'
+    ]
+    assert [li.amount for li in line_items] == [Money(200, 'USD', 2), Money(20, 'USD', 2), Money(20, 'USD', 2)]
+    assert [li.product_code for li in catalog.quote('image', 'low', False)] == ['image_face_swap']
+    assert catalog.quote('vr', 'high', True) is line_items
+
+    with pytest.raises(ContextValidationError, match='product type'):
+        catalog.quote('audio', 'low', False)
+    with pytest.raises(ContextValidationError, match='product quality'):
+        catalog.quote('image', 'ultra', False)
+
+
+def test_catalog_reload_swaps_or_keeps_the_catalog(tmp_path):
+    with open(BUNDLED_CATALOG_PATH) as f:
+        document = json.load(f)
+    path = tmp_path / 'catalog.json'
+    path.write_text(json.dumps(document))
+    catalog = PricingCatalog(path=str(path), reload_interval_sec=0)
+
+    document['version'] = 'next'
+    document['modes']['video']['amount']['amount'] = 150
+    path.write_text(json.dumps(document))
+    assert catalog.reload()
+    assert catalog.version == 'next'
+    assert catalog.quote('video', 'low', False)[0].amount.amount == 150
+
+    path.write_text('{"version": "broken"}')
+    assert not catalog.reload()
+    assert catalog.version == 'next'
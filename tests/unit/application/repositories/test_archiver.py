@@ -0,0 +1,105 @@
+from application.models.order import Order
+from application.models.transactions import TRANSACTION_STATUS_COMPLETED
+from application.repositories.archiver import TerminalDocumentArchiver
+from application.repositories.mongo_client_registry import mongo_client_registry
+from application.repositories.order_repository import OrderRepository
+from application.repositories.transaction_repository import TransactionRepository
+from tests.objects.order import generate_mock_invoice
+from tests.objects.transaction import generate_mock_auth_transaction_object
+
+
+def _order(order_id: str, status: str, updated_at: int) -> Order:
+    return Order(
+        order_id=order_id,
+        user_id='u1',
+        entity='entity',
+        status=status,
+        created_at=updated_at,
+        updated_at=updated_at,
+        purchase_record_ids=[],
+        incoming_invoice=generate_mock_invoice(),
+    )
+
+
+def test_terminal_orders_are_archived_and_restored_on_write(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    mongo_client_registry.close()
+    try:
+        repo = OrderRepository()
+        repo.create_order(_order('old_completed', 'COMPLETED', updated_at=1))
+        repo.create_order(_order('old_booked', 'BOOKED', updated_at=1))
+
+        moved = TerminalDocumentArchiver(batch_size=10, archive_after_days=1).run(max_batches=5)
+        assert moved['orders'] == 1
+        assert repo.db.orders.find_one({'_id': 'old_completed'}) is None
+
+        order = OrderRepository().get_by_order_id('old_completed')
+        assert [o.order_id for o in repo.get_many(['old_completed', 'old_booked']).found] == \
+            ['old_completed', 'old_booked']
+
+        order.status = 'FAILED'
+        repo.update_order(order)
+        assert repo.db.orders.find_one({'_id': 'old_completed'})['status'] == 'FAILED'
+        assert repo.db.orders_archive.find_one({'_id': 'old_completed'}) is None
+    finally:
+        mongo_client_registry.close()
+
+def test_listings_include_archived_orders(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    mongo_client_registry.close()
+    try:
+        repo = OrderRepository()
+        repo.create_order(_order('old_completed', 'COMPLETED', updated_at=1))
+        repo.create_order(_order('old_failed', 'FAILED', updated_at=2))
+        repo.create_order(_order('old_booked', 'BOOKED', updated_at=3))
+        TerminalDocumentArchiver(batch_size=10, archive_after_days=1).run(max_batches=5)
+        assert repo.db.orders.count_documents({}) == 1
+
+        first = repo.page_by_user_id('u1', page_size=2)
+        second = repo.page_by_user_id('u1', page_size=2, cursor=first.next_cursor)
+        assert [o.order_id for o in first.items + second.items] == ['old_booked', 'old_failed', 'old_completed']
+        assert second.next_cursor is None
+        assert [o.order_id for o in repo.page_by_user_id('u1', status='FAILED').items] == ['old_failed']
+        assert [o.order_id for o in repo.iter_by_user_id('u1', page_size=1)] == \
+            ['old_booked', 'old_failed', 'old_completed']
+
+        orders = {o.order_id: o for o in repo.query_by_user_id('u1')}
+        assert set(orders) == {'old_booked', 'old_failed', 'old_completed'}
+        # Written back to the hot collection like any archived order
+        orders['old_completed'].status = 'FAILED'
+        repo.update_order(orders['old_completed'])
+        assert repo.db.orders.find_one({'_id': 'old_completed'})['status'] == 'FAILED'
+    finally:
+        mongo_client_registry.close()
+
+
+def test_transaction_written_while_archived_stays_hot(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    mongo_client_registry.close()
+    try:
+        txn_repo = TransactionRepository()
+        transaction = generate_mock_auth_transaction_object()
+        transaction.status = TRANSACTION_STATUS_COMPLETED
+        txn_repo.create_record(transaction)
+        order = _order('old_completed', 'COMPLETED', updated_at=1)
+        order.incoming_invoice = generate_mock_invoice(parent_transaction_id=transaction.transaction_id)
+        OrderRepository().create_order(order)
+
+        # A provider response lands between the copy to the archive and the delete from the hot collection
+        archive = txn_repo.db.transactions_archive
+        copy = archive.bulk_write
+
+        def copy_then_write(requests, **kwargs):
+            result = copy(requests, **kwargs)
+            transaction.provider_response = 'late response'
+            txn_repo.update_record(transaction)
+            return result
+
+        monkeypatch.setattr(archive, 'bulk_write', copy_then_write)
+        moved = TerminalDocumentArchiver(batch_size=10, archive_after_days=1).run(max_batches=1)
+
+        assert moved['transactions'] == 0
+        assert txn_repo.get_by_transaction_id(transaction.transaction_id).provider_response == 'late response'
+        assert 'transactions_archive_archive' not in TransactionRepository.all_indexes()
+    finally:
+        mongo_client_registry.close()
\ No newline at end of file
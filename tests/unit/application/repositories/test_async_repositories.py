@@ -0,0 +1,58 @@
+from application.models.order import Order
+from application.repositories.aio.async_mongo_client_registry import async_mongo_client_registry
+from application.repositories.aio.async_order_repository import AsyncOrderRepository
+from application.repositories.aio.event_loop import EventLoopThread
+from application.repositories.mongo_client_registry import mongo_client_registry
+from application.repositories.order_repository import OrderRepository
+from tests.objects.order import generate_mock_invoice
+
+
+def _order(order_id: str, created_at: int) -> Order:
+    return Order(
+        order_id=order_id,
+        user_id='u1',
+        entity='entity',
+        status='CREATED',
+        created_at=created_at,
+        updated_at=created_at,
+        purchase_record_ids=[],
+        incoming_invoice=generate_mock_invoice(),
+    )
+
+
+async def _client():
+    return async_mongo_client_registry.get_client()
+
+
+async def _read_and_update(order_id: str):
+    repo = AsyncOrderRepository()
+    order = await repo.get_by_order_id(order_id)
+    order.status = 'BOOKED'
+    await repo.update_order(order)
+    page = await repo.page_by_user_id('u1', page_size=2)
+    return order, page
+
+
+def test_async_repositories_share_one_client_per_loop_thread(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    monkeypatch.setattr('application.repositories.aio.async_mongo_client_registry.MONGODB_BACKEND', 'memory')
+    mongo_client_registry.close()
+    loop_thread = EventLoopThread()
+    try:
+        repo = OrderRepository()
+        for i in range(3):
+            repo.create_order(_order(f'o{i}', created_at=i))
+
+        order, page = loop_thread.run(_read_and_update('o1'))
+        assert order.version == 1
+        assert [o.order_id for o in page.items] == ['o2', 'o1']
+        assert repo.get_by_order_id('o1').status == 'BOOKED'
+
+        # Every call runs on the same loop, so on the same client
+        client = loop_thread.run(_client())
+        assert loop_thread.run(_client()) is client
+        loop_thread.stop()
+        assert loop_thread.run(_client()) is not client
+    finally:
+        loop_thread.stop()
+        mongo_client_registry.close()
\ No newline at end of file
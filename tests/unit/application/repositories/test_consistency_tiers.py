@@ -0,0 +1,33 @@
+from unittest.mock import MagicMock
+
+from pymongo.read_preferences import SecondaryPreferred
+from pymongo.write_concern import WriteConcern
+
+from application.repositories.consistency_tiers import READ_TIER_SECONDARY_OK, WRITE_TIER_DURABLE, \
+    WRITE_TIER_FAST, TierMetrics, strongest_write_tier, with_tiers
+
+
+def test_with_tiers_sets_collection_options():
+    collection = MagicMock()
+    assert with_tiers(collection) is collection
+    collection.with_options.assert_not_called()
+
+    with_tiers(collection, write_tier=WRITE_TIER_DURABLE, read_tier=READ_TIER_SECONDARY_OK)
+    options = collection.with_options.call_args.kwargs
+    assert options['write_concern'] == WriteConcern(w='majority', j=True)
+    assert isinstance(options['read_preference'], SecondaryPreferred)
+
+
+def test_strongest_write_tier_and_metrics():
+    assert strongest_write_tier([]) is None
+    assert strongest_write_tier([WRITE_TIER_FAST, None]) is None
+    assert strongest_write_tier([WRITE_TIER_FAST, WRITE_TIER_DURABLE, None]) == WRITE_TIER_DURABLE
+
+    metrics = TierMetrics()
+    metrics.observe('write', WRITE_TIER_FAST, 2.0)
+    metrics.observe('write', WRITE_TIER_FAST, 4.0)
+    with metrics.timed('read', None):
+        pass
+    snapshot = metrics.snapshot()
+    assert snapshot['write:fast'] == {'count': 2, 'total_ms': 6.0, 'max_ms': 4.0, 'avg_ms': 3.0}
+    assert snapshot['read:default']['count'] == 1
\ No newline at end of file
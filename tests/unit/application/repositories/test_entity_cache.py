@@ -0,0 +1,87 @@
+from unittest import mock
+
+import redis
+from flask import Flask
+
+from application.models.user import User
+from application.repositories.entity_cache import EntityCache, entity_cache
+from application.repositories.mongo_client_registry import mongo_client_registry
+from application.repositories.mongo_repository_base import fresh_reads
+from application.repositories.user_repository import UserRepository
+
+
+def test_get_many_decodes_hits_and_counts_misses():
+    cache = EntityCache(enabled=True, redis_url='redis://localhost:6379')
+    document = {'_id': 'o1', 'status': 'BOOKED', 'purchase_record_ids': ['p1']}
+    cache._redis = mock.Mock(mget=mock.Mock(return_value=[cache._encoder.encode(document), None]))
+
+    assert cache.get_many('orders', ['o1', 'o2']) == {'o1': document}
+    counters = cache.stats()['collections']['orders']
+    assert counters['hits'] == 1
+    assert counters['misses'] == 1
+    assert counters['hit_rate'] == 0.5
+
+
+def test_redis_failure_falls_back_to_empty_result():
+    cache = EntityCache(enabled=True, redis_url='redis://localhost:6379')
+    cache._redis = mock.Mock(mget=mock.Mock(side_effect=redis.ConnectionError('down')))
+
+    assert cache.get_many('orders', ['o1']) == {}
+    assert cache.stats()['collections']['orders']['errors'] == 1
+
+
+class FakeRedis:
+    """Just the redis calls of the entity cache, TTLs are left out."""
+
+    def __init__(self):
+        self.values = {}
+
+    def mget(self, keys):
+        return [self.values.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def set(self, key, value, ex=None, nx=False):
+        if not (nx and key in self.values):
+            self.values[key] = value
+
+    def execute(self):
+        pass
+
+
+def test_fill_after_a_concurrent_invalidation_is_dropped():
+    cache = EntityCache(enabled=True, redis_url='redis://localhost:6379')
+    cache._redis = FakeRedis()
+    stale = {'_id': 't1', 'status': 'PROCESSING'}
+
+    # A reader misses and loads the document, a writer updates it and invalidates before the reader fills
+    assert cache.get_many('transactions', ['t1']) == {}
+    cache.invalidate('transactions', ['t1'])
+    cache.set_many('transactions', [stale], ttl_sec=600)
+    assert cache.get_many('transactions', ['t1']) == {}
+
+    # Once the tombstone expired, reads fill the cache again
+    del cache._redis.values[cache._key('transactions', 't1')]
+    cache.set_many('transactions', [stale], ttl_sec=600)
+    assert cache.get_many('transactions', ['t1']) == {'t1': stale}
+
+
+def test_fresh_reads_skip_the_identity_map_and_the_cache(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    mongo_client_registry.close()
+    stale = User(user_id='u1', username='stale', preferences={}, login_method='PASSWORD')
+    monkeypatch.setattr(entity_cache, 'enabled', True)
+    monkeypatch.setattr(entity_cache, 'get_many', mock.Mock(return_value={'u1': stale.to_mongo_document()}))
+    monkeypatch.setattr(entity_cache, 'set_many', mock.Mock())
+    try:
+        repo = UserRepository()
+        repo.user_collection.insert_one(User(user_id='u1', username='fresh', preferences={}, login_method='PASSWORD').to_mongo_document())
+        with Flask(__name__).app_context():
+            assert repo.get_by_id('u1').username == 'stale'
+            with fresh_reads():
+                assert repo.get_by_id('u1').username == 'fresh'
+            assert entity_cache.get_many.call_count == 1
+            assert not entity_cache.set_many.called
+    finally:
+        mongo_client_registry.close()
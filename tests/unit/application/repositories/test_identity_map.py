@@ -0,0 +1,60 @@
+from flask import Flask
+
+from application.models.transactions import TRANSACTION_ACTION_CAPTURE
+from application.models.user import User
+from application.repositories.identity_map import current_identity_map
+from application.repositories.mongo_client_registry import mongo_client_registry
+from application.repositories.transaction_repository import TransactionRepository
+from tests.objects.transaction import generate_mock_auth_transaction_object, generate_mock_capture_transaction_object
+
+
+def test_identity_map_is_scoped_to_app_context_and_skips_partial_models():
+    app = Flask(__name__)
+    with app.app_context():
+        identity_map = current_identity_map()
+        user = User(user_id='u1', username='u1', preferences={}, login_method='PASSWORD')
+        identity_map.put('db.users', user)
+        assert current_identity_map().get('db.users', 'u1') is user
+
+        partial = User.from_partial_mongo_document({'user_id': 'u1'}, ['user_id'])
+        identity_map.put('db.users', partial)
+        assert identity_map.get('db.users', 'u1') is None
+
+    with app.app_context():
+        assert current_identity_map().get('db.users', 'u1') is None
+    assert current_identity_map() is None
+
+
+def test_transaction_queries_resolve_to_the_loaded_instances(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    mongo_client_registry.close()
+    try:
+        repo = TransactionRepository()
+        auth = generate_mock_auth_transaction_object()
+        auth.provider_transaction_id = 'pi_1'
+        capture = generate_mock_capture_transaction_object(
+            transaction_id='capture', parent_transaction_id=auth.transaction_id
+        )
+        repo.create_record(auth)
+        repo.create_record(capture)
+
+        with Flask(__name__).app_context():
+            loaded = repo.get_by_transaction_id(auth.transaction_id)
+            assert repo.query_by_provider_transaction_id('pi_1') == [loaded]
+            assert repo.query_by_provider_transaction_id('pi_1')[0] is loaded
+            lineage = repo.query_by_parent_transaction_id(auth.transaction_id)
+            assert lineage[0] is loaded
+            assert repo.query_by_parent_transaction_id(auth.transaction_id, TRANSACTION_ACTION_CAPTURE) == [lineage[1]]
+            assert repo.query_by_parent_transaction_id(auth.transaction_id, TRANSACTION_ACTION_CAPTURE)[0] is lineage[1]
+
+        # The auth was archived with its order, its capture is still hot
+        repo.db.transactions_archive.insert_one(repo.db.transactions.find_one({'_id': auth.transaction_id}))
+        repo.db.transactions.delete_one({'_id': auth.transaction_id})
+        with Flask(__name__).app_context():
+            loaded = repo.get_by_transaction_id(auth.transaction_id)
+            lineage = repo.query_by_parent_transaction_id(auth.transaction_id)
+            assert [txn.transaction_id for txn in lineage] == ['capture', auth.transaction_id]
+            assert lineage[1] is loaded and loaded._archived
+            assert repo.get_auth_with_children(auth.transaction_id).auth is loaded
+    finally:
+        mongo_client_registry.close()
\ No newline at end of file
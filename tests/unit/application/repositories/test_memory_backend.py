@@ -0,0 +1,117 @@
+import pytest
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from application.errors import DataNotFound
+from application.models.order import Order
+from application.models.user import User
+from application.repositories import memory_backend
+from application.repositories.memory_backend import MemoryClient
+from application.repositories.mongo_client_registry import mongo_client_registry
+from application.repositories.order_repository import OrderRepository
+from application.repositories.user_repository import UserRepository
+from tests.objects.order import generate_mock_invoice
+
+
+def test_memory_collection_queries_and_updates():
+    collection = MemoryClient().db.orders
+    collection.insert_many([
+        {'_id': f'o{i}', 'user_id': 'u1' if i % 2 else 'u2', 'created_at': i, 'notes': []} for i in range(10)
+    ])
+
+    page = list(collection.find(
+        {'user_id': 'u1', '$or': [{'created_at': {'$lt': 7}}, {'created_at': 7, '_id': {'$lt': 'o7'}}]},
+        {'created_at': 1}
+    ).sort([('created_at', -1), ('_id', -1)]).limit(2))
+    assert page == [{'_id': 'o5', 'created_at': 5}, {'_id': 'o3', 'created_at': 3}]
+
+    # Documents without a version match a compare-and-swap on version 0
+    update = {'$set': {'a.b': 1}, '$push': {'notes': {'$each': ['n']}}, '$inc': {'version': 1}}
+    result = collection.bulk_write([
+        UpdateOne({'_id': 'o1', 'version': {'$in': [0, None]}}, update),
+        UpdateOne({'_id': 'o2', 'version': 3}, {'$set': {'status': 'X'}}),
+    ])
+    assert result.matched_count == 1
+    assert collection.find_one({'_id': 'o1'}, {'a': 1, 'notes': 1, 'version': 1}) == \
+        {'_id': 'o1', 'a': {'b': 1}, 'notes': ['n'], 'version': 1}
+
+
+
+def test_memory_writes_by_id_do_not_scan(monkeypatch):
+    collection = MemoryClient().db.orders
+    collection.insert_many([{'_id': f'o{i}', 'version': 0} for i in range(100)])
+    checked = []
+    monkeypatch.setattr(memory_backend, 'matches', lambda document, query: checked.append(document) or True)
+
+    collection.update_one({'_id': 'o1', 'version': 0}, {'$inc': {'version': 1}})
+    collection.replace_one({'_id': 'o2'}, {'version': 5})
+    collection.delete_one({'_id': 'o3'})
+    collection.find_one({'_id': {'$in': ['o4', 'missing']}})
+    assert [document['_id'] for document in checked] == ['o1', 'o2', 'o3', 'o4']
+
+
+def test_memory_bulk_write_reports_errors_per_index():
+    collection = MemoryClient().db.orders
+    collection.insert_one({'_id': 'o1'})
+    requests = [InsertOne({'_id': 'o1'}), InsertOne({'_id': 'o2'}), DeleteOne({'_id': 'o1'})]
+
+    with pytest.raises(BulkWriteError) as ordered:
+        collection.bulk_write(requests, ordered=True)
+    assert [error['index'] for error in ordered.value.details['writeErrors']] == [0]
+    assert collection.count_documents({}) == 1
+
+    with pytest.raises(BulkWriteError) as unordered:
+        collection.bulk_write(requests, ordered=False)
+    assert [error['index'] for error in unordered.value.details['writeErrors']] == [0]
+    assert unordered.value.details['nInserted'] == 1 and unordered.value.details['nRemoved'] == 1
+    assert [document['_id'] for document in collection.find()] == ['o2']
+
+def test_repository_on_memory_backend(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    mongo_client_registry.close()
+    try:
+        repo = UserRepository()
+        repo.create(User(user_id='u1', username='u1', preferences={}, login_method='PASSWORD'))
+        user = repo.get_by_id('u1')
+        user.username = 'renamed'
+        repo.update_record(user)
+        assert repo.get_many(['u1', 'u2']).missing_ids == ['u2']
+        assert repo.get_by_id('u1', projection=['username']).username == 'renamed'
+        with pytest.raises(DataNotFound):
+            repo.get_by_id('u2')
+    finally:
+        mongo_client_registry.close()
+
+
+def _order(status: str) -> Order:
+    return Order(
+        order_id='o1',
+        user_id='u1',
+        entity='entity',
+        status=status,
+        created_at=1,
+        updated_at=2,
+        purchase_record_ids=[],
+        incoming_invoice=generate_mock_invoice(),
+    )
+
+
+def test_unsnapshotted_versioned_model_is_written(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    mongo_client_registry.close()
+    try:
+        repo = OrderRepository()
+        repo.create_order(_order('CREATED'))
+
+        # Built by the caller, so written with a $set of its whole document
+        order = _order('BOOKED')
+        write_filter, update = repo._versioned_write(order, order.to_mongo_update())
+        assert 'version' not in update['$set']
+        assert update['$inc'] == {'version': 1}
+
+        repo.update_order(order)
+        stored = repo.order_collection.find_one({'_id': 'o1'}, {'status': 1, 'version': 1})
+        assert stored == {'_id': 'o1', 'status': 'BOOKED', 'version': 1}
+        assert order.version == 1
+    finally:
+        mongo_client_registry.close()
\ No newline at end of file
@@ -0,0 +1,20 @@
+from application.repositories.mongo_client_registry import MongoClientRegistry
+
+
+def test_get_client_is_shared_within_process():
+    registry = MongoClientRegistry()
+    client = registry.get_client()
+    assert registry.get_client() is client
+    assert registry.pool_stats()['client_initialized']
+    registry.close()
+
+
+def test_reset_after_fork_creates_new_client():
+    registry = MongoClientRegistry()
+    client = registry.get_client()
+    registry.reset_after_fork()
+    assert not registry.pool_stats()['client_initialized']
+    new_client = registry.get_client()
+    assert new_client is not client
+    registry.close()
+    client.close()
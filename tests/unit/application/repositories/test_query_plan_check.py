@@ -0,0 +1,24 @@
+from application.repositories.mongo_repository_base import QueryShape
+from application.repositories.query_plan_check import seed_documents, winning_plan_stages
+
+
+def test_winning_plan_stages_ignore_rejected_plans():
+    explain = {
+        'queryPlanner': {
+            # Slot based engine nests the plan tree under queryPlan
+            'winningPlan': {'queryPlan': {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN'}}},
+            'rejectedPlans': [{'stage': 'COLLSCAN'}],
+        }
+    }
+    assert winning_plan_stages(explain) == {'FETCH', 'IXSCAN'}
+
+
+def test_seed_documents_match_sample_values():
+    shapes = [
+        QueryShape('orders.by_user', 'orders', {'user_id': 'u1'}),
+        QueryShape('orders.page', 'orders', {'user_id': 'u1', 'status': 'CREATED', '$or': []}),
+    ]
+    documents = seed_documents(shapes)
+    matching = [document for document in documents if document['user_id'] == 'u1' and document['status'] == 'CREATED']
+    assert len(matching) == len(documents) // 10
+    assert '$or' not in documents[0]
\ No newline at end of file
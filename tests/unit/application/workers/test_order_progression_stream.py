@@ -0,0 +1,46 @@
+from application.repositories.consistency_tiers import tier_metrics
+from application.repositories.mongo_client_registry import mongo_client_registry
+from application.workers.order_progression_stream import OrderProgressionStream
+
+
+class RecordingTaskQueue:
+
+    def __init__(self):
+        self.queued = []
+
+    def queue_order_fulfillment(self, payload, delay=30):
+        self.queued.append((payload['order_id'], delay))
+
+
+def _change(record_id: str, order_id: str) -> dict:
+    return {'operationType': 'update', 'documentKey': {'_id': record_id}, 'fullDocument': {'order_id': order_id}}
+
+
+def test_fulfillment_queued_once_every_record_is_terminal(monkeypatch):
+    monkeypatch.setattr('application.repositories.mongo_client_registry.MONGODB_BACKEND', 'memory')
+    mongo_client_registry.close()
+    try:
+        task_queue = RecordingTaskQueue()
+        stream = OrderProgressionStream(task_queue=task_queue)
+        stream.db.orders.insert_one({
+            '_id': 'o1', 'order_id': 'o1', 'status': 'BOOKED', 'purchase_record_ids': ['r1', 'r2'], 'version': 0
+        })
+        stream.db.purchase_records.insert_many([
+            {'_id': 'r1', 'record_id': 'r1', 'order_id': 'o1', 'status': 'COMPLETED', 'version': 1},
+            {'_id': 'r2', 'record_id': 'r2', 'order_id': 'o1', 'status': 'PROCESSING', 'version': 0},
+        ])
+
+        assert not stream.handle_change(_change('r1', 'o1'))
+        assert not stream.handle_change(_change('r3', 'unknown_order'))
+
+        stream.db.purchase_records.update_one({'_id': 'r2'}, {'$set': {'status': 'FAILED', 'version': 1}})
+        assert stream.handle_change(_change('r2', 'o1'))
+        assert task_queue.queued == [('o1', 0)]
+
+        assert stream.load_resume_token() is None
+        fast_writes = tier_metrics.snapshot().get('write:fast', {}).get('count', 0)
+        stream.save_resume_token({'_data': 'token'})
+        assert tier_metrics.snapshot()['write:fast']['count'] == fast_writes + 1
+        assert OrderProgressionStream(task_queue=task_queue).load_resume_token() == {'_data': 'token'}
+    finally:
+        mongo_client_registry.close()